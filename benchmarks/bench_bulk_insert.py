@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+批量插入基准测试：ORM insert_batch(add_all) 对比 bulk_insert(分批 executemany)
+
+运行: python benchmarks/bench_bulk_insert.py [行数]
+"""
+import sys
+import time
+
+from common import make_engine, make_file, File
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"写入行数: {rows}")
+    print("-" * 60)
+
+    engine = make_engine()
+    entities = [make_file(i) for i in range(1, rows + 1)]
+    start = time.perf_counter()
+    engine.insert_batch(entities)
+    elapsed = time.perf_counter() - start
+    print(f"{'insert_batch (ORM add_all)':<36} {elapsed:8.3f}s {rows / elapsed:12.0f} rows/s")
+
+    for chunk_size, return_ids in ((1000, False), (5000, False), (1000, True)):
+        engine = make_engine()
+        entities = [make_file(i) for i in range(1, rows + 1)]
+        result = engine.bulk_insert(File, entities, chunk_size=chunk_size, return_ids=return_ids)
+        label = f"bulk_insert chunk={chunk_size} ids={return_ids}"
+        print(f"{label:<36} {result.elapsed:8.3f}s {result.rows_per_sec:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+列式结果基准测试
+对 file 表执行 SELECT user_id, size（ROWS 行），对比：
+1. exec_sql 默认：每行 row._asdict() 生成 dict，再在 Python 中按 user_id 汇总
+2. exec_sql(columnar=True)：分批转置为列数组，再用 columnar.group_by 汇总
+输出耗时与结果占用的内存（tracemalloc 峰值）；安装 NumPy 时为 ndarray，否则为 array.array
+
+运行: python benchmarks/bench_columnar.py
+"""
+import time
+import tracemalloc
+
+from common import make_engine
+
+from org.dao import columnar
+
+ROWS = 200000
+SQL = "SELECT user_id, size FROM file"
+
+
+def rows_mode(engine):
+    rows = engine.exec_sql(SQL)
+    usage = {}
+    for row in rows:
+        count, size = usage.get(row["user_id"], (0, 0))
+        usage[row["user_id"]] = (count + 1, size + row["size"])
+    return usage
+
+
+def columnar_mode(engine):
+    data = engine.exec_sql(SQL, columnar=True)
+    return columnar.group_by(data, "user_id", sums=["size"])
+
+
+def measure(func, engine):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(engine)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    engine = make_engine(ROWS)
+    print(f"{ROWS} 行，数组实现: {'NumPy' if columnar.np is not None else 'array.array'}")
+    expected, *_ = measure(rows_mode, engine)
+    for label, func in (("逐行 dict", rows_mode), ("列式", columnar_mode)):
+        result, elapsed, peak = measure(func, engine)
+        print(f"{label:<10} {elapsed * 1000:9.1f} ms   内存峰值 {peak / 1024 / 1024:8.1f} MB")
+        if func is columnar_mode:
+            got = {k: (c, s) for k, c, s in zip(result["user_id"].tolist() if columnar.np is not None else result["user_id"],
+                                                 result["count"], result["size"])}
+            assert got == expected, "汇总结果不一致"
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
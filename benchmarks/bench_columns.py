@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+parse_columns 微基准测试
+对比旧的 dir(cls) 扫描方式与列元数据注册表（org.dao.columns）的耗时
+
+运行: python benchmarks/bench_columns.py
+"""
+import os
+import sys
+import timeit
+from typing import Iterable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from org.dao.engine import parse_columns, build_entities  # noqa: E402
+from org.mysql.entities import File  # noqa: E402
+
+
+def legacy_parse_columns(cls, select_columns: Iterable[str] = None, exclude_columns: Iterable[str] = None):
+    # 旧实现：每次调用都扫描 dir(cls)
+    _parsed_columns: set = set()
+    _skip_attrs = ['registry', 'metadata', 'self']
+    for attr in (select_columns if select_columns else dir(cls)):
+        if callable(getattr(cls, attr)) or attr.startswith("_") or attr in _skip_attrs:
+            continue
+        _parsed_columns.add(getattr(cls, attr))
+    if exclude_columns:
+        return [col for col in _parsed_columns if col.name not in exclude_columns]
+    return list(_parsed_columns)
+
+
+def legacy_wrapper_query_result(result, cls, **kwargs):
+    _parsed_columns = legacy_parse_columns(cls, kwargs.get('columns'), kwargs.get('exclude_columns'))
+    instances = []
+    for _result in result:
+        _instance = cls()
+        for _column, _value in zip(_parsed_columns, _result):
+            setattr(_instance, _column.key, _value)
+        instances.append(_instance)
+    return instances
+
+
+def bench(label: str, func, number: int):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"{label:<48} {seconds / number * 1e6:10.2f} us/op")
+    return seconds
+
+
+def main():
+    number = 2000
+    print(f"实体: {File.__name__}, 字段数: {len(File.__table__.columns)}")
+    print("-" * 70)
+    old = bench("legacy parse_columns()", lambda: legacy_parse_columns(File), number)
+    new = bench("registry parse_columns()", lambda: parse_columns(File), number)
+    print(f"{'speedup':<48} {old / new:10.1f} x")
+    print("-" * 70)
+    old = bench("legacy parse_columns(exclude_columns=...)",
+                lambda: legacy_parse_columns(File, exclude_columns=['path', 'upload_id']), number)
+    new = bench("registry parse_columns(exclude_columns=...)",
+                lambda: parse_columns(File, exclude_columns=['path', 'upload_id']), number)
+    print(f"{'speedup':<48} {old / new:10.1f} x")
+    print("-" * 70)
+    # 模拟 /file/list 的一次小结果集：10 行
+    rows = [tuple(range(len(File.__table__.columns)))] * 10
+    number = 500
+    old = bench("legacy build_entities(10 rows)",
+                lambda: legacy_wrapper_query_result(rows, File), number)
+    new = bench("registry build_entities(10 rows)",
+                lambda: build_entities(rows, File), number)
+    print(f"{'speedup':<48} {old / new:10.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+请求截止时间基准测试
+连接池 POOL_SIZE 个连接，先发起 POOL_SIZE 个慢查询占满连接池，再执行一个简单查询，对比：
+1. 无截止时间：慢查询执行完才归还连接，简单查询等待获取连接
+2. 截止时间 DEADLINE 秒：慢查询到期被取消（SQLite 为 interrupt，MySQL / PostgreSQL / Doris 为语句超时），连接随即归还
+输出简单查询的等待时间与慢查询的结果
+
+运行: python benchmarks/bench_deadline.py
+"""
+import threading
+import time
+
+from common import make_engine
+
+from org.dao import deadline
+from org.dao.deadline import DeadlineExceeded
+from org.mysql.entities import File
+
+POOL_SIZE = 2
+DEADLINE = 0.2
+SLOW_SQL = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 5000000) SELECT count(*) FROM c"
+
+
+def slow_query(engine, timeout, results: list):
+    start = time.perf_counter()
+    try:
+        if timeout is None:
+            engine.exec_sql(SLOW_SQL)
+        else:
+            with deadline.deadline(timeout, endpoint="bench"):
+                engine.exec_sql(SLOW_SQL)
+        results.append(f"完成 {time.perf_counter() - start:.2f}s")
+    except DeadlineExceeded:
+        results.append(f"取消 {time.perf_counter() - start:.2f}s")
+
+
+def run(label: str, timeout):
+    engine = make_engine(100, pool_size=POOL_SIZE, max_overflow=0, pool_timeout=30)
+    engine.select_count(File)
+    results = []
+    threads = [threading.Thread(target=slow_query, args=(engine, timeout, results)) for _ in range(POOL_SIZE)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    engine.select_count(File)
+    waited = time.perf_counter() - start
+    for t in threads:
+        t.join()
+    print(f"  {label:<16} 简单查询等待 {waited * 1000:8.1f} ms   慢查询: {', '.join(results)}")
+    engine.dispose()
+
+
+def main():
+    print(f"连接池 {POOL_SIZE} 个连接，{POOL_SIZE} 个慢查询占满后执行简单查询")
+    run("无截止时间", None)
+    run(f"截止时间 {DEADLINE}s", DEADLINE)
+
+
+if __name__ == "__main__":
+    main()
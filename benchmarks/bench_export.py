@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+导出基准测试
+对 file 表的 ROWS 行，对比：
+1. 现有 /file/exec 的 JSON 路径：exec_sql 取全部行为 dict，包装为 IResponse 后 JSON 序列化
+2. DbEngine.export 流式导出为 Parquet / Arrow IPC / CSV（每批 BATCH_SIZE 行）
+输出耗时、内存峰值（tracemalloc）与输出大小；Parquet / Arrow 需要安装 pyarrow
+
+运行: python benchmarks/bench_export.py
+"""
+import io
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from common import make_engine
+
+from org.common import iresponse
+
+ROWS = 100000
+BATCH_SIZE = 5000
+SQL = "SELECT * FROM file"
+
+
+def json_path(engine) -> int:
+    rows = engine.exec_sql(SQL)
+    body = json.dumps(jsonable_encoder(iresponse.success_with_data(rows)), ensure_ascii=False).encode("utf-8")
+    return len(body)
+
+
+def export_path(fmt: str):
+    def _export(engine) -> int:
+        return engine.export(SQL, io.BytesIO(), fmt=fmt, batch_size=BATCH_SIZE).bytes
+    return _export
+
+
+def measure(func, engine):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func(engine)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    engine = make_engine(ROWS)
+    print(f"{ROWS} 行，导出每批 {BATCH_SIZE} 行（耗时含 tracemalloc 开销）")
+    cases = [("JSON (/file/exec)", json_path)] + [(f"export {fmt}", export_path(fmt)) for fmt in ("csv", "arrow", "parquet")]
+    for label, func in cases:
+        try:
+            elapsed, peak, size = measure(func, engine)
+        except ImportError as e:
+            print(f"{label:<20} 跳过: {e}")
+            continue
+        print(f"{label:<20} {elapsed * 1000:9.1f} ms   内存峰值 {peak / 1024 / 1024:8.1f} MB   输出 {size / 1024 / 1024:7.1f} MB")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
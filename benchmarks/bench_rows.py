@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+只读查询行对象基准测试
+对 file 表的 ROWS 行，对比 /file/list_by_args 的两种实现：
+1. ORM 实例：select_list 逐行 cls() + 实例字典赋值，再 FileResponse.model_validate(f).model_dump() 转为 dict
+2. 轻量行对象：select_list(as_rows=True) 由游标行直接构造 __slots__ 数据类，直接序列化
+分别统计查询、查询 + 响应序列化（与 FastAPI 相同，jsonable_encoder）的耗时，以及查询结果占用的内存（tracemalloc）
+
+运行: python benchmarks/bench_rows.py
+"""
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from common import make_engine
+
+from org.common import iresponse
+from org.models.resps import FileResponse
+from org.mysql.entities import File
+
+ROWS = 20000
+
+
+def orm_mode(engine, serialize: bool):
+    files = engine.select_list(File)
+    if not serialize:
+        return files
+    data = [FileResponse.model_validate(f).model_dump() for f in files]
+    return json.dumps(jsonable_encoder(iresponse.success_with_data(data)))
+
+
+def rows_mode(engine, serialize: bool):
+    rows = engine.select_list(File, as_rows=True)
+    if not serialize:
+        return rows
+    return json.dumps(jsonable_encoder(iresponse.success_with_data(rows)))
+
+
+def timed(func, engine, serialize: bool):
+    start = time.perf_counter()
+    result = func(engine, serialize)
+    return result, time.perf_counter() - start
+
+
+def retained(func, engine) -> int:
+    tracemalloc.start()
+    result = func(engine, False)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    engine = make_engine(ROWS)
+    print(f"{ROWS} 行")
+    bodies = []
+    for label, func in (("ORM 实例", orm_mode), ("轻量行对象", rows_mode)):
+        _, elapsed = timed(func, engine, False)
+        body, total = timed(func, engine, True)
+        bodies.append(json.loads(body))
+        memory = retained(func, engine)
+        print(f"{label:<8} 查询 {elapsed * 1000:8.1f} ms   查询 + 序列化 {total * 1000:8.1f} ms"
+              f"   结果内存 {memory / 1024 / 1024:6.1f} MB（{memory / ROWS:5.0f} B/行）")
+    assert bodies[0] == bodies[1], "序列化结果不一致"
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
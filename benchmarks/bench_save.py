@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+save / save_all 基准测试
+对 MySQL 与 Doris 的 FileService（均指向 SQLite 临时库，Doris 实体的表结构相同），对比：
+1. 原 save：get_by_id 判断是否存在，再 update_by_id（先 SELECT 再 UPDATE）或 insert
+2. 新 save：字段齐全时一条 upsert
+3. save_all：一次 IN 查询区分新增/已存在，一次 bulk insert + 一次 bulk update
+每轮保存 BATCH 个实体（一半已存在、一半新增），输出吞吐与执行的 SQL 语句数
+
+运行: python benchmarks/bench_save.py
+"""
+import time
+
+from sqlalchemy import event
+
+from common import make_engine, make_file
+
+from org.doris import entities as doris_entities
+from org.doris.service import FileService as DorisFileService
+from org.mysql import entities as mysql_entities
+from org.mysql.service import FileService as MysqlFileService
+
+ROWS = 10000
+BATCH = 2000
+
+
+def legacy_save(service, entity):
+    if service.get_by_id(entity.id):
+        # 原 update_by_id：先加载整行再逐字段复制
+        service.db_engine.update(entity, orm=True, id=entity.id)
+    else:
+        service.db_engine.insert(entity)
+
+
+def make_batch(entity_cls, offset: int) -> list:
+    # 前一半更新已有记录，后一半新增
+    ids = list(range(offset + 1, offset + BATCH // 2 + 1)) + list(range(ROWS + offset + 1, ROWS + offset + BATCH // 2 + 1))
+    return [entity_cls(**{k: v for k, v in vars(make_file(i, id=i, size=i * 2)).items() if not k.startswith("_")})
+            for i in ids]
+
+
+def run(service, entity_cls, label: str, func, offset: int, stats: dict):
+    entities = make_batch(entity_cls, offset)
+    stats["statements"] = 0
+    start = time.perf_counter()
+    func(service, entities)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<16} {BATCH / elapsed:10.0f} 行/秒   SQL {stats['statements']:6d} 条（executemany 计 1 条）")
+
+
+def main():
+    cases = (("原 save（逐个）", lambda s, es: [legacy_save(s, e) for e in es]),
+             ("save（逐个）", lambda s, es: [s.save(e) for e in es]),
+             ("save_all", lambda s, es: s.save_all(es)))
+    for name, service_cls, module in (("MySQL FileService", MysqlFileService, mysql_entities),
+                                      ("Doris FileService", DorisFileService, doris_entities)):
+        engine = make_engine(ROWS)
+        module.Base.metadata.create_all(engine.get_engine())
+        service = service_cls()
+        service.db_engine = engine
+        stats = {"statements": 0}
+        event.listen(engine.get_engine(), "before_cursor_execute",
+                     lambda *args: stats.__setitem__("statements", stats["statements"] + 1))
+        print(f"{name}: 每轮 {BATCH} 个实体（{BATCH // 2} 更新 + {BATCH // 2} 新增）")
+        for i, (label, func) in enumerate(cases):
+            run(service, module.File, label, func, i * BATCH, stats)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
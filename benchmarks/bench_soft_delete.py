@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+逻辑删除基准测试
+对 doc 表（BaseEntity 子类，有 is_delete 逻辑删除列）的 ROWS 行，对比删除 BATCH 个 id：
+1. 原 delete_by_id（逐个）：get_by_id 查询整行，再 update_by_id 标记删除
+2. delete_by_id（逐个）：一条 UPDATE ... SET is_delete = 1
+3. soft_delete(ids)：一条 UPDATE ... WHERE id IN (...)
+以及 purge_deleted 分批物理删除的吞吐，输出耗时与执行的 SQL 语句数
+
+运行: python benchmarks/bench_soft_delete.py
+"""
+import time
+from typing import Optional
+
+from sqlalchemy import Integer, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from common import make_engine
+
+from org.dao import BaseEntity
+from org.service import IService
+
+ROWS = 20000
+BATCH = 2000
+
+
+class Doc(BaseEntity):
+    __tablename__ = 'bench_doc'
+    title: Mapped[Optional[str]] = mapped_column(String(64))
+    owner: Mapped[Optional[int]] = mapped_column(Integer)
+
+
+class DocService(IService[Doc]):
+    entity_cls = Doc
+
+
+def legacy_delete_by_id(service, eid):
+    # 原实现：先查询整行，再按主键更新
+    if service.get_by_id(eid, with_deleted=True):
+        service.db_engine.update_by_id(Doc(id=eid, is_delete=True))
+
+
+def run(label: str, func, stats: dict):
+    stats["statements"] = 0
+    start = time.perf_counter()
+    rows = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {elapsed * 1000:8.1f} ms   {rows / elapsed:10.0f} 行/秒   SQL {stats['statements']:6d} 条")
+
+
+def main():
+    engine = make_engine()
+    BaseEntity.metadata.create_all(engine.get_engine())
+    engine.bulk_insert(Doc, [Doc(id=i, title=f"doc_{i}", owner=i % 100) for i in range(1, ROWS + 1)], chunk_size=5000)
+    service = DocService(engine)
+    stats = {"statements": 0}
+    event.listen(engine.get_engine(), "before_cursor_execute",
+                 lambda *args: stats.__setitem__("statements", stats["statements"] + 1))
+    print(f"{ROWS} 行，每种方式删除 {BATCH} 个 id")
+    batches = [range(i * BATCH + 1, (i + 1) * BATCH + 1) for i in range(3)]
+    run("原 delete_by_id（逐个）", lambda: len([legacy_delete_by_id(service, eid) for eid in batches[0]]), stats)
+    run("delete_by_id（逐个）", lambda: len([service.delete_by_id(eid) for eid in batches[1]]), stats)
+    run("soft_delete(ids)", lambda: service.soft_delete(batches[2]), stats)
+    run("purge_deleted", lambda: service.purge_deleted(chunk_size=1000), stats)
+    assert service.count_by_args(with_deleted=True) == ROWS - 3 * BATCH
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+语句缓存基准测试
+按几种常见的查询形态循环调用 select_list / select_one（参数值每次不同），对比：
+1. statement_cache_size=0：每次通过 _wrapper_query 构建 Query 并编译
+2. 默认：按查询形态复用 select 语句，只绑定新参数
+同时单独测量构建语句本身的耗时（不含执行），并输出缓存命中率
+
+运行: python benchmarks/bench_statement_cache.py
+"""
+import timeit
+
+from sqlalchemy import desc
+
+from common import make_engine
+
+from org.dao.engine import _wrapper_query
+from org.mysql.entities import File
+
+ROWS = 10000
+NUMBER = 2000
+
+
+def shapes(i: int):
+    # (方法, 位置参数, 关键字参数)
+    return [
+        ("select_list", (), dict(user_id=i % 100, order_by=File.created_at)),
+        ("select_list", (File.id.in_([i, i + 1, i + 2]),), dict(columns=["id", "name", "size"])),
+        ("select_list", (File.size > i * 1024, File.size <= (i + 10) * 1024), dict(order_by=[desc(File.size), File.id])),
+        ("select_one", (), dict(md5=f"{i % ROWS + 1:032x}")),
+    ]
+
+
+def run(engine, number: int):
+    for i in range(number):
+        for method, args, kwargs in shapes(i):
+            getattr(engine, method)(File, *args, **kwargs)
+
+
+def build_only(engine, number: int):
+    session = engine.get_session()
+    for i in range(number):
+        for method, args, kwargs in shapes(i):
+            if engine.stmt_cache.maxsize:
+                engine.stmt_cache.lookup(File, args, kwargs)
+            else:
+                _wrapper_query(session.query(File), File, args=args, **kwargs)
+    session.close()
+
+
+def main():
+    engine = make_engine(ROWS)
+    calls = NUMBER * len(shapes(0))
+    for label, size in (("不缓存", 0), ("语句缓存", 512)):
+        engine.stmt_cache.maxsize = size
+        engine.stmt_cache.clear()
+        build = min(timeit.repeat(lambda: build_only(engine, NUMBER), number=1, repeat=3))
+        total = min(timeit.repeat(lambda: run(engine, NUMBER), number=1, repeat=3))
+        print(f"{label:<8} 构建语句 {build / calls * 1e6:8.2f} us/次   查询(含执行) {total / calls * 1e6:8.2f} us/次")
+    print(f"语句缓存统计: {engine.stmt_cache.stats()}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
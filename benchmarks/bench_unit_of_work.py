@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+请求级工作单元基准测试
+模拟一个请求内的多次 IService 调用（查询 + 更新 + 新增 + 分页），对比：
+1. 每次调用各自打开会话并提交
+2. 在工作单元中共用一个会话，结束时提交一次
+统计每个请求的连接签出次数、提交次数与耗时
+
+运行: python benchmarks/bench_unit_of_work.py
+"""
+import time
+
+from sqlalchemy import event
+
+from common import make_engine, make_file
+
+from org.dao.uow import unit_of_work
+from org.mysql.service import FileService
+
+ROWS = 10000
+REQUESTS = 500
+
+
+def simulate_request(service: FileService, i: int):
+    entity = service.get_by_id(i % ROWS + 1)
+    entity.size += 1
+    service.update_by_id(entity)
+    service.save(make_file(ROWS + i, id=ROWS + i))
+    service.page(1, 20, user_id=i % 100)
+
+
+def run(service: FileService, stats: dict, use_uow: bool, offset: int) -> float:
+    stats.update(checkout=0, commit=0)
+    start = time.perf_counter()
+    for i in range(offset, offset + REQUESTS):
+        if use_uow:
+            with unit_of_work():
+                simulate_request(service, i)
+        else:
+            simulate_request(service, i)
+    return time.perf_counter() - start
+
+
+def main():
+    engine = make_engine(ROWS)
+    service = FileService()
+    service.db_engine = engine
+    stats = {"checkout": 0, "commit": 0}
+    event.listen(engine.get_engine(), "checkout", lambda *args: stats.__setitem__("checkout", stats["checkout"] + 1))
+    event.listen(engine.get_engine(), "commit", lambda *args: stats.__setitem__("commit", stats["commit"] + 1))
+
+    print(f"{REQUESTS} 个请求，每个请求 4 次 IService 调用")
+    for label, use_uow, offset in (("各自提交", False, 0), ("工作单元", True, REQUESTS)):
+        elapsed = run(service, stats, use_uow, offset)
+        print(f"{label:<8} {elapsed * 1000 / REQUESTS:8.3f} ms/请求   "
+              f"签出 {stats['checkout'] / REQUESTS:5.1f} 次/请求   提交 {stats['commit'] / REQUESTS:5.1f} 次/请求")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
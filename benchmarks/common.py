@@ -0,0 +1,38 @@
+"""
+基准测试公共工具：基于 SQLite 临时库构造 DbEngine 与 file 表测试数据
+"""
+import datetime
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger  # noqa: E402
+
+from org.dao.engine import DbEngine, EngineConfig  # noqa: E402
+from org.mysql.entities import File, Base  # noqa: E402
+
+# 基准测试只关心耗时，屏蔽 DEBUG/INFO 日志
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+
+def make_file(i: int, **kwargs) -> File:
+    now = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=i)
+    values = dict(created_at=now, updated_at=now, user_id=i % 100, md5=f"{i:032x}", name=f"file_{i}.bin",
+                  size=i * 1024, bucket="bench", path=f"/bench/{i}", upload_status=1)
+    values.update(kwargs)
+    return File(**values)
+
+
+def make_engine(rows: int = 0, **kwargs) -> DbEngine:
+    """
+    创建 SQLite 临时库并写入 rows 条 file 记录
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="hello_py_bench_"), "bench.db")
+    engine = DbEngine(EngineConfig(name="bench", protocol="sqlite", host=None, port=None, database=path, **kwargs))
+    Base.metadata.create_all(engine.get_engine())
+    if rows:
+        engine.bulk_insert(File, [make_file(i) for i in range(1, rows + 1)], chunk_size=5000)
+    return engine
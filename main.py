@@ -1,19 +1,53 @@
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
+from org.app.deadline import DeadlineMiddleware, deadline_exceeded_handler
 from org.app.index import router as index_router
+from org.dao.deadline import DeadlineExceeded
+from org.dao.purge import purge_job
+from org.dao.registry import registry
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # 启动时创建引擎并预建连接，避免首个请求承担建连耗时；未配置 DB_WARM_UP 时按需创建
+    names = warm_up_engines()
+    if names:
+        connections = os.getenv('DB_WARM_UP_CONNECTIONS')
+        await registry.warm_up(names, connections=int(connections) if connections else None)
+    # 配置 DB_PURGE_INTERVAL(秒) 时后台定期物理删除逻辑删除超过 DB_PURGE_RETENTION(秒，默认 7 天) 的行
+    purge_interval = os.getenv('DB_PURGE_INTERVAL')
+    if purge_interval:
+        retention = os.getenv('DB_PURGE_RETENTION')
+        purge_job.start(float(purge_interval), retention=float(retention) if retention else None)
+    yield
+    purge_job.stop()
+    await registry.dispose()
 
 
-app = FastAPI(title="My Project API")
+app = FastAPI(title="My Project API", lifespan=lifespan)
+# 配置 DB_REQUEST_TIMEOUT(秒) 时启用请求级截止时间：SQL 按剩余时间设置数据库端语句超时，超时返回 504；流式导出不限制
+request_timeout = os.getenv('DB_REQUEST_TIMEOUT')
+if request_timeout:
+    app.add_middleware(DeadlineMiddleware, timeout=float(request_timeout), budgets={'/file/export': None})
+app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
 
 
 from org.app.FileController import router as file_router
 from org.app.webSocket import router as webSocket_router
+from org.app.health import router as health_router, warm_up_engines
+from org.app.monitor import router as monitor_router, admin_router
 # 注册路由
 app.include_router(index_router, prefix="/index", tags=["fast"])
 app.include_router(file_router)  # prefix="/file" 已在 file_api.py 里定义
 app.include_router(webSocket_router)
+app.include_router(health_router)
+app.include_router(monitor_router)
+app.include_router(admin_router)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="localhost", port=8888)
\ No newline at end of file
+    uvicorn.run(app, host="localhost", port=8888)
@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# 导入 org 时读取一次 .env 文件，之后各模块（main.py 的 DB_* 配置、引擎配置等）读取的环境变量都已包含 .env 中的值
+load_dotenv()
@@ -4,17 +4,20 @@ from fastapi import Query
 from fastapi import Body
 from typing import Type, List, Dict, Any
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 
 from ..common import iresponse
+from .deps import UnitOfWorkDep
 from ..common.ierrors import ErrorCodes
 from ..dao import Page
+from ..dao.export import MEDIA_TYPES
 from ..models.reqs import FileUploadRequest
 from ..models.resps import FileResponse
 from org.doris.entities import File
 from loguru import logger
-from org.doris.service import file_service
+from org.doris.service import file_service, async_file_service
 
-router = APIRouter(prefix="/file", tags=["file"])
+router = APIRouter(prefix="/file", tags=["file"], dependencies=[UnitOfWorkDep])
 
 
 @router.get("/list")
@@ -51,7 +54,7 @@ def get_file_by_id(file_id: int):
     if not file_id:
         return iresponse.error(ErrorCodes.PARAM_ERROR)
 
-    file: File = file_service.get_file_by_id(file_id)
+    file: File = file_service.get_by_id(file_id)
     if not file:
         return iresponse.error(ErrorCodes.DATA_NOT_EXIST)
 
@@ -78,14 +81,13 @@ async def list_files_post(request: Request):
 
     # 过滤掉 ORM 不存在的字段
     filters = filter_dict_from_query(File, query_params)
+    # 看板类重复查询可传 cache_ttl(秒) 缓存结果，写 file 表时自动失效
+    cache_ttl = query_params.get("cache_ttl")
 
-    # 查询数据库
-    file_list: List[File] = file_service.list_files_by_args(**filters)
-
-    # 序列化成 Pydantic 模型
-    result = [FileResponse.from_orm(f).dict() for f in file_list]
+    # 查询数据库（异步引擎，不阻塞事件循环）；只读列表直接返回轻量行对象，字段与 FileResponse 一致，可直接序列化
+    file_list = await async_file_service.list_by_args(**filters, cache_ttl=cache_ttl, as_rows=True)
 
-    return iresponse.success_with_data(data=result)
+    return iresponse.success_with_data(data=file_list)
 
 
 @router.get("/delete/{file_id}")
@@ -106,8 +108,10 @@ async def remove_files_by_args(request: Request):
 
     # 过滤掉 ORM 不存在的字段
     filters = filter_dict_from_query(File, query_params)
-    # 查询数据库
-    removed: bool = file_service.delete_file_by_args(**filters)
+    if not filters:
+        return iresponse.error(ErrorCodes.PARAM_ERROR)
+    # 查询数据库（异步引擎，不阻塞事件循环）
+    removed: bool = await async_file_service.remove_by_args(**filters)
     return iresponse.success_with_data(removed)
 
 
@@ -129,23 +133,64 @@ async def exec_sql(request: Request):
     sql = query_params.get("sql", "")
     if not sql:
         return iresponse.error(ErrorCodes.PARAM_ERROR)
-    result = file_service.exec_sql(sql)
+    result = await async_file_service.exec_sql(sql)
     return iresponse.success_with_data(result)
 
 
+@router.post("/export")
+async def export_files(request: Request,
+                       format: str = Query(default="parquet"),
+                       batch_size: int = Query(default=None)):
+    """
+    流式导出（arrow / parquet / csv），结果按批写出，不经过 JSON 包装，也不全部加载到内存
+    JSON 中传 sql 时导出该查询（只允许查询语句），否则按 File 字段过滤导出
+    """
+    query_params = await request.json()
+    if not isinstance(query_params, dict):
+        return iresponse.error("参数格式错误，应为 JSON 对象")
+    sql = query_params.get("sql")
+    try:
+        if sql:
+            chunks = file_service.iter_export_sql(sql, fmt=format, batch_size=batch_size)
+        else:
+            chunks = file_service.iter_export_by_args(fmt=format, batch_size=batch_size,
+                                                      **filter_dict_from_query(File, query_params))
+    except ValueError as e:
+        logger.warning(f"导出参数错误: {e}")
+        return iresponse.error(ErrorCodes.PARAM_ERROR)
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="file.{format}"'})
+
+
 @router.post("/page")
 def get_file_pages(user_id: int = Query(default=None),
                      page_num: int = Query(default=1),
-                     page_size: int = Query(default=10)):
+                     page_size: int = Query(default=10),
+                     cursor: str = Query(default=None),
+                     keyset: bool = Query(default=False),
+                     count: str = Query(default='exact'),
+                     cache_ttl: int = Query(default=0)):
     _part_keys_filters = [
         File.user_id.__eq__(user_id) if user_id else None
     ]
     _part_key_kwargs = {
         "order_by": "created_at",
         "page_num": page_num,
-        "page_size": page_size
+        "page_size": page_size,
+        # 游标分页：传 cursor 或 keyset=true，翻页代价与页码无关
+        "cursor": cursor,
+        "keyset": keyset,
+        # 总数计算方式：exact / none / cached / estimate / window
+        "count": count,
+        "cache_ttl": cache_ttl,
+        # 只读取字段，返回轻量行对象
+        "as_rows": True
     }
-    page: Page[File] = file_service.page(*_part_keys_filters, **_part_key_kwargs)
+    try:
+        page: Page[File] = file_service.page(*_part_keys_filters, **_part_key_kwargs)
+    except ValueError as e:
+        logger.warning(f"分页参数错误: {e}")
+        return iresponse.error(ErrorCodes.PARAM_ERROR)
     resp_data = []
     if page.records:
         for record in page.records:
@@ -162,5 +207,8 @@ def get_file_pages(user_id: int = Query(default=None),
         pages=page.pages,
         page_num=page.page_num,
         page_size=page.page_size,
-        data=resp_data
+        data=resp_data,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        has_next=page.has_next
     ))
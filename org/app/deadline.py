@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from fastapi import Request
+from loguru import logger
+
+from org.common import iresponse
+from org.dao import deadline
+from org.dao.deadline import Deadline, DeadlineExceeded
+
+
+class DeadlineMiddleware:
+    """
+    请求级截止时间：请求内的 SQL 共享一个时间预算，DbEngine 按剩余时间设置各语句在数据库端的超时（见 org.dao.deadline）
+    慢查询到期由数据库取消并释放连接，不再占用连接直到数据库执行完
+    MySQL / Doris 只能通过 SELECT 的优化器提示（MAX_EXECUTION_TIME / query_timeout）限制执行时间，
+    写语句（如 /file/exec 执行的 UPDATE / DELETE）只在执行前检查剩余时间，执行中不受限制；PostgreSQL / SQLite 对所有语句生效
+    应用中只在配置 DB_REQUEST_TIMEOUT 时启用（见 main.py）
+    :param timeout: 默认预算(秒)，为空时只对 budgets 中的路径生效
+    :param budgets: 路径 -> 预算(秒)，为 None 时该路径不设截止时间（如流式导出）
+    :param header: 客户端可通过该请求头缩短预算（秒），不能超过服务端的预算
+    """
+
+    def __init__(self, app, timeout: float = None, budgets: Dict[str, Optional[float]] = None,
+                 header: str = 'x-request-timeout'):
+        self.app = app
+        self.timeout = timeout
+        self.budgets = budgets or {}
+        self.header = header.lower().encode('latin-1')
+
+    def budget(self, scope) -> Optional[float]:
+        timeout = self.budgets.get(scope['path'], self.timeout)
+        if timeout is None:
+            return None
+        for key, value in scope.get('headers') or ():
+            if key == self.header:
+                try:
+                    return min(timeout, float(value))
+                except ValueError:
+                    break
+        return timeout
+
+    async def __call__(self, scope, receive, send):
+        timeout = self.budget(scope) if scope['type'] == 'http' else None
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+        token = deadline.activate(Deadline(timeout, lambda: _endpoint(scope)))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            deadline.deactivate(token)
+
+
+def _endpoint(scope) -> str:
+    # 路由匹配后使用路由模板（如 /file/{file_id}），避免路径参数导致指标标签过多
+    route = scope.get('route')
+    return getattr(route, 'path', None) or scope['path']
+
+
+async def deadline_exceeded_handler(request: Request, e: DeadlineExceeded):
+    logger.warning(f"Deadline exceeded: {request.method} {e.endpoint} on {e.engine}")
+    return iresponse.json_response_error(status_code=504, code=e.code, msg=e.message)
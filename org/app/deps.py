@@ -0,0 +1,47 @@
+import os
+import secrets
+
+from fastapi import Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from org.dao.replica import pin_scope
+from org.dao.uow import UnitOfWork, activate, deactivate
+
+
+async def db_unit_of_work():
+    """
+    请求级工作单元：请求内的 IService 调用共用每个引擎的一个会话（一次连接签出），处理函数结束后统一提交一次
+    处理函数抛出异常或有操作失败回滚时，整个请求的写入回滚
+    必须是 async 依赖：在事件循环中设置的上下文会复制到执行同步处理函数的线程池中
+    请求内写入后的读走主库（见 replica.pin_scope），请求结束时恢复
+    """
+    uow = UnitOfWork()
+    token = activate(uow)
+    with pin_scope():
+        try:
+            yield uow
+            await run_in_threadpool(uow.commit)
+        except BaseException:
+            await run_in_threadpool(uow.rollback)
+            raise
+        finally:
+            await run_in_threadpool(uow.close)
+            deactivate(token)
+
+
+# scope="function"：在响应发送前提交，提交失败时请求返回错误而不是已经返回成功
+UnitOfWorkDep = Depends(db_unit_of_work, scope="function")
+
+
+def require_admin_token(x_admin_token: str = Header(default=None)):
+    """
+    管理接口鉴权：请求头 X-Admin-Token 需与环境变量 ADMIN_TOKEN 一致；未配置 ADMIN_TOKEN 时管理接口不可用
+    """
+    token = os.getenv('ADMIN_TOKEN')
+    if not token:
+        raise HTTPException(status_code=403, detail="管理接口未启用")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="管理接口鉴权失败")
+
+
+AdminDep = Depends(require_admin_token)
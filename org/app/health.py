@@ -0,0 +1,36 @@
+import os
+
+from fastapi import APIRouter
+from loguru import logger
+
+from org.common import iresponse
+from org.dao.registry import registry
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+def warm_up_engines() -> list:
+    """
+    需要在启动时预热的引擎，环境变量 DB_WARM_UP 配置，如 "doris,doris_async"
+    """
+    return [name.strip() for name in os.getenv('DB_WARM_UP', '').split(',') if name.strip()]
+
+
+@router.get("/live")
+def live():
+    """
+    存活探针：进程能响应即可
+    """
+    return iresponse.success_with_msg("alive")
+
+
+@router.get("/ready")
+async def ready():
+    """
+    就绪探针：预热过的引擎都能 ping 通才就绪，否则返回 503
+    """
+    engines = await registry.ready()
+    if all(engines.values()):
+        return iresponse.success_with_data({"engines": engines})
+    logger.warning(f"数据库未就绪: {engines}")
+    return iresponse.json_response_error(status_code=503, msg="数据库未就绪", data={"engines": engines})
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from org.app.deps import AdminDep
+from org.common import iresponse
+from org.dao.metrics import metrics
+from org.dao.registry import registry
+
+router = APIRouter(tags=["monitor"])
+# 管理接口（慢查询含 SQL 与参数、可清空记录）需要 X-Admin-Token，见 require_admin_token
+admin_router = APIRouter(prefix="/admin", tags=["monitor"], dependencies=[AdminDep])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus 指标：连接池状态、获取连接等待时间、SQL 与 IService 方法耗时
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _slow_logs(engine: str = None) -> dict:
+    return {name: db_engine.slow_log for name, db_engine in registry.created().items()
+            if getattr(db_engine, 'slow_log', None) is not None and (not engine or name == engine)}
+
+
+@admin_router.get("/slow_queries")
+def get_slow_queries(engine: str = Query(default=None),
+                     limit: int = Query(default=50)):
+    """
+    最近的慢查询（按时间倒序），含指纹、脱敏参数、耗时、返回行数与 EXPLAIN 结果
+    """
+    return iresponse.success_with_data({name: slow_log.recent(limit) for name, slow_log in _slow_logs(engine).items()})
+
+
+@admin_router.delete("/slow_queries")
+def clear_slow_queries(engine: str = Query(default=None)):
+    for slow_log in _slow_logs(engine).values():
+        slow_log.clear()
+    return iresponse.success()
+
+
+@admin_router.get("/statement_cache")
+def get_statement_cache(engine: str = Query(default=None)):
+    """
+    select_list / select_one 语句缓存的命中统计，bypass 为无法按形态缓存的查询次数
+    """
+    return iresponse.success_with_data({name: db_engine.stmt_cache.stats() for name, db_engine in registry.created().items()
+                                        if getattr(db_engine, 'stmt_cache', None) is not None
+                                        and (not engine or name == engine)})
@@ -10,3 +10,4 @@ class ErrorCodes(BaseEnum):
     NON_LOGIN = (401, "用户未登录，无法操作！", "COMMON")
     DATA_NOT_EXIST = (404, "数据记录不存在！", "COMMON")
     DB_ERROR = (500, "数据库操作失败，请联系管理员！", "COMMON")
+    DEADLINE_EXCEEDED = (504, "请求处理超时，请稍后重试！", "COMMON")
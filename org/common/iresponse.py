@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 # from dataclasses import dataclass, field
-from typing import Any, List, TypeVar
+from typing import Any, List, Optional, TypeVar
 from pydantic import BaseModel, Field
 from fastapi.responses import JSONResponse
 
@@ -26,11 +26,14 @@ class IResponse(BaseModel):
 
 # @dataclass
 class PageData(BaseModel):
-    total: int = 0
+    total: Optional[int] = 0
     pages: int = 0
     page_num: int = 1
     page_size: int = 10
     data: List[T] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    has_next: Optional[bool] = None
 
 
 def success(code: int = SUCCESS_CODE, msg: str = SUCCESS_MSG, data=None):
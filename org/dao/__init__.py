@@ -15,20 +15,53 @@ class Page(BaseModel, Generic[T]):
     page_num: Optional[int] = 1
     page_size: Optional[int] = 10
     records: Optional[list[T]] = None
+    # 游标分页(keyset)时返回，offset 分页时为空
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    # 是否还有下一页，count=none 时依据多取的一行判断
+    has_next: Optional[bool] = None
 
     @property
     def pages(self) -> int:
-        if self.total == 0:
+        if not self.total:
             return 0
         return (self.total + self.page_size - 1) // self.page_size
 
 
+class BulkResult(BaseModel):
+    """
+    批量写入结果
+    """
+    rows: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    ids: Optional[list] = None
+    # upsert 时为各批语句的受影响行数（MySQL 中被更新的行计为 2），rows 为其中非负值之和
+    affected: Optional[list] = None
+
+    @property
+    def rows_per_sec(self) -> float:
+        if not self.elapsed:
+            return 0.0
+        return self.rows / self.elapsed
+
+
+class SaveResult(BulkResult):
+    """
+    批量保存结果：inserted 为新增行数，updated 为按主键更新的行数
+    """
+    inserted: int = 0
+    updated: int = 0
+
+
 class Base(DeclarativeBase):
     pass
 
 
 class BaseEntity(Base):
     __abstract__ = True  # 表示这是一个抽象类，不会创建对应的表
+    # 逻辑删除列：select_* / page / count 自动过滤已删除的行（with_deleted=True 时不过滤），见 IService.soft_delete
+    __soft_delete__ = 'is_delete'
     id: Mapped[Optional[int]] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     create_time: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.now(), comment='创建时间')
     update_time: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.now(), onupdate=datetime.now(),
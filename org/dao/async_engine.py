@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import asyncio
+import traceback
+from typing import Optional, Type, List, Callable, Awaitable, Iterable
+
+from loguru import logger
+from sqlalchemy import text, and_, select, delete, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+
+from . import T, Page, BulkResult, keyset, deadline
+from .cache import ResultCache, MISSING
+from .metrics import instrument_engine, instrumented_pool_class
+from .stmt_cache import StatementCache
+from .columnar import ColumnarResult, ColumnarBuilder
+from .columns import get_column_meta
+from .engine import (EngineConfig, new_slow_log, parse_filters, UpsertPlan, cached_result,
+                     dirty_row, mark_clean, build_update_by_id, build_exists_by_id, build_soft_delete,
+                     ByIdsPlan, primary_key_value, build_select, build_entities, entity_builder,
+                     READ_ONLY_SQL, PagePlan, build_estimate)
+
+
+class AsyncDbEngine:
+    """
+    基于 SQLAlchemy asyncio 扩展的数据库引擎，接口与 DbEngine 保持一致
+    驱动按 EngineConfig.async_protocol 选择，未配置时由 protocol 推断（如 mysql+pymysql -> mysql+aiomysql）
+    :param result_cache: 查询结果缓存，与同库的 DbEngine 共用时两边的写操作都会使缓存失效
+    """
+
+    def __init__(self, config: dict | EngineConfig = EngineConfig(), result_cache: ResultCache = None):
+        if isinstance(config, dict):
+            config = EngineConfig(**config)
+        self.config = config
+        self.name = self.config.name
+        logger.info(f'Init AsyncDbEngine: {self.name} ==> {self.config.host}:{self.config.port}/{self.config.database}')
+        self._engine: Optional[AsyncEngine] = None
+        self._sessionmaker: Optional[async_sessionmaker] = None
+        self.result_cache = result_cache or ResultCache(maxsize=self.config.result_cache_size,
+                                                        max_rows=self.config.result_cache_max_rows)
+        self.slow_log = new_slow_log(self.config)
+        self.stmt_cache = StatementCache(self.config.statement_cache_size)
+
+    async def _cached(self, cls: Type[T], tag: str, stmt, cache_ttl: float, loader: Callable, *extra):
+        key = ResultCache.key(tag, stmt, self.get_engine().dialect, *extra)
+        value = self.result_cache.get(key)
+        if value is MISSING:
+            tables = [cls.__table__.name]
+            version = self.result_cache.version(tables)
+            value = await loader()
+            self.result_cache.put(key, value, tables=tables, ttl=cache_ttl, version=version)
+        return cached_result(value)
+
+    def _invalidate(self, cls: Type[T] = None):
+        self._evict_cache(cls.__table__.name if cls is not None else None)
+
+    def _invalidate_stmt(self, stmt):
+        if getattr(stmt, 'is_select', False):
+            return
+        table = getattr(stmt, 'table', None) if getattr(stmt, 'is_dml', False) else None
+        self._evict_cache(table.name if table is not None else None)
+
+    def _evict_cache(self, table_name: Optional[str]):
+        if table_name is None:
+            self.result_cache.clear()
+        else:
+            self.result_cache.invalidate_table(table_name)
+
+    def create(self) -> AsyncEngine:
+        logger.debug(f'New {self.name} AsyncEngine ...')
+        url = self.config.get_async_url()
+        kwargs = {}
+        if self.config.metrics:
+            pool_class = instrumented_pool_class(url)
+            if pool_class is not None:
+                kwargs.update(poolclass=pool_class, pool_logging_name=self.name)
+        engine = create_async_engine(url=url,
+                                     pool_size=self.config.pool_size,
+                                     max_overflow=self.config.max_overflow,
+                                     pool_timeout=self.config.pool_timeout,
+                                     pool_recycle=self.config.pool_recycle,
+                                     connect_args=self.config.get_connect_args(),
+                                     pool_pre_ping=True,
+                                     echo=self.config.echo,
+                                     **kwargs)
+        if self.config.metrics:
+            instrument_engine(engine.sync_engine, self.name)
+        if self.slow_log is not None:
+            self.slow_log.attach(engine.sync_engine, self.name, async_engine=engine)
+        if self.config.deadline:
+            deadline.attach(engine.sync_engine, self.config.dialect or engine.dialect.name, self.name)
+        return engine
+
+    def get_engine(self) -> AsyncEngine:
+        if not self._engine:
+            self._engine = self.create()
+            self._sessionmaker = async_sessionmaker(bind=self._engine, expire_on_commit=False)
+        return self._engine
+
+    def get_dialect(self) -> str:
+        return self.config.dialect or self.get_engine().dialect.name
+
+    def get_session(self) -> AsyncSession:
+        self.get_engine()
+        return self._sessionmaker()
+
+    async def warm_up(self, connections: int = None) -> int:
+        """
+        预建连接，见 DbEngine.warm_up
+        """
+        _connections = connections or self.config.pool_size
+        engine = self.get_engine()
+        results = await asyncio.gather(*[engine.connect().start() for _ in range(_connections)],
+                                       return_exceptions=True)
+        conns = [r for r in results if not isinstance(r, BaseException)]
+        for conn in conns:
+            await conn.close()
+        if len(conns) < len(results):
+            raise next(r for r in results if isinstance(r, BaseException))
+        return len(conns)
+
+    async def ping(self):
+        async with self.get_engine().connect() as conn:
+            await conn.exec_driver_sql('SELECT 1')
+
+    async def dispose(self):
+        if self._engine:
+            await self._engine.dispose()
+
+    async def insert(self, entity: T) -> int:
+        async with self.get_session() as session:
+            try:
+                session.add(entity)
+                await session.flush()
+                await session.commit()
+                self._invalidate(type(entity))
+                return entity.id
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Failed to insert entity: {e}")
+                raise e
+
+    async def insert_batch(self, entities: List[T]) -> int:
+        async with self.get_session() as session:
+            try:
+                session.add_all(entities)
+                await session.flush()
+                await session.commit()
+                for _cls in {type(entity) for entity in entities}:
+                    self._invalidate(_cls)
+                return len(entities)
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Failed to insert entity: {e}")
+                raise e
+
+    async def upsert(self, cls: Type[T], values: list, chunk_size: int = None, **kwargs) -> BulkResult:
+        """
+        批量 upsert，参数与返回值与 DbEngine.upsert 一致
+        """
+        if not values:
+            return BulkResult(affected=[])
+        plan = UpsertPlan(cls, self.get_dialect(), values, chunk_size or self.config.bulk_chunk_size, kwargs)
+        async with self.get_engine().begin() as conn:
+            if plan.partial:
+                await conn.exec_driver_sql('SET enable_unique_key_partial_update = true')
+            try:
+                for chunk, stmt in plan.statements():
+                    plan.add(chunk, (await conn.execute(stmt)).rowcount)
+            finally:
+                if plan.partial:
+                    await conn.exec_driver_sql('SET enable_unique_key_partial_update = false')
+        self._invalidate(cls)
+        return plan.finish()
+
+    async def update_by_id(self, entity: T | dict, cls: Type[T] = None) -> int:
+        """
+        按主键直接 UPDATE，只写入变更的字段，参数与 DbEngine.update_by_id 一致
+        """
+        cls: Type[T] = cls or type(entity)
+        row = dirty_row(cls, entity)
+        stmt = build_update_by_id(cls, row)
+        if len(row) == len(get_column_meta(cls).primary_key):
+            async with self.get_engine().begin() as conn:
+                return 1 if (await conn.execute(build_exists_by_id(cls, row))).first() else 0
+        async with self.get_session() as session:
+            try:
+                result = await session.execute(stmt)
+                await session.commit()
+                self._invalidate(cls)
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Failed to update entity by ID: {e}")
+                raise e
+        if result.rowcount == 0:
+            logger.warning(f"没有找到主键为 {primary_key_value(cls, row)} 的记录")
+        else:
+            mark_clean(entity, row)
+        return result.rowcount
+
+    async def select_by_id(self, cls: Type[T], eid: int, **kwargs) -> Optional[T]:
+        async with self.get_session() as session:
+            try:
+                stmt = build_select(cls=cls, **kwargs).filter(cls.id == eid)
+                result = (await session.execute(stmt)).one_or_none()
+                if result:
+                    return build_entities(result, cls, **kwargs)
+                return None
+            except Exception as e:
+                logger.error(f"Failed to query entity by ID: {e}")
+                raise e
+
+    async def select_by_ids(self, cls: Type[T], ids: Iterable, chunk_size: int = None, **kwargs) -> List[Optional[T]]:
+        """
+        按主键批量查询，与 DbEngine.select_by_ids 一致
+        """
+        plan = ByIdsPlan(cls, ids, chunk_size or self.config.in_chunk_size, kwargs, self.stmt_cache)
+        async with self.get_session() as session:
+            try:
+                for stmt, params in plan.statements():
+                    plan.add((await session.execute(stmt, params)).all())
+            except Exception as e:
+                logger.error(f"Failed to query entities by IDs: {e}")
+                raise e
+        return plan.result()
+
+    async def select_one(self, cls: Type[T], *args, **kwargs) -> Optional[T]:
+        _cached_stmt = self.stmt_cache.lookup(cls, args, kwargs, limit=1)
+        async with self.get_session() as session:
+            try:
+                if _cached_stmt is not None:
+                    result = (await session.execute(*_cached_stmt)).first()
+                else:
+                    stmt = build_select(cls=cls, args=args, **kwargs).limit(1)
+                    result = (await session.execute(stmt)).one_or_none()
+                if result:
+                    return build_entities(result, cls, **kwargs)
+                return None
+            except Exception as e:
+                logger.error(f"Failed to Select One: {e}")
+                raise e
+
+    async def select_count(self, cls: Type[T], *args, **kwargs) -> int:
+        _cache_ttl = kwargs.pop('cache_ttl') if 'cache_ttl' in kwargs.keys() else None
+        stmt = select(func.count()).select_from(cls)
+        filters = parse_filters(cls=cls, args=args, kwargs=kwargs, soft_delete=True)
+        if filters:
+            stmt = stmt.filter(and_(*filters))
+        if _cache_ttl:
+            return await self._cached(cls, 'count', stmt, _cache_ttl, lambda: self.select_count(cls, *args, **kwargs))
+        async with self.get_session() as session:
+            try:
+                return (await session.execute(stmt)).scalar_one()
+            except Exception as e:
+                logger.error(f"Failed to query entities: {e}")
+                raise e
+
+    async def select_list(self, cls: Type[T], *args, **kwargs) -> List[T]:
+        _cache_ttl = kwargs.pop('cache_ttl') if 'cache_ttl' in kwargs.keys() else None
+        if _cache_ttl:
+            stmt = build_select(cls=cls, args=args, **kwargs)
+            return await self._cached(cls, 'list', stmt, _cache_ttl, lambda: self.select_list(cls, *args, **kwargs),
+                                      bool(kwargs.get('as_rows')))
+        _cached_stmt = self.stmt_cache.lookup(cls, args, kwargs)
+        stmt, params = _cached_stmt if _cached_stmt is not None else (build_select(cls=cls, args=args, **kwargs), None)
+        async with self.get_session() as session:
+            try:
+                results = (await session.execute(stmt, params)).all()
+                return build_entities(results, cls, **kwargs)
+            except Exception as e:
+                logger.error(f"Failed to query entities: {e}")
+                raise e
+
+    async def page(self, cls: Type[T], *args, **kwargs) -> Page[T]:
+        """
+        分页查询，参数与 DbEngine.page 一致
+        parallel=True 时 COUNT 与数据查询在两个会话上并发执行
+        """
+        _cache_ttl = kwargs.pop('cache_ttl') if 'cache_ttl' in kwargs.keys() else None
+        if _cache_ttl:
+            stmt = build_select(cls=cls, args=args, **kwargs)
+            extra = tuple(kwargs.get(k) for k in ('page_num', 'page_size', 'cursor', 'keyset', 'count', 'as_rows'))
+            return await self._cached(cls, 'page', stmt, _cache_ttl, lambda: self.page(cls, *args, **kwargs), *extra)
+        _seek, _cursor = PagePlan.pop_seek(kwargs)
+        if _seek:
+            return await self.seek_page(cls, *args, cursor=_cursor, **kwargs)
+        plan = PagePlan(kwargs)
+        build = entity_builder(cls, **kwargs)
+        if plan.count == 'none':
+            return plan.to_page(await self._page_rows(cls, args, kwargs, plan), None, build)
+        if plan.count == 'window':
+            results = await self._page_rows(cls, args, kwargs, plan)
+            total = plan.window_total(results)
+            if total is None:
+                total = await self.select_count(cls, *args, **kwargs)
+            return plan.to_page(results, total, build)
+        if plan.parallel:
+            total, results = await asyncio.gather(plan.count_total(self, cls, args, kwargs),
+                                                  self._page_rows(cls, args, kwargs, plan))
+        else:
+            total = await plan.count_total(self, cls, args, kwargs)
+            plan.fit(total)
+            results = await self._page_rows(cls, args, kwargs, plan)
+        return plan.to_page(results, total, build)
+
+    async def _page_rows(self, cls: Type[T], args: tuple, kwargs: dict, plan: PagePlan) -> list:
+        async with self.get_session() as session:
+            try:
+                return list((await session.execute(plan.apply(build_select(cls=cls, args=args, **kwargs)))).all())
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to query entities: {e}")
+                raise e
+
+    async def estimate_count(self, cls: Type[T], *args, **kwargs) -> int:
+        """
+        从表统计信息读取近似行数，见 DbEngine.estimate_count
+        """
+        estimate = build_estimate(cls, self.get_engine().dialect.name, args, kwargs)
+        if estimate is None:
+            return await self.select_count(cls, *args, **kwargs)
+        async with self.get_session() as session:
+            try:
+                value = (await session.execute(*estimate)).scalar()
+            except SQLAlchemyError as e:
+                logger.warning(f"Failed to estimate count of {cls.__table__.name}: {e}")
+                value = None
+        if value is None or value < 0:
+            return await self.select_count(cls, *args, **kwargs)
+        return int(value)
+
+    async def seek_page(self, cls: Type[T], *args, cursor: str = None, **kwargs) -> Page[T]:
+        """
+        游标分页，见 DbEngine.seek_page
+        """
+        plan = keyset.SeekPlan(cls, cursor, kwargs)
+        async with self.get_session() as session:
+            try:
+                stmt = plan.apply(build_select(cls=cls, args=args, **kwargs))
+                results = (await session.execute(stmt)).all()
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to seek entities: {e}")
+                raise e
+        return plan.to_page(results, entity_builder(cls, **kwargs))
+
+    async def remove_by_id(self, cls: Type[T], eid: int) -> int:
+        async with self.get_session() as session:
+            try:
+                record = await session.get(cls, eid)
+                if record is None:
+                    logger.warning(f"没有找到ID为 {eid} 的记录")
+                    return 1
+                await session.delete(record)
+                await session.commit()
+                self._invalidate(cls)
+                return 1
+            except Exception as e:
+                await session.rollback()
+                error = traceback.format_exc(limit=3)
+                logger.warning(f"Failed Remove By ID: {str(e)} \n {error}")
+                return 0
+
+    async def remove_by_args(self, cls: Type[T], *args, **kwargs) -> int:
+        async with self.get_session() as session:
+            try:
+                stmt = delete(cls)
+                filters = parse_filters(cls=cls, args=args, kwargs=kwargs)
+                if filters:
+                    stmt = stmt.where(and_(*filters))
+                result = await session.execute(stmt)
+                await session.commit()
+                self._invalidate(cls)
+                return result.rowcount
+            except Exception as e:
+                await session.rollback()
+                error = traceback.format_exc(limit=3)
+                logger.warning(f"Failed Remove By Args: {str(e)} \n {error}")
+                return 0
+
+    async def soft_delete(self, cls: Type[T], ids: Iterable = None, *args, chunk_size: int = None, **kwargs) -> int:
+        """
+        逻辑删除，参数与 DbEngine.soft_delete 一致
+        """
+        stmts = build_soft_delete(cls, ids, args, kwargs, chunk_size or self.config.in_chunk_size)
+        if not stmts:
+            return 0
+        rowcount = 0
+        async with self.get_engine().begin() as conn:
+            for _stmt in stmts:
+                rowcount += (await conn.execute(_stmt)).rowcount
+        self._invalidate(cls)
+        logger.debug(f"Soft delete {cls.__name__}: {rowcount} rows")
+        return rowcount
+
+    async def transaction(self, func: Callable[[AsyncSession], Awaitable]):
+        async with self.get_session() as session:
+            try:
+                _res = await func(session)
+                await session.commit()
+                self._invalidate()
+                return _res
+            except Exception as e:
+                await session.rollback()
+                raise e
+
+    async def exec_stmt(self, stmt):
+        async with self.get_engine().begin() as conn:
+            result = await conn.execute(stmt)
+        self._invalidate_stmt(stmt)
+        return result
+
+    async def fetch_columnar(self, stmt, params=None, batch_size: int = None) -> ColumnarResult:
+        """
+        列式查询，与 DbEngine.fetch_columnar 一致
+        """
+        _batch_size = batch_size or self.config.stream_batch_size
+        async with self.get_session() as session:
+            _result = await session.stream(stmt, params)
+            builder = ColumnarBuilder(_result.keys())
+            async for rows in _result.partitions(_batch_size):
+                builder.append(rows)
+        return builder.build()
+
+    async def select_columnar(self, cls: Type[T], *args, batch_size: int = None, **kwargs) -> ColumnarResult:
+        return await self.fetch_columnar(build_select(cls=cls, args=args, **kwargs), batch_size=batch_size)
+
+    async def exec_sql(self, sql: str,
+                       cls: Type[T] = dict,
+                       params=None,
+                       execution_options=None,
+                       columnar: bool = False) -> list[T] | ColumnarResult:
+        if columnar:
+            return await self.fetch_columnar(text(sql), params)
+        async with self.get_session() as session:
+            _result = await session.execute(
+                statement=text(sql),
+                params=params,
+                execution_options=execution_options
+            )
+            _rows = _result.all() if _result.returns_rows else []
+            await session.commit()
+        if not READ_ONLY_SQL.match(sql):
+            self._invalidate()
+        return [cls(**row._asdict()) if cls else tuple(row) for row in _rows]
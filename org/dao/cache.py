@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# 未命中标记，区别于缓存中的 None（负缓存）
+MISSING = object()
+
+
+class Cache:
+    """
+    缓存接口，IService 通过它做 get_by_id 的读穿透缓存，可替换为 Redis 等实现
+    """
+
+    def get(self, key: Hashable) -> Any:
+        """
+        返回缓存值，未命中时返回 MISSING
+        """
+        raise NotImplementedError
+
+    def version(self) -> Any:
+        """
+        读穿透加载前取得当前版本，put 时传入：加载期间 key 被失效时不写入，避免缓存加载到的旧值
+        不支持时返回 None
+        """
+        return None
+
+    def put(self, key: Hashable, value: Any, ttl: float = None, version: Any = None):
+        raise NotImplementedError
+
+    def invalidate(self, key: Hashable):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class LRUCache(Cache):
+    """
+    线程安全的 LRU + TTL 缓存
+    :param maxsize: 最大条目数
+    :param ttl: 默认过期时间(秒)，None 表示不过期
+    :param negative_ttl: None 值（记录不存在）的过期时间，None 表示与 ttl 相同，0 表示不缓存 None
+    :param max_weight: 总权重上限（如总行数），超出时按 LRU 淘汰
+    :param weigher: 计算单个值权重的函数，默认每个值权重为 1
+    """
+
+    def __init__(self, maxsize: int = 1024,
+                 ttl: Optional[float] = 60.0,
+                 negative_ttl: Optional[float] = None,
+                 max_weight: Optional[int] = None,
+                 weigher: Callable[[Any], int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.max_weight = max_weight
+        self.weigher = weigher
+        # key -> (value, expire_at, weight)
+        self._data: OrderedDict = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+        # 每次失效递增的版本号；最近失效的 key -> 失效时的版本号（最多 maxsize 个），
+        # 更早的失效记录被移除后，早于 _floor 的版本一律视为已失效
+        self._version = 0
+        self._invalidated: OrderedDict = OrderedDict()
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # 加载期间被失效而未写入的次数
+        self.rejections = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return MISSING
+            value, expire_at, weight = item
+            if expire_at is not None and expire_at <= time.monotonic():
+                del self._data[key]
+                self._weight -= weight
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def put(self, key: Hashable, value: Any, ttl: float = None, version: int = None):
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        if ttl is not None and ttl <= 0:
+            return
+        weight = self.weigher(value) if self.weigher else 1
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+        expire_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if version is not None and (version < self._floor or self._invalidated.get(key, -1) > version):
+                self.rejections += 1
+                return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._weight -= old[2]
+            self._data[key] = (value, expire_at, weight)
+            self._weight += weight
+            while self._data and (len(self._data) > self.maxsize or
+                                  (self.max_weight is not None and self._weight > self.max_weight)):
+                _, (_, _, _weight) = self._data.popitem(last=False)
+                self._weight -= _weight
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._weight -= old[2]
+            self._version += 1
+            self._invalidated.pop(key, None)
+            self._invalidated[key] = self._version
+            if len(self._invalidated) > self.maxsize:
+                _, _version = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, _version)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._weight = 0
+            self._version += 1
+            self._invalidated.clear()
+            self._floor = self._version
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'weight': self._weight,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'rejections': self.rejections,
+            }
+
+
+def _weigh_result(value) -> int:
+    # 以行数作为权重，近似控制缓存占用的内存
+    if isinstance(value, list):
+        return len(value) + 1
+    records = getattr(value, 'records', None)
+    if isinstance(records, list):
+        return len(records) + 1
+    return 1
+
+
+class ResultCache:
+    """
+    查询结果缓存：key 为语句结构 + 绑定参数，按表名索引，写表时整表失效
+    每张表有版本号，失效时递增；查询前取得版本（version），写入时版本已变化则不缓存，
+    避免查询期间的写操作使缓存留下旧结果
+    :param maxsize: 最大条目数
+    :param max_rows: 缓存的总行数上限，超出时按 LRU 淘汰
+    """
+
+    def __init__(self, maxsize: int = 1024, max_rows: int = 100000):
+        self._cache = LRUCache(maxsize=maxsize, ttl=None, max_weight=max_rows, weigher=_weigh_result)
+        self._tables: dict = {}
+        self._versions: dict = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tag: str, stmt, dialect, *extra) -> tuple:
+        # 使用 SQLAlchemy 的语句缓存键（与编译缓存相同），不必每次查找都编译 SQL
+        cache_key = stmt._generate_cache_key()
+        if cache_key is None:
+            compiled = stmt.compile(dialect=dialect)
+            params = tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+            return tag, str(compiled), params, extra
+        params = tuple(repr(bind.effective_value) for bind in cache_key.bindparams)
+        return tag, dialect.name, cache_key.key, params, extra
+
+    def get(self, key: tuple) -> Any:
+        return self._cache.get(key)
+
+    def version(self, tables: list) -> tuple:
+        """
+        查询前取得相关表的版本，put 时传入
+        """
+        with self._lock:
+            return self._epoch, tuple(self._versions.get(table, 0) for table in tables)
+
+    def put(self, key: tuple, value: Any, tables: list, ttl: float, version: tuple = None):
+        with self._lock:
+            if version is not None and version != (self._epoch, tuple(self._versions.get(t, 0) for t in tables)):
+                return
+            self._cache.put(key, value, ttl=ttl)
+            for table in tables:
+                keys = self._tables.setdefault(table, set())
+                keys.add(key)
+                # 被 LRU 淘汰的 key 不会主动从索引中移除，数量过多时整理一次
+                if len(keys) > 2 * self._cache.maxsize:
+                    self._tables[table] = {k for k in keys if k in self._cache._data}
+
+    def invalidate_table(self, table: str):
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            keys = self._tables.pop(table, ())
+        for key in keys:
+            self._cache.invalidate(key)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._tables.clear()
+            self._versions.clear()
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        _stats = self._cache.stats()
+        _stats['rows'] = _stats.pop('weight')
+        return _stats
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import itertools
+from array import array
+from decimal import Decimal
+from typing import Dict, Iterable, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖：pip install hello-py[columnar]
+    np = None
+
+# 列类型，合并时取较大者：bool < int < float < object
+BOOL, INT, FLOAT, OBJECT = 0, 1, 2, 3
+# None 按 NaN 处理，数值列出现 None 时升级为 float（含 NULL 的整数列为 float64，超过 2**53 的值会损失精度）
+# Decimal（DECIMAL / NUMERIC 列，以及 MySQL 等的 SUM 结果）不转为 float，按 object 保存原值，求和时精确累加
+_KINDS = {bool: BOOL, int: INT, float: FLOAT, type(None): FLOAT}
+_TYPECODES = {BOOL: 'b', INT: 'q', FLOAT: 'd'}
+_DTYPES = {BOOL: 'bool', INT: 'int64', FLOAT: 'float64', OBJECT: 'object'}
+
+
+def _kind(values: Sequence) -> int:
+    return max((_KINDS.get(t, OBJECT) for t in set(map(type, values))), default=OBJECT)
+
+
+class ColumnBuilder:
+    """
+    按批追加一列的值，每批转换为 NumPy 数组（无 NumPy 时为 array.array）后保存，结束时合并
+    数值列为 int64 / float64（None 为 NaN，因此含 NULL 的整数列为 float64），
+    其他类型（含 Decimal）为 object 数组（无 NumPy 时为 list），None 保持为 None
+    """
+
+    def __init__(self):
+        self.kind = BOOL
+        self.chunks: list = []
+
+    def extend(self, values: Sequence):
+        if not values:
+            return
+        kind = _kind(values)
+        try:
+            chunk = self._convert(values, kind)
+        except (OverflowError, TypeError, ValueError):
+            # 超出 int64 的整数等，按 object 保存
+            kind = OBJECT
+            chunk = self._convert(values, kind)
+        self.kind = max(self.kind, kind)
+        self.chunks.append(chunk)
+
+    @staticmethod
+    def _convert(values: Sequence, kind: int):
+        if np is not None:
+            return np.array(values, dtype=_DTYPES[kind])
+        if kind == OBJECT:
+            return list(values)
+        if kind == FLOAT:
+            return array('d', [float('nan') if v is None else v for v in values])
+        return array(_TYPECODES[kind], values)
+
+    def build(self):
+        if np is not None:
+            if not self.chunks:
+                return np.empty(0, dtype='float64')
+            return np.concatenate([chunk.astype(_DTYPES[self.kind], copy=False) for chunk in self.chunks])
+        if self.kind == OBJECT or not self.chunks:
+            return list(itertools.chain.from_iterable(self.chunks))
+        typecode = _TYPECODES[self.kind]
+        column = array(typecode)
+        for chunk in self.chunks:
+            column.extend(chunk if chunk.typecode == typecode else array(typecode, chunk))
+        return column
+
+
+class ColumnarResult(dict):
+    """
+    列式结果：列名 -> 数组，按查询列顺序
+    """
+
+    def __init__(self, columns: Dict[str, object] = None, num_rows: int = 0):
+        super().__init__(columns or {})
+        self.num_rows = num_rows
+
+    def rows(self) -> Iterable[tuple]:
+        """
+        按行遍历（调试或少量结果时使用）
+        """
+        return zip(*self.values())
+
+
+class ColumnarBuilder:
+    """
+    按批追加行，每批按列转置后写入各列，不为每行创建 dict / 实体
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        self.keys = list(keys)
+        self.builders = [ColumnBuilder() for _ in self.keys]
+        self.num_rows = 0
+
+    def append(self, rows: Sequence):
+        if not rows:
+            return
+        self.num_rows += len(rows)
+        for builder, values in zip(self.builders, zip(*rows)):
+            builder.extend(values)
+
+    def build(self) -> ColumnarResult:
+        return ColumnarResult({key: builder.build() for key, builder in zip(self.keys, self.builders)}, self.num_rows)
+
+
+def from_partitions(keys: Sequence[str], partitions: Iterable[Sequence]) -> ColumnarResult:
+    """
+    由游标的分批结果构造列式结果
+    """
+    builder = ColumnarBuilder(keys)
+    for rows in partitions:
+        builder.append(rows)
+    return builder.build()
+
+
+def _is_numeric(column) -> bool:
+    if np is not None:
+        return column.dtype.kind in 'biuf'
+    return isinstance(column, array)
+
+
+def _is_decimal(column) -> bool:
+    values = [v for v in _to_list(column) if v is not None]
+    return bool(values) and all(isinstance(v, Decimal) for v in values)
+
+
+def group_by(result: ColumnarResult, key: str, sums: Iterable[str] = (), count: str = 'count') -> ColumnarResult:
+    """
+    按 key 分组，统计每组行数与 sums 中各列的和，结果按 key 排序
+    如每个用户的文件数与总大小：group_by(data, 'user_id', sums=['size'])
+    :param count: 行数列的列名，为空时不统计
+    """
+    sums = list(sums)
+    for column in sums:
+        if not _is_numeric(result[column]) and not _is_decimal(result[column]):
+            raise ValueError(f"只能对数值列求和: {column}")
+    keys = result[key]
+    if np is not None and keys.dtype.kind != 'O':
+        return _group_by_numpy(result, key, sums, count)
+    return _group_by_python(result, key, sums, count)
+
+
+def _group_by_numpy(result: ColumnarResult, key: str, sums: List[str], count: str) -> ColumnarResult:
+    uniques, inverse = np.unique(result[key], return_inverse=True)
+    out = ColumnarResult({key: uniques}, len(uniques))
+    if count:
+        out[count] = np.bincount(inverse, minlength=len(uniques))
+    for column in sums:
+        values = result[column]
+        if values.dtype.kind == 'O':
+            # Decimal 列逐个精确累加
+            total = [Decimal(0)] * len(uniques)
+            for j, value in zip(inverse.tolist(), values.tolist()):
+                if value is not None:
+                    total[j] += value
+            out[column] = np.array(total, dtype='object')
+        elif values.dtype.kind == 'f':
+            # 与 SQL SUM 一致，忽略 NULL
+            out[column] = np.bincount(inverse, weights=np.nan_to_num(values), minlength=len(uniques))
+        else:
+            # 整数列精确求和，避免 bincount 转为 float64
+            total = np.zeros(len(uniques), dtype='int64')
+            np.add.at(total, inverse, values)
+            out[column] = total
+    return out
+
+
+def _group_by_python(result: ColumnarResult, key: str, sums: List[str], count: str) -> ColumnarResult:
+    index: Dict[object, int] = {}
+    counts: list = []
+    totals: List[list] = [[] for _ in sums]
+    # NumPy 数组转为 Python 对象逐行累加
+    columns = [_to_list(result[column]) for column in sums]
+    for i, k in enumerate(_to_list(result[key])):
+        j = index.get(k)
+        if j is None:
+            j = index[k] = len(counts)
+            counts.append(0)
+            for total in totals:
+                total.append(0)
+        counts[j] += 1
+        for total, values in zip(totals, columns):
+            value = values[i]
+            if value is not None and value == value:  # NULL(None / NaN) 不计入
+                total[j] += value
+    try:
+        order = sorted(range(len(counts)), key=list(index.keys()).__getitem__)
+    except TypeError:
+        # key 含 None 等不可比较的值时保持首次出现的顺序
+        order = range(len(counts))
+    uniques = list(index.keys())
+    builder = ColumnBuilder()
+    builder.extend([uniques[j] for j in order])
+    out = ColumnarResult({key: builder.build()}, len(counts))
+    if count:
+        out[count] = _numeric_column([counts[j] for j in order])
+    for column, total in zip(sums, totals):
+        out[column] = _numeric_column([total[j] for j in order])
+    return out
+
+
+def _to_list(column) -> list:
+    return column.tolist() if np is not None else column
+
+
+def _numeric_column(values: list):
+    builder = ColumnBuilder()
+    builder.extend(values)
+    return builder.build()
+
+
+def column_sum(result: ColumnarResult, column: str):
+    """
+    数值或 Decimal 列求和，忽略 NULL
+    """
+    values = result[column]
+    if np is not None and values.dtype.kind != 'O':
+        return values.sum() if values.dtype.kind != 'f' else np.nansum(values)
+    return sum(v for v in _to_list(values) if v is not None and v == v)
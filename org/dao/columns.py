@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import dataclasses
+import threading
+from typing import Any, Type, Iterable, Optional, Dict, Tuple
+
+from sqlalchemy import UniqueConstraint, inspect, or_
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from . import T
+
+
+class ColumnMeta:
+    """
+    实体类的列元数据，每个映射类只构建一次
+    """
+
+    def __init__(self, cls: Type[T]):
+        self.cls = cls
+        mapper = inspect(cls)
+        table = cls.__table__
+        # 按映射顺序排列的列属性
+        self.columns: Tuple[InstrumentedAttribute, ...] = tuple(
+            getattr(cls, prop.key) for prop in mapper.column_attrs
+        )
+        self.keys: Tuple[str, ...] = tuple(col.key for col in self.columns)
+        self.column_map: Dict[str, InstrumentedAttribute] = dict(zip(self.keys, self.columns))
+        # 表字段名（upsert 使用列名，而非属性名）
+        self.column_names: Tuple[str, ...] = tuple(col.name for col in table.columns)
+        self.primary_key: Tuple[str, ...] = tuple(col.name for col in table.primary_key.columns)
+        # 主键、唯一列、联合唯一约束列
+        _unique = set(self.primary_key)
+        for col in table.columns:
+            if col.unique:
+                _unique.add(col.name)
+        for _constraint in table.constraints:
+            if isinstance(_constraint, UniqueConstraint):
+                _unique.update(col.name for col in _constraint.columns)
+        self.unique_columns: frozenset = frozenset(_unique)
+        # 默认的 upsert 更新字段：非主键、非唯一列
+        self.update_columns: Tuple[str, ...] = tuple(
+            name for name in self.column_names if name not in self.unique_columns
+        )
+        # 插入时必须提供的字段：非主键、NOT NULL 且没有默认值
+        self.required_columns: frozenset = frozenset(
+            col.name for col in table.columns
+            if not col.primary_key and not col.nullable and col.default is None and col.server_default is None
+        )
+        # 逻辑删除列（实体类的 __soft_delete__，BaseEntity 为 is_delete），查询时自动追加 未删除 条件
+        _soft_delete = getattr(cls, '__soft_delete__', None)
+        self.soft_delete: Optional[str] = _soft_delete if _soft_delete in self.column_map else None
+        # 逻辑删除列可为空（历史数据、绕过 ORM 写入的行），NULL 视为未删除
+        self.not_deleted = or_(self.column_map[self.soft_delete].is_(None),
+                               self.column_map[self.soft_delete] == False) if self.soft_delete else None  # noqa: E712
+        self._projections: Dict[tuple, Tuple[tuple, Tuple[str, ...]]] = {}
+        self._row_classes: Dict[Tuple[str, ...], type] = {}
+        self._lock = threading.Lock()
+
+    def projection(self,
+                   select_columns: Iterable[str] = None,
+                   exclude_columns: Iterable[str] = None) -> Tuple[InstrumentedAttribute, ...]:
+        """
+        获取 columns / exclude_columns 组合对应的查询列，结果按组合缓存
+        """
+        return self._get_projection(select_columns, exclude_columns)[0]
+
+    def projection_keys(self,
+                        select_columns: Iterable[str] = None,
+                        exclude_columns: Iterable[str] = None) -> Tuple[str, ...]:
+        """
+        获取查询列对应的属性名，与 projection 顺序一致
+        """
+        return self._get_projection(select_columns, exclude_columns)[1]
+
+    def row_class(self,
+                  select_columns: Iterable[str] = None,
+                  exclude_columns: Iterable[str] = None) -> type:
+        """
+        获取查询列对应的轻量行类型（见 make_row_class），按查询列缓存
+        """
+        keys = self.projection_keys(select_columns, exclude_columns)
+        row_cls = self._row_classes.get(keys)
+        if row_cls is None:
+            with self._lock:
+                row_cls = self._row_classes.get(keys)
+                if row_cls is None:
+                    row_cls = self._row_classes[keys] = make_row_class(f'{self.cls.__name__}Row', keys)
+        return row_cls
+
+    def _get_projection(self, select_columns, exclude_columns) -> Tuple[tuple, Tuple[str, ...]]:
+        key = (tuple(select_columns) if select_columns else None,
+               frozenset(exclude_columns) if exclude_columns else None)
+        _projection = self._projections.get(key)
+        if _projection is not None:
+            return _projection
+        if select_columns:
+            _columns = []
+            for name in dict.fromkeys(select_columns):
+                col = self.column_map.get(name)
+                if col is None:
+                    raise AttributeError(f"{self.cls.__name__} 没有字段 {name}")
+                _columns.append(col)
+        else:
+            _columns = list(self.columns)
+        # 如果指定了排除列， 则该字段不被查询
+        if exclude_columns:
+            _exclude = key[1]
+            _columns = [col for col in _columns if col.key not in _exclude]
+        _projection = (tuple(_columns), tuple(col.key for col in _columns))
+        with self._lock:
+            self._projections[key] = _projection
+        return _projection
+
+
+def _asdict(self) -> dict:
+    return {key: getattr(self, key) for key in self._fields}
+
+
+def make_row_class(name: str, keys: Tuple[str, ...]) -> type:
+    """
+    生成只读查询使用的行类型：__slots__ 数据类，字段与查询列一致，按位置参数由游标行直接构造
+    没有 __dict__ 与 ORM 状态，单行内存远小于 ORM 实例；
+    FastAPI / pydantic 按 dataclass 直接序列化，也可用 _asdict() 转为 dict
+    """
+    return dataclasses.make_dataclass(name, [(key, Any) for key in keys],
+                                      namespace={'__slots__': keys, '_fields': keys, '_asdict': _asdict})
+
+
+def not_deleted(cls: Type[T], kwargs: dict = None):
+    """
+    查询逻辑删除实体时自动追加的 未删除 条件（<逻辑删除列> IS NULL OR <逻辑删除列> = 0）
+    实体没有逻辑删除列、kwargs 中 with_deleted=True 或已显式按逻辑删除列过滤时返回 None
+    """
+    meta = get_column_meta(cls)
+    if meta.not_deleted is None or not kwargs:
+        return meta.not_deleted
+    if kwargs.get('with_deleted') or kwargs.get(meta.soft_delete) is not None:
+        return None
+    return meta.not_deleted
+
+
+_registry: Dict[type, ColumnMeta] = {}
+_registry_lock = threading.Lock()
+
+
+def get_column_meta(cls: Type[T]) -> ColumnMeta:
+    """
+    获取实体类的列元数据，首次访问时构建
+    """
+    meta: Optional[ColumnMeta] = _registry.get(cls)
+    if meta is None:
+        with _registry_lock:
+            meta = _registry.get(cls)
+            if meta is None:
+                meta = ColumnMeta(cls)
+                _registry[cls] = meta
+    return meta
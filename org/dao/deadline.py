@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import contextvars
+import math
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from sqlalchemy import Engine, event
+
+from ..common.ierrors import ErrorCodes
+from ..common.iexception import IException
+from .metrics import DEADLINE_EXCEEDED
+
+
+class DeadlineExceeded(IException):
+    """
+    超过请求截止时间：SQL 未执行（剩余时间已用完），或执行中被数据库按语句超时取消
+    """
+
+    def __init__(self, endpoint: str = '', engine: str = ''):
+        super().__init__(error=ErrorCodes.DEADLINE_EXCEEDED)
+        self.endpoint = endpoint
+        self.engine = engine
+
+
+class Deadline:
+    """
+    截止时间（time.monotonic），endpoint 为超时指标的标签，可传入函数在超时时再取值（如路由匹配后的路径）
+    """
+    __slots__ = ('expires_at', '_endpoint')
+
+    def __init__(self, timeout: float, endpoint: str | Callable[[], str] = ''):
+        self.expires_at = time.monotonic() + timeout
+        self._endpoint = endpoint
+
+    @property
+    def endpoint(self) -> str:
+        return self._endpoint() if callable(self._endpoint) else self._endpoint
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+# 当前上下文（请求）的截止时间，同步处理函数在线程池中执行时随上下文复制
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar('db_deadline', default=None)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    """
+    当前上下文剩余的时间(秒)，没有截止时间时为 None
+    """
+    _deadline = _current.get()
+    return _deadline.remaining() if _deadline is not None else None
+
+
+def activate(_deadline: Deadline) -> contextvars.Token:
+    """
+    设置当前上下文的截止时间，已有更早的截止时间时保留原值
+    """
+    _outer = _current.get()
+    if _outer is not None and _outer.expires_at <= _deadline.expires_at:
+        _deadline = _outer
+    return _current.set(_deadline)
+
+
+def deactivate(token: contextvars.Token):
+    _current.reset(token)
+
+
+@contextmanager
+def deadline(timeout: float, endpoint: str = ''):
+    """
+    代码块内的 SQL 共享 timeout 秒的时间预算，每条语句按剩余时间设置数据库的语句超时：
+        with deadline(5):
+            service.page(...)
+    """
+    token = activate(Deadline(timeout, endpoint))
+    try:
+        yield
+    finally:
+        deactivate(token)
+
+
+def check(engine: str = ''):
+    """
+    剩余时间已用完时抛出 DeadlineExceeded
+    """
+    _deadline = _current.get()
+    if _deadline is not None and _deadline.remaining() <= 0:
+        raise exceeded(_deadline, engine)
+
+
+def exceeded(_deadline: Deadline, engine: str) -> DeadlineExceeded:
+    endpoint = _deadline.endpoint
+    DEADLINE_EXCEEDED.inc(endpoint, engine)
+    return DeadlineExceeded(endpoint, engine)
+
+
+_SELECT = re.compile(r'^\s*select\b', re.IGNORECASE)
+_SELECT_HINT = re.compile(r'^\s*select\s+/\*\+', re.IGNORECASE)
+# 各数据库语句超时被取消时的错误信息
+_TIMEOUT_ERROR = re.compile(r'maximum statement execution time exceeded|statement timeout|query.?timeout|interrupted',
+                            re.IGNORECASE)
+
+
+def with_hint(statement: str, hint: str) -> str:
+    """
+    在 SELECT 后加入优化器提示 /*+ hint */，已有提示时合并到同一个注释中；非 SELECT 语句不变
+    """
+    match = _SELECT_HINT.match(statement)
+    if match:
+        return f'{statement[:match.end()]} {hint}{statement[match.end():]}'
+    match = _SELECT.match(statement)
+    if match:
+        return f'{statement[:match.end()]} /*+ {hint} */{statement[match.end():]}'
+    return statement
+
+
+def _mysql(cursor, statement: str, timeout: float, context) -> str:
+    # max_execution_time 只对 SELECT 生效，按语句提示设置，不修改会话变量；
+    # INSERT / UPDATE / DELETE 没有语句级超时，执行前剩余时间未用完即不受限制地执行
+    return with_hint(statement, f'MAX_EXECUTION_TIME({math.ceil(timeout * 1000)})')
+
+
+def _doris(cursor, statement: str, timeout: float, context) -> str:
+    # query_timeout 单位为秒
+    return with_hint(statement, f'SET_VAR(query_timeout = {math.ceil(timeout)})')
+
+
+# 连接 info 中记录当前事务已设置的 statement_timeout(毫秒)，事务结束时清除（见 attach）
+_PG_TIMEOUT = 'deadline_statement_timeout'
+# 剩余时间比已设置的超时小超过该比例时才重新设置，语句最多超出截止时间约 10%
+_PG_TOLERANCE = 0.1
+
+
+def _postgresql(cursor, statement: str, timeout: float, context) -> str:
+    # SET LOCAL 只在当前事务内有效，事务结束后恢复，连接归还连接池时不残留
+    # 同一事务内剩余时间变化不大时沿用已设置的值，不必每条语句多一次往返
+    timeout_ms = math.ceil(timeout * 1000)
+    info = context.root_connection.info
+    current_ms = info.get(_PG_TIMEOUT)
+    if current_ms is None or not timeout_ms <= current_ms <= timeout_ms * (1 + _PG_TOLERANCE):
+        cursor.execute(f'SET LOCAL statement_timeout = {timeout_ms}')
+        info[_PG_TIMEOUT] = timeout_ms
+    return statement
+
+
+def _sqlite(cursor, statement: str, timeout: float, context) -> str:
+    # 没有语句超时，到期后由定时器调用 interrupt() 中断（仅同步驱动）
+    connection = context.root_connection.connection.driver_connection
+    if isinstance(connection, sqlite3.Connection):
+        timer = threading.Timer(timeout, connection.interrupt)
+        timer.daemon = True
+        timer.start()
+        context._deadline_timer = timer
+    return statement
+
+
+# 方言 -> 按剩余时间设置语句超时的函数
+STATEMENT_TIMEOUTS = {
+    'mysql': _mysql,
+    'doris': _doris,
+    'postgresql': _postgresql,
+    'sqlite': _sqlite,
+}
+
+
+def _cancel_timer(context):
+    timer = getattr(context, '_deadline_timer', None)
+    if timer is not None:
+        timer.cancel()
+        context._deadline_timer = None
+
+
+def attach(engine: Engine, dialect: str, name: str):
+    """
+    监听 Engine 的 SQL 执行事件（异步引擎传 sync_engine）：有截止时间时
+    - 剩余时间已用完：不执行，直接抛出 DeadlineExceeded
+    - 否则按剩余时间设置该语句在数据库端的超时，到期由数据库取消查询，连接随会话关闭归还连接池
+      （PostgreSQL 按事务设置，剩余时间变化不大时不重复设置）
+    - 超时被取消的错误转换为 DeadlineExceeded，并计入 db_deadline_exceeded_total
+    """
+    apply = STATEMENT_TIMEOUTS.get(dialect)
+
+    @event.listens_for(engine, 'before_cursor_execute', retval=True)
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _deadline = _current.get()
+        if _deadline is None:
+            return statement, parameters
+        _remaining = _deadline.remaining()
+        if _remaining <= 0:
+            raise exceeded(_deadline, name)
+        if apply is not None:
+            statement = apply(cursor, statement, _remaining, context)
+        return statement, parameters
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _cancel_timer(context)
+
+    def _end_transaction(conn, *args):
+        # 事务（或保存点）结束后 SET LOCAL 失效，下一条语句需重新设置
+        conn.info.pop(_PG_TIMEOUT, None)
+
+    for _event in ('commit', 'rollback', 'rollback_savepoint'):
+        event.listen(engine, _event, _end_transaction)
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        if context.execution_context is not None:
+            _cancel_timer(context.execution_context)
+        _deadline = _current.get()
+        if _deadline is None or isinstance(context.original_exception, DeadlineExceeded):
+            return None
+        if _deadline.remaining() <= 0 or _TIMEOUT_ERROR.search(str(context.original_exception)):
+            return exceeded(_deadline, name)
+        return None
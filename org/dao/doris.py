@@ -1,24 +1,40 @@
 from __future__ import annotations
 
 import os
-from dotenv import load_dotenv
-load_dotenv()  # 自动读取 .env 文件
 
 from .engine import DbEngine, EngineConfig
+from .async_engine import AsyncDbEngine
+from .registry import registry
 
 
-DB_CONFIG = {
-    'host': os.getenv('DORIS_DB_HOST', '127.11.16.23'),
-    'port': os.getenv('DORIS_DB_PORT', '9030'),
-    'database': os.getenv('DORIS_DB_NAME', 'test_db'),
-    'username': os.getenv('DORIS_DB_USER', 'root'),
-    'password': os.getenv('DORIS_DB_PASSWORD', '')
-}
+def doris_config(name: str = 'doris') -> EngineConfig:
+    """
+    从环境变量（.env）读取 Doris 配置，由 registry 在首次使用时调用
+    """
+    return EngineConfig(
+        host=os.getenv('DORIS_DB_HOST', '127.11.16.23'),
+        port=os.getenv('DORIS_DB_PORT', '9030'),
+        database=os.getenv('DORIS_DB_NAME', 'test_db'),
+        username=os.getenv('DORIS_DB_USER', 'root'),
+        password=os.getenv('DORIS_DB_PASSWORD', ''),
+        # 慢查询阈值(毫秒)，未设置或为 0 时不记录
+        slow_query_ms=os.getenv('DORIS_DB_SLOW_QUERY_MS') or None,
+        # 走 MySQL 协议，upsert 按 Doris Unique Key 模型处理
+        dialect='doris',
+        name=name
+    )
 
-doris_props = EngineConfig(
-    **DB_CONFIG,
-    name='doris'
-)
 
-doris_engine = DbEngine(doris_props)
+registry.register('doris', lambda: DbEngine(doris_config()))
+# 异步引擎（aiomysql），供 async 接口使用，避免阻塞事件循环；与同步引擎共用查询结果缓存
+registry.register('doris_async', lambda: AsyncDbEngine(doris_config('doris_async'),
+                                                       result_cache=registry.get('doris').result_cache))
 
+
+def __getattr__(name: str):
+    # 兼容 from org.dao.doris import doris_engine / doris_async_engine，访问时才创建引擎
+    if name == 'doris_engine':
+        return registry.get('doris')
+    if name == 'doris_async_engine':
+        return registry.get('doris_async')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
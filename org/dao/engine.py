@@ -1,20 +1,46 @@
 from __future__ import annotations
 
+import contextvars
+import datetime
+import re
+import threading
+import time
 import traceback
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 from pydantic import BaseModel, Field
-from typing import Optional, Type, List, Iterable, Callable
+from typing import Optional, Type, List, Iterable, Iterator, Callable
 
 from loguru import logger
-from sqlalchemy import create_engine, text, desc, asc, and_, UniqueConstraint, Engine
+from sqlalchemy import create_engine, text, desc, asc, and_, func, select, insert, bindparam, Select, Engine, Connection
+from sqlalchemy import update as sa_update, delete as sa_delete
 from sqlalchemy.sql.dml import Insert
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from sqlalchemy.engine import Result
 from sqlalchemy.engine.url import URL
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.orm import sessionmaker, Session, Query
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.base import NO_VALUE
 from sqlalchemy.sql.elements import OperatorExpression
 
-from . import T, Page
+from . import T, Page, BulkResult, keyset
+from .columns import get_column_meta, not_deleted
+from .cache import ResultCache, MISSING
+from .metrics import instrument_engine, instrumented_pool_class
+from .slowlog import SlowQueryLog
+from .stmt_cache import StatementCache
+from .columnar import ColumnarResult, from_partitions
+from . import export as _export
+from .export import ExportResult
+from .uow import current_uow
+from . import replica, deadline
+from .replica import Replica, ReplicaSet
 
 
 # # 获取 SQLAlchemy 的日志记录器
@@ -37,30 +63,14 @@ def update_attr(entity: T, record: T):
 
 def parse_columns(cls: Type[T],
                   select_columns: Iterable[str] = None,
-                  exclude_columns: Iterable[str] = None) -> list[str]:
-    _parsed_columns: set = set()
-    _skip_attrs = ['registry', 'metadata', 'self']
-
-    def filter_fields(fields: Iterable[str]):
-        for attr in fields:
-            if callable(getattr(cls, attr)) or attr.startswith("_") or attr.startswith("__") or attr in _skip_attrs:
-                continue
-            _parsed_columns.add(getattr(cls, attr))
-
-    _select_columns = select_columns if select_columns else dir(cls)  # 获取 cls 所有属性作为字段值
-    filter_fields(_select_columns)
-    _final_columns = []
-    # 如果指定了排除列， 则该字段不被查询
-    if exclude_columns:
-        for col in _parsed_columns:
-            if col.name not in exclude_columns:
-                _final_columns.append(col)
-    else:
-        _final_columns = _parsed_columns
-    return list(_final_columns)
+                  exclude_columns: Iterable[str] = None) -> list:
+    return list(get_column_meta(cls).projection(select_columns, exclude_columns))
 
 
-def parse_filters(cls: Type[T], args=None, kwargs=None):
+def parse_filters(cls: Type[T], args=None, kwargs=None, soft_delete: bool = False):
+    """
+    :param soft_delete: 为 True 时（查询）逻辑删除实体追加 未删除 条件，kwargs 中 with_deleted=True 时不追加
+    """
     filters = []
     if args:
         for _arg in args:
@@ -77,46 +87,236 @@ def parse_filters(cls: Type[T], args=None, kwargs=None):
             else:
                 if hasattr(cls, key):
                     filters.append(getattr(cls, key) == value)
+    if soft_delete:
+        _not_deleted = not_deleted(cls, kwargs)
+        if _not_deleted is not None:
+            filters.append(_not_deleted)
     return filters
 
 
 def parse_update_columns(stmt: Insert, cls: Type[T], kwargs=None) -> dict:
-    all_columns = cls.__table__.columns
+    meta = get_column_meta(cls)
     _exclude_columns = set(kwargs.pop('exclude_columns')) if 'exclude_columns' in kwargs.keys() else set()
-    # 排除主键
-    for col in cls.__table__.primary_key.columns:
-        _exclude_columns.add(col.name)
-    # 排除唯一主键
-    for col in all_columns:
-        if not col.unique:
-            continue
-        _exclude_columns.add(col.name)
-    # 排除联合主键
-    for _constraint in cls.__table__.constraints:
-        if not isinstance(_constraint, UniqueConstraint):
-            continue
-        for col in _constraint.columns:
-            _exclude_columns.add(col.name)
+    # 排除主键、唯一列以及联合唯一约束
+    _exclude_columns.update(meta.unique_columns)
 
     _update_columns = set(kwargs.pop('update_columns')) if 'update_columns' in kwargs.keys() else set()
     if not _update_columns:
-        _update_columns = {col.name for col in all_columns}
+        _update_columns = meta.update_columns
 
+    # MySQL 引用 VALUES(col)，PostgreSQL / SQLite 引用 EXCLUDED.col
+    _source = stmt.excluded if hasattr(stmt, 'excluded') else stmt.inserted
     # 如果指定了排除列， 则该字段不被查询
-    if _exclude_columns:
-        _update_columns = {col for col in _update_columns if col not in _exclude_columns}
-
-    _update_mapping = {field: stmt.inserted[field] for field in _update_columns}
+    _update_mapping = {field: _source[field] for field in _update_columns if field not in _exclude_columns}
 
     return _update_mapping
 
 
+def build_upsert(cls: Type[T], dialect: str, rows: list, kwargs: dict):
+    """
+    按方言构建 upsert 语句
+    mysql: INSERT ... ON DUPLICATE KEY UPDATE
+    postgresql / sqlite: INSERT ... ON CONFLICT (conflict_columns) DO UPDATE，conflict_columns 默认主键
+    doris: Unique Key 模型按 key 覆盖写入，普通 INSERT 即 upsert；指定 update_columns 时只写 key + 这些列（部分列更新）
+    """
+    if dialect == 'mysql':
+        stmt = mysql_insert(cls).values(rows)
+        return stmt.on_duplicate_key_update(**parse_update_columns(stmt=stmt, cls=cls, kwargs=kwargs))
+    if dialect in ('postgresql', 'sqlite'):
+        stmt = (pg_insert if dialect == 'postgresql' else sqlite_insert)(cls).values(rows)
+        _conflict_columns = kwargs.pop('conflict_columns') if 'conflict_columns' in kwargs.keys() else None
+        _update_mapping = parse_update_columns(stmt=stmt, cls=cls, kwargs=kwargs)
+        _index_elements = list(_conflict_columns or get_column_meta(cls).primary_key)
+        if not _update_mapping:
+            return stmt.on_conflict_do_nothing(index_elements=_index_elements)
+        return stmt.on_conflict_do_update(index_elements=_index_elements, set_=_update_mapping)
+    if dialect == 'doris':
+        _update_columns = kwargs.get('update_columns')
+        if _update_columns:
+            _keys = set(get_column_meta(cls).primary_key).union(_update_columns)
+            rows = [{k: v for k, v in row.items() if k in _keys} for row in rows]
+        return insert(cls).values(rows)
+    raise ValueError(f"不支持 upsert 的数据库方言: {dialect}")
+
+
+def group_rows(rows: list) -> list:
+    """
+    按字段集合分组，保持各行首次出现的顺序：to_row 忽略 None 字段，各行的字段可能不同，
+    而多行 VALUES 要求各行字段一致，只能按字段集合分别生成语句
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return list(groups.values())
+
+
+class UpsertPlan:
+    """
+    一次批量 upsert 的执行计划，同步/异步引擎共用：实体转为字段字典后按字段集合分组，
+    每组按 chunk_size 分批，每批一条 upsert 语句（见 build_upsert），引擎只负责执行并回报受影响行数
+    """
+
+    def __init__(self, cls: Type[T], dialect: str, values: list, chunk_size: int, kwargs: dict):
+        self.cls = cls
+        self.dialect = dialect
+        self.chunk_size = chunk_size
+        self.kwargs = kwargs
+        self.rows = [v if isinstance(v, dict) else to_row(cls, v) for v in values]
+        # Doris 部分列更新需要打开会话变量；更新列覆盖全部非 key 列时即整行写入
+        self.partial = dialect == 'doris' and bool(kwargs.get('update_columns')) \
+            and not set(get_column_meta(cls).update_columns).issubset(kwargs['update_columns'])
+        self.result = BulkResult(affected=[])
+        self._start = time.perf_counter()
+
+    def statements(self) -> Iterator[tuple]:
+        for group in group_rows(self.rows):
+            for i in range(0, len(group), self.chunk_size):
+                chunk = group[i:i + self.chunk_size]
+                yield chunk, build_upsert(self.cls, self.dialect, chunk, dict(self.kwargs))
+
+    def add(self, chunk: list, rowcount: int):
+        self.result.affected.append(rowcount)
+        self.result.chunks += 1
+        logger.debug(f"Upsert {self.cls.__name__} chunk {self.result.chunks}: {len(chunk)} rows, {rowcount} affected")
+
+    def finish(self) -> BulkResult:
+        result = self.result
+        result.rows = sum(n for n in result.affected if n > 0)
+        result.elapsed = time.perf_counter() - self._start
+        if result.chunks > 1:
+            logger.info(f"Upsert {self.cls.__name__}: {len(self.rows)} rows / {result.chunks} chunks, "
+                        f"affected {result.rows} {result.affected} in {result.elapsed:.3f}s")
+        return result
+
+
+def to_row(cls: Type[T], value) -> dict:
+    """
+    实体或字典转为 {字段: 值}，忽略未设置(None)的字段，让数据库/列默认值生效
+    """
+    if isinstance(value, dict):
+        return {k: v for k, v in value.items() if v is not None}
+    _state = vars(value)
+    return {k: _state[k] for k in get_column_meta(cls).keys if _state.get(k) is not None}
+
+
+def dirty_row(cls: Type[T], value) -> dict:
+    """
+    按主键更新时要写入的字段 {字段: 值}（含主键），不读取数据库中的行：
+    - 字典：全部字段，值为 None 时更新为 NULL
+    - 查询得到后修改过的实体：加载后值被修改的字段
+    - 新构造的实体：非空字段
+    """
+    meta = get_column_meta(cls)
+    if isinstance(value, dict):
+        return {k: v for k, v in value.items() if k in meta.column_map}
+    if not _is_loaded(value):
+        return to_row(cls, value)
+    _state = vars(value)
+    committed = sa_inspect(value).committed_state
+    # 修改后与原值相同的字段不写入
+    return {k: _state.get(k) for k in meta.keys
+            if k in meta.primary_key or (k in committed and committed[k] != _state.get(k))}
+
+
+def _is_loaded(value) -> bool:
+    """
+    实体是否由查询加载：ORM 持久化 / 游离对象，或有字段为加载的值（未修改，或修改前的原值不是 NO_VALUE）
+    新构造的实体所有字段都是赋值产生的，原值均为 NO_VALUE
+    """
+    state = sa_inspect(value)
+    if state.key is not None:
+        return True
+    committed = state.committed_state
+    return any(committed.get(k, None) is not NO_VALUE for k in state.dict if not k.startswith('_'))
+
+
+def mark_clean(value, row: dict):
+    """
+    更新成功后将已写入的字段标记为未修改，之后再次更新同一实体时只写入新的修改
+    """
+    if isinstance(value, dict):
+        return
+    for k, v in row.items():
+        set_committed_value(value, k, v)
+
+
+def build_update_by_id(cls: Type[T], row: dict):
+    """
+    UPDATE <表> SET <row 中的非主键字段> WHERE 主键 = ?，row 中缺少主键时抛出 ValueError
+    """
+    meta = get_column_meta(cls)
+    if any(row.get(k) is None for k in meta.primary_key):
+        raise ValueError(f"按主键更新 {cls.__name__} 缺少主键: {row}")
+    values = {k: v for k, v in row.items() if k not in meta.primary_key}
+    return sa_update(cls).where(*primary_key_clauses(cls, row)).values(**values) \
+        .execution_options(synchronize_session=False)
+
+
+def primary_key_clauses(cls: Type[T], row: dict) -> list:
+    """
+    主键 = row 中的值（联合主键时每列一个条件）
+    """
+    meta = get_column_meta(cls)
+    return [meta.column_map[k] == row[k] for k in meta.primary_key]
+
+
+def primary_key_value(cls: Type[T], row: dict):
+    _keys = get_column_meta(cls).primary_key
+    return row[_keys[0]] if len(_keys) == 1 else tuple(row[k] for k in _keys)
+
+
+def build_exists_by_id(cls: Type[T], row: dict):
+    """
+    SELECT 1 FROM <表> WHERE 主键 = ? LIMIT 1，不过滤已逻辑删除的行
+    """
+    return select(1).select_from(cls).where(*primary_key_clauses(cls, row)).limit(1)
+
+
+def build_soft_delete(cls: Type[T], ids=None, args=None, kwargs=None, chunk_size: int = 1000) -> list:
+    """
+    逻辑删除语句 UPDATE <表> SET <逻辑删除列> = 1 WHERE <主键 IN ids | 条件> AND <未删除>（见 ColumnMeta.not_deleted）
+    ids 按 chunk_size 分为多条语句；实体没有逻辑删除列、ids 与条件均为空时抛出 ValueError
+    """
+    meta = get_column_meta(cls)
+    if meta.soft_delete is None:
+        raise ValueError(f"{cls.__name__} 没有逻辑删除列")
+    if isinstance(ids, OperatorExpression):
+        ids, args = None, (ids, *(args or ()))
+    values = {meta.soft_delete: True}
+    if 'update_time' in meta.column_map:
+        # 删除时间，purge_deleted 按此判断保留期
+        values['update_time'] = datetime.datetime.now()
+    stmt = sa_update(cls).where(meta.not_deleted).values(values).execution_options(synchronize_session=False)
+    if ids is not None:
+        _ids = list(dict.fromkeys(eid for eid in ids if eid is not None))
+        return [stmt.where(cls.id.in_(_ids[i:i + chunk_size])) for i in range(0, len(_ids), chunk_size)]
+    filters = parse_filters(cls=cls, args=args, kwargs=kwargs)
+    if not filters:
+        raise ValueError(f"逻辑删除 {cls.__name__} 需要指定 ids 或过滤条件")
+    return [stmt.where(and_(*filters))]
+
+
 def _wrapper_query(query: Query, cls, args=None, **kwargs):
     # 如果指定了查询列，则只查询这些列
     _columns = kwargs.pop('columns') if 'columns' in kwargs.keys() else None
     _exclude_columns = kwargs.pop('exclude_columns') if 'exclude_columns' in kwargs.keys() else None
     _parsed_columns = parse_columns(cls, _columns, _exclude_columns)
     query = query.with_entities(*_parsed_columns)
+    return _wrapper_clauses(query, cls, args=args, **kwargs)
+
+
+def build_select(cls, args=None, **kwargs) -> Select:
+    """
+    与 _wrapper_query 相同的查询条件，生成 2.0 风格的 select 语句（异步引擎使用）
+    """
+    _columns = kwargs.pop('columns') if 'columns' in kwargs.keys() else None
+    _exclude_columns = kwargs.pop('exclude_columns') if 'exclude_columns' in kwargs.keys() else None
+    stmt = select(*parse_columns(cls, _columns, _exclude_columns))
+    return _wrapper_clauses(stmt, cls, args=args, **kwargs)
+
+
+def _wrapper_clauses(query, cls, args=None, **kwargs):
+    # Query 与 Select 共用的排序、分组与过滤条件
     _order_by = kwargs.pop('order_by') if 'order_by' in kwargs.keys() else None
     _is_asc = kwargs.pop('asc') if 'asc' in kwargs.keys() else False
     if isinstance(_order_by, (list, tuple)):
@@ -126,26 +326,87 @@ def _wrapper_query(query: Query, cls, args=None, **kwargs):
     _group_by = kwargs.pop('group_by') if 'group_by' in kwargs.keys() else None
     if _group_by is not None:
         query = query.group_by(_group_by)
-    filters = parse_filters(cls=cls, args=args, kwargs=kwargs)
+    filters = parse_filters(cls=cls, args=args, kwargs=kwargs, soft_delete=True)
     if filters:
         query = query.filter(and_(*filters))
     return query
 
 
-def _wrapper_query_result(result, cls, **kwargs):
+def with_primary_key(cls, kwargs: dict) -> dict:
+    """
+    指定了查询列但不含主键时补上主键，按主键对齐结果时需要
+    """
+    _columns = kwargs.get('columns')
+    if not _columns:
+        return kwargs
+    _keys = [k for k in get_column_meta(cls).primary_key if k not in _columns]
+    return {**kwargs, 'columns': list(_columns) + _keys} if _keys else kwargs
+
+
+def entity_builder(cls, **kwargs) -> Callable:
+    """
+    按查询列生成 行 -> 实体 的转换函数
+    """
     # 如果指定了查询列，则只查询这些列
     _columns = kwargs.pop('columns') if 'columns' in kwargs.keys() else None
     _exclude_columns = kwargs.pop('exclude_columns') if 'exclude_columns' in kwargs.keys() else None
-    _parsed_columns = parse_columns(cls, _columns, _exclude_columns)
+    # as_rows=True 时返回轻量行对象（ColumnMeta.row_class），不创建 ORM 实例，用于只读查询
+    _as_rows = kwargs.pop('as_rows') if 'as_rows' in kwargs.keys() else False
+    if _as_rows:
+        _row_cls = get_column_meta(cls).row_class(_columns, _exclude_columns)
+        _n = len(_row_cls._fields)
+        # 与 _set_entity 一致，忽略查询列之后的附加列（如 COUNT(*) OVER()）
+        return lambda _result: _row_cls(*_result[:_n])
+    _keys = get_column_meta(cls).projection_keys(_columns, _exclude_columns)
 
     def _set_entity(_result):
         _instance = cls()
-        for _column, _value in zip(_parsed_columns, _result):
-            if _column is None:
-                continue
-            setattr(_instance, _column.key, _value)
+        # 直接写入实例字典，作为已加载的值（不记录修改历史），之后被修改的字段才由 update_by_id 写入
+        _instance.__dict__.update(zip(_keys, _result))
         return _instance
 
+    return _set_entity
+
+
+class ByIdsPlan:
+    """
+    按主键批量查询的执行计划，同步/异步引擎共用：去重后按 chunk_size 分批 IN (...)，结果按主键对齐到 ids 的顺序
+    """
+
+    def __init__(self, cls: Type[T], ids: Iterable, chunk_size: int, kwargs: dict, stmt_cache=None):
+        self.cls = cls
+        self.ids = list(ids)
+        self.chunk_size = chunk_size
+        self.kwargs = with_primary_key(cls, kwargs)
+        self.stmt_cache = stmt_cache
+        self._build = entity_builder(cls, **self.kwargs)
+        self._found = {}
+
+    def statements(self) -> Iterator[tuple]:
+        """
+        各批的 (语句, 参数)，查询形态已缓存时使用缓存的语句
+        """
+        _unique = list(dict.fromkeys(eid for eid in self.ids if eid is not None))
+        for i in range(0, len(_unique), self.chunk_size):
+            _args = (self.cls.id.in_(_unique[i:i + self.chunk_size]),)
+            _cached_stmt = self.stmt_cache.lookup(self.cls, _args, self.kwargs) if self.stmt_cache else None
+            yield _cached_stmt if _cached_stmt is not None \
+                else (build_select(cls=self.cls, args=_args, **self.kwargs), None)
+
+    def add(self, rows):
+        for row in rows:
+            entity = self._build(row)
+            self._found[entity.id] = entity
+
+    def result(self) -> list:
+        """
+        与 ids 顺序一致的列表，不存在的 id 对应 None，重复的 id 对应同一个实体
+        """
+        return [self._found.get(eid) for eid in self.ids]
+
+
+def build_entities(result, cls, **kwargs):
+    _set_entity = entity_builder(cls, **kwargs)
     instances = []
     if result:
         if isinstance(result, list):
@@ -157,9 +418,20 @@ def _wrapper_query_result(result, cls, **kwargs):
     return instances
 
 
+# 同步驱动 -> 异步驱动
+ASYNC_PROTOCOLS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
 class EngineConfig(BaseModel):
     name: Optional[str] = Field(default='default', description='数据库引擎名称')
     protocol: Optional[str] = Field(default='mysql+pymysql', description='数据库协议')
+    async_protocol: Optional[str] = Field(default=None, description='异步数据库协议，为空时按 protocol 推断')
     host: Optional[str] = Field(default='localhost', description='数据库主机')
     port: Optional[int] = Field(default=3306, description='数据库端口')
     username: Optional[str] = Field(default='', description='数据库用户名')
@@ -173,6 +445,23 @@ class EngineConfig(BaseModel):
     pool_recycle: Optional[int] = Field(default=3600, description='连接池回收时间')
     echo: Optional[bool] = Field(default=False, description='是否打印SQL语句')
     connect_args: Optional[dict] = Field(default_factory=dict, description='连接参数')
+    stream_batch_size: Optional[int] = Field(default=1000, description='流式查询每批拉取的行数')
+    bulk_chunk_size: Optional[int] = Field(default=1000, description='批量写入每批行数')
+    in_chunk_size: Optional[int] = Field(default=500, description='按主键批量查询时每批 IN (...) 的 id 数')
+    replicas: Optional[List[dict]] = Field(default_factory=list,
+                                           description='只读副本，每项覆盖 host/port/username/password 等连接参数')
+    replica_policy: Optional[str] = Field(default='round_robin', description='副本选择策略: round_robin / least_outstanding')
+    replica_max_failures: Optional[int] = Field(default=3, description='副本连续失败达到该次数后摘除')
+    replica_eject_seconds: Optional[float] = Field(default=30, description='副本摘除时长(秒)')
+    slow_query_ms: Optional[float] = Field(default=None, description='慢查询阈值(毫秒)，为空时不记录')
+    slow_query_explain: Optional[bool] = Field(default=True, description='慢查询是否自动执行 EXPLAIN')
+    slow_query_buffer: Optional[int] = Field(default=100, description='慢查询缓冲区保留的记录数')
+    metrics: Optional[bool] = Field(default=True, description='是否采集连接池与 SQL 耗时指标(/metrics)')
+    dialect: Optional[str] = Field(default=None, description='SQL 方言(mysql/postgresql/sqlite/doris)，为空时按驱动推断')
+    result_cache_size: Optional[int] = Field(default=1024, description='查询结果缓存最大条目数')
+    result_cache_max_rows: Optional[int] = Field(default=100000, description='查询结果缓存总行数上限')
+    statement_cache_size: Optional[int] = Field(default=512, description='select_list / select_one 语句缓存的查询形态数，0 表示不缓存')
+    deadline: Optional[bool] = Field(default=True, description='是否按请求截止时间设置语句超时(见 org.dao.deadline)')
 
     def get_url(self) -> URL:
         return URL.create(
@@ -185,12 +474,131 @@ class EngineConfig(BaseModel):
             query=self.query
         )
 
+    def get_async_url(self) -> URL:
+        drivername = self.async_protocol or ASYNC_PROTOCOLS.get(self.protocol, self.protocol)
+        return self.get_url().set(drivername=drivername)
+
     def get_connect_args(self, **kwargs):
         conn_args = self.connect_args.copy()
         conn_args.update(kwargs)
         return conn_args
 
 
+def new_slow_log(config: EngineConfig) -> Optional[SlowQueryLog]:
+    if not config.slow_query_ms:
+        return None
+    return SlowQueryLog(config.slow_query_ms, maxlen=config.slow_query_buffer, explain=config.slow_query_explain)
+
+
+# 只读语句不会使查询结果缓存失效
+READ_ONLY_SQL = re.compile(r'^\s*(select|with|show|explain|desc|describe)\b', re.IGNORECASE)
+
+
+def cached_result(value):
+    """
+    缓存中的结果在多个调用方之间共享，返回浅拷贝避免列表被修改
+    """
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, Page):
+        return value.model_copy(update={'records': list(value.records or [])})
+    return value
+
+
+# page 的总数计算方式
+COUNT_STRATEGIES = ('exact', 'none', 'cached', 'estimate', 'window')
+
+# 按方言读取表统计行数
+_ESTIMATE_SQL = {
+    'mysql': "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table",
+    'postgresql': "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)",
+}
+
+
+def build_estimate(cls: Type[T], dialect: str, args=None, kwargs=None):
+    """
+    读取表统计行数的语句 (stmt, params)，有过滤条件（含逻辑删除实体的 未删除 条件）或数据库不支持时返回 None
+    """
+    sql = _ESTIMATE_SQL.get(dialect)
+    if sql is None or parse_filters(cls=cls, args=args, kwargs=kwargs, soft_delete=True):
+        return None
+    return text(sql), {'table': cls.__table__.name}
+
+
+class PagePlan:
+    """
+    一次 offset 分页的执行计划，同步/异步引擎共用
+    构造时从 kwargs 中取出分页与总数参数（见 DbEngine.page），引擎只负责执行数据查询与 COUNT
+    """
+
+    def __init__(self, kwargs: dict):
+        self.count = kwargs.pop('count') if 'count' in kwargs.keys() else 'exact'
+        self.count_ttl = kwargs.pop('count_ttl') if 'count_ttl' in kwargs.keys() else 60
+        self.parallel = kwargs.pop('parallel') if 'parallel' in kwargs.keys() else False
+        if self.count not in COUNT_STRATEGIES:
+            raise ValueError(f"不支持的 count 方式: {self.count}，可选 {', '.join(COUNT_STRATEGIES)}")
+        self.page_num = max(1, kwargs.pop('page_num') if 'page_num' in kwargs.keys() else 1)
+        self.page_size = kwargs.pop('page_size') if 'page_size' in kwargs.keys() else 10
+
+    @staticmethod
+    def pop_seek(kwargs: dict) -> tuple:
+        """
+        取出游标分页参数，返回 (是否游标分页, cursor)；游标分页不计算总数，丢弃总数相关的参数
+        """
+        _cursor = kwargs.pop('cursor') if 'cursor' in kwargs.keys() else None
+        _keyset = kwargs.pop('keyset') if 'keyset' in kwargs.keys() else False
+        if _keyset or _cursor:
+            for _key in ('count', 'count_ttl', 'parallel'):
+                kwargs.pop(_key, None)
+            return True, _cursor
+        return False, None
+
+    def apply(self, stmt: Select) -> Select:
+        """
+        数据查询加上 OFFSET / LIMIT：count=none 时多取一行判断 has_next，count=window 时附带 COUNT(*) OVER()
+        """
+        limit = self.page_size
+        if self.count == 'none':
+            limit += 1
+        elif self.count == 'window':
+            stmt = stmt.add_columns(func.count().over().label('_total'))
+        return stmt.offset((self.page_num - 1) * self.page_size).limit(limit)
+
+    def count_total(self, engine, cls: Type[T], args: tuple, kwargs: dict):
+        """
+        按 count 方式计算总数，异步引擎返回协程
+        """
+        if self.count == 'cached':
+            return engine.select_count(cls, *args, cache_ttl=self.count_ttl, **kwargs)
+        if self.count == 'estimate':
+            return engine.estimate_count(cls, *args, **kwargs)
+        return engine.select_count(cls, *args, **kwargs)
+
+    def window_total(self, results: list) -> Optional[int]:
+        """
+        count=window 时数据查询附带的总数；页码越界时拿不到窗口值，返回 None，需补一次 COUNT
+        """
+        if results:
+            # 总数在最后一列，entity_builder 按查询列 zip，会忽略该列
+            return results[0][-1]
+        return None if self.page_num > 1 else 0
+
+    def fit(self, total: int):
+        """
+        先计算总数时，确保页码在有效范围内（估算值不精确，不据此修正页码）
+        """
+        if self.count != 'estimate':
+            self.page_num = max(1, min(self.page_num, (total + self.page_size - 1) // self.page_size))
+
+    def to_page(self, results: list, total: Optional[int], build: Callable) -> Page:
+        if self.count == 'none':
+            return Page(total=None, page_num=self.page_num, page_size=self.page_size,
+                        records=[build(row) for row in results[:self.page_size]],
+                        has_next=len(results) > self.page_size)
+        return Page(total=total, page_num=self.page_num, page_size=self.page_size,
+                    records=[build(row) for row in results], has_next=self.page_num * self.page_size < total)
+
+
 class DbEngine:
     def __init__(self, config: dict | EngineConfig = EngineConfig()):
         if isinstance(config, dict):
@@ -209,29 +617,217 @@ class DbEngine:
         # self.url = f'{protocol}://{username}:{password}@{host}:{port}/{database}'
         logger.info(f'Init DbEngine: {self.name} ==> {self.config.host}:{self.config.port}/{self.config.database}')
         self._engine = None
+        self._sessionmaker: Optional[sessionmaker] = None
+        # 查询结果缓存，select_list / select_count / page 传入 cache_ttl 时启用
+        self.result_cache = ResultCache(maxsize=self.config.result_cache_size,
+                                        max_rows=self.config.result_cache_max_rows)
+        # 按查询形态缓存的 select 语句
+        self.stmt_cache = StatementCache(self.config.statement_cache_size)
+        # 慢查询日志，副本共用
+        self.slow_log = new_slow_log(self.config)
+        # page(parallel=True) 执行 COUNT 的线程池，首次使用时创建
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 只读副本：读操作路由到副本，写操作走主库
+        self.replicas = ReplicaSet([self._new_replica(i, _replica) for i, _replica in enumerate(self.config.replicas)],
+                                   policy=self.config.replica_policy,
+                                   max_failures=self.config.replica_max_failures,
+                                   eject_seconds=self.config.replica_eject_seconds)
+
+    def _new_replica(self, index: int, override: dict) -> Replica:
+        _override = dict(override)
+        # 副本未指定用户名密码时沿用主库（已编码）
+        for key in ('username', 'password'):
+            if _override.get(key):
+                _override[key] = urllib.parse.quote(_override[key].encode('utf-8'))
+        _config = self.config.model_copy(update={**_override, 'name': f'{self.name}-replica-{index}', 'replicas': []})
+        logger.info(f'Init replica: {_config.name} ==> {_config.host}:{_config.port}/{_config.database}')
+        return Replica(_config.name, lambda: self.create(_config))
+
+    def _cached(self, cls: Type[T], tag: str, stmt, cache_ttl: float, loader: Callable, *extra):
+        if not cache_ttl:
+            return loader()
+        key = ResultCache.key(tag, stmt, self.get_engine().dialect, *extra)
+        value = self.result_cache.get(key)
+        if value is MISSING:
+            # 查询期间表被写入时不缓存查询结果
+            tables = [cls.__table__.name]
+            version = self.result_cache.version(tables)
+            value = loader()
+            self.result_cache.put(key, value, tables=tables, ttl=cache_ttl, version=version)
+        return cached_result(value)
+
+    def _invalidate(self, cls: Type[T] = None):
+        """
+        写操作后使相关表的查询结果缓存失效，无法确定表时清空
+        配置了副本时，当前上下文后续的读操作固定走主库（read-your-writes）
+        """
+        self._evict(cls.__table__.name if cls is not None else None)
+
+    def invalidate(self, cls: Type[T] = None):
+        """
+        绕过引擎写入（如 Doris Stream Load）后，使相关表的查询结果缓存失效
+        """
+        self._invalidate(cls)
+
+    def _invalidate_stmt(self, stmt):
+        if getattr(stmt, 'is_select', False):
+            return
+        table = getattr(stmt, 'table', None) if getattr(stmt, 'is_dml', False) else None
+        self._evict(table.name if table is not None else None)
+
+    def _evict(self, table_name: Optional[str]):
+        if self.replicas:
+            replica.pin_primary(self.name)
+        self._evict_cache(table_name)
+        # 工作单元中写入尚未提交，结束后再失效一次，避免期间缓存的旧数据或未提交的数据留在缓存中
+        uow = current_uow()
+        if uow is not None:
+            uow.on_finish(lambda: self._evict_cache(table_name))
+
+    def _evict_cache(self, table_name: Optional[str]):
+        if table_name is None:
+            self.result_cache.clear()
+        else:
+            self.result_cache.invalidate_table(table_name)
 
-    def create(self):
-        logger.debug(f'New {self.name} Engine ...')
-        return create_engine(url=self.config.get_url(),
-                             pool_size=self.config.pool_size,
-                             max_overflow=self.config.max_overflow,
-                             pool_timeout=self.config.pool_timeout,
-                             pool_recycle=self.config.pool_recycle,
-                             connect_args=self.config.get_connect_args(),
-                             pool_pre_ping=True,
-                             echo=self.config.echo)
+    def create(self, config: EngineConfig = None):
+        config = config or self.config
+        logger.debug(f'New {config.name} Engine ...')
+        url = config.get_url()
+        kwargs = {}
+        if config.metrics:
+            pool_class = instrumented_pool_class(url)
+            if pool_class is not None:
+                kwargs.update(poolclass=pool_class, pool_logging_name=config.name)
+        engine = create_engine(url=url,
+                               pool_size=config.pool_size,
+                               max_overflow=config.max_overflow,
+                               pool_timeout=config.pool_timeout,
+                               pool_recycle=config.pool_recycle,
+                               connect_args=config.get_connect_args(),
+                               pool_pre_ping=True,
+                               echo=config.echo,
+                               **kwargs)
+        if config.metrics:
+            instrument_engine(engine, config.name)
+        if self.slow_log is not None:
+            self.slow_log.attach(engine, config.name)
+        if config.deadline:
+            deadline.attach(engine, config.dialect or engine.dialect.name, config.name)
+        return engine
 
     def get_engine(self) -> Engine:
         if not self._engine:
             self._engine = self.create()
+            self._sessionmaker = sessionmaker(bind=self._engine)
         # else:
         #     logger.info(f'Exist {self.name} Engine...')
         return self._engine
 
+    def warm_up(self, connections: int = None) -> int:
+        """
+        预建连接：并发签出 connections 个连接（默认 pool_size）后归还，连接留在池中供后续请求复用
+        配置了副本时一并预热，副本失败只记录日志
+        :return: 预建的连接数
+        """
+        _connections = connections or self.config.pool_size
+        opened = self._fill_pool(self.get_engine(), _connections)
+        for _replica in self.replicas.replicas:
+            try:
+                opened += self._fill_pool(_replica.get_engine(), _connections)
+            except SQLAlchemyError as e:
+                logger.warning(f"Failed to warm up replica {_replica.name}: {e}")
+        return opened
+
+    @staticmethod
+    def _fill_pool(engine: Engine, connections: int) -> int:
+        conns, error = [], None
+        with ThreadPoolExecutor(max_workers=min(connections, 16)) as executor:
+            for future in [executor.submit(engine.connect) for _ in range(connections)]:
+                try:
+                    conns.append(future.result())
+                except Exception as e:
+                    error = e
+        for conn in conns:
+            conn.close()
+        if error is not None:
+            raise error
+        return len(conns)
+
+    def ping(self):
+        with self.get_engine().connect() as conn:
+            conn.exec_driver_sql('SELECT 1')
+
+    def dispose(self):
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+        self.replicas.dispose()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def get_dialect(self) -> str:
+        return self.config.dialect or self.get_engine().dialect.name
+
     def get_session(self) -> Session:
-        _sessionmaker = sessionmaker(bind=self.get_engine())
-        # logger.debug(f'Use {self.name} Session...')
-        return _sessionmaker()
+        """
+        写会话；处于工作单元（uow.unit_of_work / 请求级依赖）中时返回其共享会话，commit 延迟到工作单元结束
+        """
+        uow = current_uow()
+        if uow is not None:
+            return uow.session(self)
+        self.get_engine()
+        return self._sessionmaker()
+
+    @contextmanager
+    def begin(self) -> Iterator[Connection]:
+        """
+        Core 语句的事务连接；工作单元中复用其会话的连接，由工作单元统一提交
+        """
+        uow = current_uow()
+        if uow is not None:
+            yield uow.session(self).connection()
+            return
+        with self.get_engine().begin() as conn:
+            yield conn
+
+    @contextmanager
+    def read_session(self) -> Iterator[Session]:
+        """
+        读会话：配置了副本时按策略选择副本，以下情况走主库
+        - 当前上下文已有写操作（read-your-writes）或处于 replica.use_primary() 中
+        - 副本全部被摘除，或连接副本失败
+        副本上出现连接类错误（OperationalError）计为一次失败，连续失败达到阈值后摘除
+        工作单元中未走副本的读操作使用其共享会话
+        """
+        uow = current_uow()
+        _primary = replica.is_pinned(self.name) or not self.replicas or (uow is not None and uow.has(self))
+        _replica = None if _primary else self.replicas.acquire()
+        if _replica is None:
+            with self.get_session() as session:
+                yield session
+            return
+        session = Session(bind=_replica.get_engine())
+        try:
+            session.connection()
+        except OperationalError as e:
+            session.close()
+            self.replicas.release(_replica, ok=False)
+            logger.warning(f"Replica {_replica.name} unavailable, fallback to primary: {e}")
+            with self.get_session() as session:
+                yield session
+            return
+        ok = True
+        try:
+            yield session
+        except OperationalError:
+            ok = False
+            raise
+        finally:
+            session.close()
+            self.replicas.release(_replica, ok=ok)
 
     def insert(self, entity: T) -> int:
         with self.get_session() as session:
@@ -240,6 +836,7 @@ class DbEngine:
                 session.add(entity)
                 session.flush()  # 只发送SQL到数据库，但不提交事务
                 session.commit()  # 如果flush成功，则提交事务
+                self._invalidate(type(entity))
                 return entity.id  # 假设entity映射到一个数据库行
             except Exception as e:
                 session.rollback()
@@ -256,6 +853,8 @@ class DbEngine:
                 session.add_all(entities)
                 session.flush()  # 只发送SQL到数据库，但不提交事务
                 session.commit()  # 如果flush成功，则提交事务
+                for _cls in {type(entity) for entity in entities}:
+                    self._invalidate(_cls)
                 return len(entities)  # 假设entity映射到一个数据库行
             except Exception as e:
                 session.rollback()
@@ -265,18 +864,183 @@ class DbEngine:
                 # 关闭会话
                 session.close()
 
-    def upsert(self, cls: Type[T], values: list, **kwargs) -> int:
-        stmt = Insert(cls).values(values)
-        # 如果未指定更新字段，则默认更新非主键的所有字段
-        update_mapping = parse_update_columns(stmt=stmt, cls=cls, kwargs=kwargs)
-        # 添加 ON DUPLICATE KEY UPDATE 部分
-        stmt = stmt.on_duplicate_key_update(**update_mapping)
-        res = self.exec_stmt(stmt)
-        if not res:
+    def bulk_insert(self, cls: Type[T], values: list,
+                    chunk_size: int = None,
+                    return_ids: bool = False) -> BulkResult:
+        """
+        高吞吐批量插入：实体或字典按 chunk_size 分批，每批一次 executemany
+        (SQLAlchemy insertmanyvalues 会合并为多行 INSERT ... VALUES)，不走 ORM 工作单元
+        :param return_ids: 是否返回生成的主键，传入实体时会回填到实体上。
+                           数据库不支持 INSERT ... RETURNING 时（如 MySQL），或主键声明为可空时，缺少主键的批次逐行 INSERT 获取生成的主键
+        """
+        _chunk_size = chunk_size or self.config.bulk_chunk_size
+        result = BulkResult(ids=[] if return_ids else None)
+        if not values:
+            return result
+        meta = get_column_meta(cls)
+        pk = meta.column_map[meta.primary_key[0]] if len(meta.primary_key) == 1 else None
+        start = time.perf_counter()
+        with self.get_session() as session:
+            try:
+                dialect = session.get_bind().dialect
+                for i in range(0, len(values), _chunk_size):
+                    chunk = values[i:i + _chunk_size]
+                    rows = [to_row(cls, v) for v in chunk]
+                    if not return_ids or pk is None:
+                        session.execute(insert(cls), rows)
+                    elif dialect.insert_executemany_returning and not pk.nullable:
+                        # 按参数顺序返回主键需要主键列为哨兵列（非空）
+                        ids = session.execute(insert(cls).returning(pk, sort_by_parameter_order=True), rows).scalars().all()
+                        self._fill_ids(chunk, ids, pk.key, result)
+                    elif all(row.get(pk.key) is not None for row in rows):
+                        session.execute(insert(cls), rows)
+                        result.ids.extend(row[pk.key] for row in rows)
+                    else:
+                        # 无 RETURNING（如 MySQL）或主键声明为可空（不能作为哨兵列），只能逐行获取生成的主键
+                        ids = [session.execute(insert(cls).values(row)).inserted_primary_key[0] for row in rows]
+                        self._fill_ids(chunk, ids, pk.key, result)
+                    result.rows += len(rows)
+                    result.chunks += 1
+                session.commit()
+                self._invalidate(cls)
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Failed to bulk insert {cls.__name__}: {e}")
+                raise e
+        result.elapsed = time.perf_counter() - start
+        logger.info(f"Bulk insert {cls.__name__}: {result.rows} rows / {result.chunks} chunks "
+                    f"in {result.elapsed:.3f}s ({result.rows_per_sec:.0f} rows/s)")
+        return result
+
+    @staticmethod
+    def _fill_ids(chunk: list, ids: list, key: str, result: BulkResult):
+        for value, _id in zip(chunk, ids):
+            if isinstance(value, dict):
+                value[key] = _id
+            else:
+                setattr(value, key, _id)
+        result.ids.extend(ids)
+
+    def upsert(self, cls: Type[T], values: list, chunk_size: int = None, **kwargs) -> BulkResult:
+        """
+        批量 upsert，按方言生成语句（见 build_upsert），按字段集合分组、按 chunk_size 分批，在同一事务中执行
+        :param update_columns: 冲突时更新的字段，默认非主键、非唯一列
+        :param exclude_columns: 冲突时不更新的字段
+        :param conflict_columns: PostgreSQL / SQLite 的冲突判定列，默认主键
+        :return: affected 为各批语句的受影响行数（MySQL 中被更新的行计为 2），rows 为其合计，chunks 为语句数
+        """
+        if not values:
+            return BulkResult(affected=[])
+        plan = UpsertPlan(cls, self.get_dialect(), values, chunk_size or self.config.bulk_chunk_size, kwargs)
+        with self.begin() as conn:
+            if plan.partial:
+                conn.exec_driver_sql('SET enable_unique_key_partial_update = true')
+            try:
+                for chunk, stmt in plan.statements():
+                    plan.add(chunk, conn.execute(stmt).rowcount)
+            finally:
+                if plan.partial:
+                    conn.exec_driver_sql('SET enable_unique_key_partial_update = false')
+        self._invalidate(cls)
+        return plan.finish()
+
+    def bulk_update(self, cls: Type[T], values: list, chunk_size: int = None) -> BulkResult:
+        """
+        update_by_id 的批量版本：各行的变更字段（见 dirty_row）按列集合分组，
+        同一列集合的行按 chunk_size 分批，每批一次 executemany UPDATE ... SET <列> WHERE id = ?，不加载对象
+        Doris 的每条 UPDATE 都是一次导入事务，改为按列集合分组的部分列 upsert；部分列 upsert 会插入不存在的主键
+        （缺少 NOT NULL 列时整批导入失败），因此先查询已存在的主键，只写入这些行
+        :return: rows 为实际更新的行数，affected 为各批语句的受影响行数
+        """
+        _chunk_size = chunk_size or self.config.bulk_chunk_size
+        result = BulkResult(affected=[])
+        if not values:
+            return result
+        meta = get_column_meta(cls)
+        groups = {}
+        for value in values:
+            row = dirty_row(cls, value)
+            if any(row.get(key) is None for key in meta.primary_key):
+                raise ValueError(f"按主键批量更新 {cls.__name__} 缺少主键: {row}")
+            if len(row) > len(meta.primary_key):
+                groups.setdefault(tuple(sorted(row)), []).append((value, row))
+        start = time.perf_counter()
+        if self.get_dialect() == 'doris':
+            existing = self.select_existing_ids(cls, [row['id'] for items in groups.values() for _, row in items])
+            for keys, items in groups.items():
+                rows = [row for _, row in items if row['id'] in existing]
+                if not rows:
+                    continue
+                upserted = self.upsert(cls, rows, chunk_size=_chunk_size,
+                                       update_columns=[key for key in keys if key not in meta.primary_key])
+                result.rows += upserted.rows
+                result.chunks += upserted.chunks
+                result.affected.extend(upserted.affected)
+        else:
+            # WHERE 中的主键参数加前缀，避免与 SET 的列参数同名
+            where = [meta.column_map[k] == bindparam(f'_pk_{k}') for k in meta.primary_key]
+            with self.begin() as conn:
+                for keys, items in groups.items():
+                    stmt = sa_update(cls).where(*where).values(
+                        {k: bindparam(k) for k in keys if k not in meta.primary_key})
+                    for i in range(0, len(items), _chunk_size):
+                        params = [{f'_pk_{k}' if k in meta.primary_key else k: v for k, v in row.items()}
+                                  for _, row in items[i:i + _chunk_size]]
+                        rowcount = conn.execute(stmt, params).rowcount
+                        result.affected.append(rowcount)
+                        result.rows += max(rowcount, 0)
+                        result.chunks += 1
+            self._invalidate(cls)
+        for value, row in (item for items in groups.values() for item in items):
+            mark_clean(value, row)
+        result.elapsed = time.perf_counter() - start
+        logger.info(f"Bulk update {cls.__name__}: {result.rows} rows / {result.chunks} chunks "
+                    f"in {result.elapsed:.3f}s ({result.rows_per_sec:.0f} rows/s)")
+        return result
+
+    def select_existing_ids(self, cls: Type[T], ids: Iterable, chunk_size: int = None) -> set:
+        """
+        返回 ids 中已存在的主键，按 chunk_size 分批 SELECT id ... WHERE id IN (...)，只查主键列
+        用于写入前判断新增/更新，始终走主库（工作单元中复用其连接）
+        """
+        _ids = list(dict.fromkeys(eid for eid in ids if eid is not None))
+        if not _ids:
+            return set()
+        _chunk_size = chunk_size or self.config.in_chunk_size
+        existing = set()
+        with self.begin() as conn:
+            for i in range(0, len(_ids), _chunk_size):
+                existing.update(conn.execute(select(cls.id).where(cls.id.in_(_ids[i:i + _chunk_size]))).scalars())
+        return existing
+
+    def update(self, entity: T, *args, orm: bool = False, **kwargs) -> int:
+        """
+        按条件更新：默认一条 UPDATE ... SET <entity 非空字段> WHERE <条件>，返回实际影响行数
+        :param orm: 为 True 时逐条加载 ORM 对象并修改，用于需要触发对象事件的场景
+        """
+        if orm:
+            return self._update_orm(entity, *args, **kwargs)
+        cls: Type[T] = type(entity)
+        meta = get_column_meta(cls)
+        values = {k: v for k, v in to_row(cls, entity).items() if k not in meta.primary_key}
+        if not values:
             return 0
-        return res.rowcount
+        stmt = sa_update(cls).values(**values).execution_options(synchronize_session=False)
+        filters = parse_filters(cls=cls, args=args, kwargs=kwargs)
+        if filters:
+            stmt = stmt.where(and_(*filters))
+        with self.get_session() as session:
+            try:
+                result = session.execute(stmt)
+                session.commit()
+                self._invalidate(cls)
+                return result.rowcount
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Failed to update entity: {e}")
+                raise e
 
-    def update(self, entity: T, *args, **kwargs) -> int:
+    def _update_orm(self, entity: T, *args, **kwargs) -> int:
         with self.get_session() as session:
             try:
                 cls: Type[T] = type(entity)
@@ -294,6 +1058,7 @@ class DbEngine:
 
                 # 提交事务 即保存到数据库
                 session.commit()
+                self._invalidate(cls)
                 # 假设所有查询到的记录都被更新了，返回记录数
                 return len(records)
             except Exception as e:
@@ -303,37 +1068,42 @@ class DbEngine:
             finally:
                 session.close()
 
-    def update_by_id(self, entity: T) -> int:
+    def update_by_id(self, entity: T | dict, cls: Type[T] = None) -> int:
+        """
+        按主键直接 UPDATE ... SET <变更字段> WHERE 主键，不先查询整行，只写入变更的字段（见 dirty_row）
+        没有变更字段时只判断该主键是否存在
+        :param entity: 实体，或 {字段: 值} 字典（需传入 cls）
+        :return: 影响行数，主键不存在时为 0
+        """
+        cls: Type[T] = cls or type(entity)
+        row = dirty_row(cls, entity)
+        stmt = build_update_by_id(cls, row)
+        if len(row) == len(get_column_meta(cls).primary_key):
+            with self.begin() as conn:
+                return 1 if conn.execute(build_exists_by_id(cls, row)).first() else 0
         with self.get_session() as session:
             try:
-                cls: Type[T] = type(entity)
-                eid: int = entity.id
-                record = session.query(cls).filter(cls.id == eid).one_or_none()
-                if record is None:
-                    logger.warning(f"没有找到ID为 {eid} 的记录")
-                    return 0
-                update_attr(entity, record)
-                # 提交事务 即保存到数据库
-                session.flush()
+                result = session.execute(stmt)
                 session.commit()
-                return 1
+                self._invalidate(cls)
             except Exception as e:
                 session.rollback()
                 logger.error(f"Failed to update entity by ID: {e}")
-                # return 0
                 raise e
-            finally:
-                # 确保会话被关闭
-                session.close()
+        if result.rowcount == 0:
+            logger.warning(f"没有找到主键为 {primary_key_value(cls, row)} 的记录")
+        else:
+            mark_clean(entity, row)
+        return result.rowcount
 
     def select_by_id(self, cls: Type[T], eid: int, **kwargs) -> Optional[T]:
-        with self.get_session() as session:
+        with self.read_session() as session:
             try:
                 query = session.query(cls)
                 query = _wrapper_query(query=query, cls=cls, **kwargs)
                 result = query.filter(cls.id == eid).one_or_none()
                 if result:
-                    return _wrapper_query_result(result, cls, **kwargs)
+                    return build_entities(result, cls, **kwargs)
                 return None
             except Exception as e:
                 logger.error(f"Failed to query entity by ID: {e}")
@@ -342,18 +1112,38 @@ class DbEngine:
                 # 确保会话被关闭
                 session.close()
 
+    def select_by_ids(self, cls: Type[T], ids: Iterable, chunk_size: int = None, **kwargs) -> List[Optional[T]]:
+        """
+        按主键批量查询，去重后按 chunk_size 分批 IN (...)，各批在同一连接上执行
+        返回与 ids 顺序一致的列表，不存在的 id 对应 None，重复的 id 对应同一个实体
+        :param chunk_size: 每批 id 数，默认 EngineConfig.in_chunk_size
+        """
+        plan = ByIdsPlan(cls, ids, chunk_size or self.config.in_chunk_size, kwargs, self.stmt_cache)
+        with self.read_session() as session:
+            try:
+                for stmt, params in plan.statements():
+                    plan.add(session.execute(stmt, params).all())
+            except Exception as e:
+                logger.error(f"Failed to query entities by IDs: {e}")
+                raise e
+        return plan.result()
+
     def select_one(self, cls: Type[T], *args, **kwargs) -> Optional[T]:
         """
         查询条数
         """
-        with self.get_session() as session:
+        _cached_stmt = self.stmt_cache.lookup(cls, args, kwargs, limit=1)
+        with self.read_session() as session:
             try:
-                query = session.query(cls)
-                query = _wrapper_query(query=query, cls=cls, args=args, **kwargs)
-                query = query.limit(1)  # 添加限制条件 limit(1)
-                result = query.one_or_none()
+                if _cached_stmt is not None:
+                    result = session.execute(*_cached_stmt).first()
+                else:
+                    query = session.query(cls)
+                    query = _wrapper_query(query=query, cls=cls, args=args, **kwargs)
+                    query = query.limit(1)  # 添加限制条件 limit(1)
+                    result = query.one_or_none()
                 if result:
-                    return _wrapper_query_result(result, cls, **kwargs)
+                    return build_entities(result, cls, **kwargs)
                 return None
             except Exception as e:
                 logger.error(f"Failed to Select One: {e}")
@@ -362,11 +1152,19 @@ class DbEngine:
     def select_count(self, cls: Type[T], *args, **kwargs) -> int:
         """
         查询条数
+        :param cache_ttl: 大于 0 时结果缓存 cache_ttl 秒，写该表时失效
         """
-        with self.get_session() as session:
+        _cache_ttl = kwargs.pop('cache_ttl') if 'cache_ttl' in kwargs.keys() else None
+        if _cache_ttl:
+            stmt = select(func.count()).select_from(cls)
+            filters = parse_filters(cls=cls, args=args, kwargs=kwargs, soft_delete=True)
+            if filters:
+                stmt = stmt.where(and_(*filters))
+            return self._cached(cls, 'count', stmt, _cache_ttl, lambda: self.select_count(cls, *args, **kwargs))
+        with self.read_session() as session:
             try:
                 query = session.query(cls)
-                filters = parse_filters(cls=cls, args=args, kwargs=kwargs)
+                filters = parse_filters(cls=cls, args=args, kwargs=kwargs, soft_delete=True)
                 if filters:
                     query = query.filter(and_(*filters))
                 return query.count()
@@ -377,53 +1175,140 @@ class DbEngine:
                 session.close()
 
     def select_list(self, cls: Type[T], *args, **kwargs) -> List[T]:
-        with self.get_session() as session:
+        """
+        列表查询
+        :param cache_ttl: 大于 0 时结果缓存 cache_ttl 秒，写该表时失效
+        """
+        _cache_ttl = kwargs.pop('cache_ttl') if 'cache_ttl' in kwargs.keys() else None
+        if _cache_ttl:
+            stmt = build_select(cls=cls, args=args, **kwargs)
+            return self._cached(cls, 'list', stmt, _cache_ttl, lambda: self.select_list(cls, *args, **kwargs),
+                                bool(kwargs.get('as_rows')))
+        _cached_stmt = self.stmt_cache.lookup(cls, args, kwargs)
+        with self.read_session() as session:
             try:
-                query = session.query(cls)
-                query = _wrapper_query(query=query, cls=cls, args=args, **kwargs)
-                results = query.all()
-                return _wrapper_query_result(results, cls, **kwargs)
+                if _cached_stmt is not None:
+                    results = session.execute(*_cached_stmt).all()
+                else:
+                    query = session.query(cls)
+                    query = _wrapper_query(query=query, cls=cls, args=args, **kwargs)
+                    results = query.all()
+                return build_entities(results, cls, **kwargs)
             except Exception as e:
                 logger.error(f"Failed to query entities: {e}")
                 raise e
 
-    def page(self, cls: Type[T], *args, **kwargs) -> Page[T]:
+    def iter_list(self, cls: Type[T], *args, batch_size: int = None, **kwargs) -> Iterator[T]:
         """
-        分页查询
+        流式查询，使用服务端游标按批拉取，内存占用与结果集大小无关
+        会话只在迭代期间保持打开，迭代结束（或生成器被关闭）后释放连接
         """
-        with self.get_session() as session:
+        _batch_size = batch_size or self.config.stream_batch_size
+        with self.read_session() as session:
             try:
-
-                # 指定表
                 query = session.query(cls)
-                # 构建查询条件
-                filters = parse_filters(cls=cls, args=args, kwargs=kwargs)
-                if filters:
-                    query = query.filter(and_(*filters))
-                # 总数
-                total = query.count()
+                query = _wrapper_query(query=query, cls=cls, args=args, **kwargs)
+                query = query.execution_options(stream_results=True, yield_per=_batch_size)
+                _set_entity = entity_builder(cls, **kwargs)
+                for row in query:
+                    yield _set_entity(row)
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to iter entities: {e}")
+                raise e
 
-                # 分页参数
-                page_num = kwargs.pop('page_num') if 'page_num' in kwargs.keys() else 1
-                page_size = kwargs.pop('page_size') if 'page_size' in kwargs.keys() else 10
-                total_pages: int = (total + page_size - 1) // page_size
+    def page(self, cls: Type[T], *args, **kwargs) -> Page[T]:
+        """
+        分页查询
+        传入 cursor 或 keyset=True 时使用游标分页，不执行 COUNT，也不使用 OFFSET
+        :param cache_ttl: 大于 0 时结果缓存 cache_ttl 秒，写该表时失效
+        :param count: 总数的计算方式
+            exact: 精确 COUNT（默认）
+            none: 不计算总数，多取一行判断 has_next
+            cached: 精确 COUNT，结果缓存 count_ttl 秒
+            estimate: 无过滤条件时读取表统计信息（近似值），有过滤条件时退化为 exact
+            window: 在数据查询中附带 COUNT(*) OVER()，一次往返同时返回总数
+        :param count_ttl: count=cached 时总数的缓存时间(秒)，默认 60
+        :param parallel: 为 True 时 COUNT 与数据查询在两个连接上并行执行（此时不再按总数修正页码）
+        """
+        _cache_ttl = kwargs.pop('cache_ttl') if 'cache_ttl' in kwargs.keys() else None
+        if _cache_ttl:
+            stmt = build_select(cls=cls, args=args, **kwargs)
+            extra = tuple(kwargs.get(k) for k in ('page_num', 'page_size', 'cursor', 'keyset', 'count', 'as_rows'))
+            return self._cached(cls, 'page', stmt, _cache_ttl, lambda: self.page(cls, *args, **kwargs), *extra)
+        _seek, _cursor = PagePlan.pop_seek(kwargs)
+        if _seek:
+            return self.seek_page(cls, *args, cursor=_cursor, **kwargs)
+        plan = PagePlan(kwargs)
+        build = entity_builder(cls, **kwargs)
+        if plan.count == 'none':
+            return plan.to_page(self._page_rows(cls, args, kwargs, plan), None, build)
+        if plan.count == 'window':
+            results = self._page_rows(cls, args, kwargs, plan)
+            total = plan.window_total(results)
+            if total is None:
+                total = self.select_count(cls, *args, **kwargs)
+            return plan.to_page(results, total, build)
+        # 工作单元的会话不能跨线程共用，此时顺序执行
+        if plan.parallel and current_uow() is None:
+            future = self._get_executor().submit(contextvars.copy_context().run,
+                                                 plan.count_total, self, cls, args, kwargs)
+            results = self._page_rows(cls, args, kwargs, plan)
+            total = future.result()
+        else:
+            total = plan.count_total(self, cls, args, kwargs)
+            plan.fit(total)
+            results = self._page_rows(cls, args, kwargs, plan)
+        return plan.to_page(results, total, build)
 
-                # 确保页码在有效范围内
-                page_num = max(1, min(page_num, total_pages))
+    def _page_rows(self, cls: Type[T], args: tuple, kwargs: dict, plan: PagePlan) -> list:
+        with self.read_session() as session:
+            try:
+                return session.execute(plan.apply(build_select(cls=cls, args=args, **kwargs))).all()
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to query entities: {e}")
+                raise e
 
-                # 计算分页查询的偏移量
-                offset = (page_num - 1) * page_size
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.config.pool_size,
+                                                        thread_name_prefix=f'{self.name}-page')
+        return self._executor
 
-                query = _wrapper_query(query=query, cls=cls, **kwargs)
+    def estimate_count(self, cls: Type[T], *args, **kwargs) -> int:
+        """
+        从表统计信息读取近似行数（MySQL/Doris: information_schema.TABLES，PostgreSQL: pg_class.reltuples）
+        有过滤条件（含逻辑删除实体的 未删除 条件）、数据库不支持或统计信息缺失时返回精确 COUNT
+        """
+        estimate = build_estimate(cls, self.get_engine().dialect.name, args, kwargs)
+        if estimate is None:
+            return self.select_count(cls, *args, **kwargs)
+        with self.read_session() as session:
+            try:
+                value = session.execute(*estimate).scalar()
+            except SQLAlchemyError as e:
+                logger.warning(f"Failed to estimate count of {cls.__table__.name}: {e}")
+                value = None
+        if value is None or value < 0:
+            return self.select_count(cls, *args, **kwargs)
+        return int(value)
 
-                results = query.offset(offset).limit(page_size).all()
-                instances = []
-                if results:
-                    instances = _wrapper_query_result(results, cls, **kwargs)
-                return Page(total=total, pages=total_pages, page_num=page_num, page_size=page_size, records=instances)
+    def seek_page(self, cls: Type[T], *args, cursor: str = None, **kwargs) -> Page[T]:
+        """
+        游标分页(keyset)：按 order_by 字段 + 主键定位，第 N 页与第 1 页代价相同
+        返回的 total 为 None，通过 next_cursor / prev_cursor 翻页
+        """
+        plan = keyset.SeekPlan(cls, cursor, kwargs)
+        with self.read_session() as session:
+            try:
+                query = session.query(cls)
+                query = _wrapper_query(query=query, cls=cls, args=args, **kwargs)
+                results = plan.apply(query).all()
             except SQLAlchemyError as e:
-                logger.error(f"Failed to query entities: {e}")
+                logger.error(f"Failed to seek entities: {e}")
                 raise e
+        return plan.to_page(results, entity_builder(cls, **kwargs))
 
     def remove_by_id(self, cls: Type[T], eid: int) -> int:
         with self.get_session() as session:
@@ -435,6 +1320,7 @@ class DbEngine:
                 session.delete(record)
                 # 提交事务 即保存到数据库
                 session.commit()
+                self._invalidate(cls)
                 return 1
             except Exception as e:
                 session.rollback()
@@ -442,33 +1328,105 @@ class DbEngine:
                 logger.warning(f"Failed Remove By ID: {str(e)} \n {error}")
                 return 0
 
-    def remove_by_args(self, cls: Type[T], *args, **kwargs) -> int:
+    def remove_by_args(self, cls: Type[T], *args, orm: bool = False, **kwargs) -> int:
+        """
+        按条件删除：默认一条 DELETE ... WHERE <条件>，返回实际删除行数
+        :param orm: 为 True 时加载 ORM 对象后逐个 session.delete，用于需要触发对象事件/级联的场景
+        """
+        # 查询相关的参数对删除没有意义
+        for _key in ('columns', 'exclude_columns', 'order_by', 'asc', 'group_by'):
+            kwargs.pop(_key, None)
+        filters = parse_filters(cls=cls, args=args, kwargs=kwargs)
         with self.get_session() as session:
             try:
-                query = session.query(cls)
-                query = _wrapper_query(query=query, cls=cls, args=args, **kwargs)
-                results = query.all()
-                if results:
-                    for record in results:
-                        # 获取主键
-                        primary_key = getattr(record, 'id')  # 假设主键字段名为 'id'
-                        # 查询实际的 ORM 实例
-                        instance = session.query(cls).get(primary_key)
-                        if instance:
-                            session.delete(instance)
+                if orm:
+                    query = session.query(cls)
+                    if filters:
+                        query = query.filter(and_(*filters))
+                    records = query.all()
+                    for record in records:
+                        session.delete(record)
+                    rowcount = len(records)
+                else:
+                    stmt = sa_delete(cls).execution_options(synchronize_session=False)
+                    if filters:
+                        stmt = stmt.where(and_(*filters))
+                    rowcount = session.execute(stmt).rowcount
                 session.commit()
-                return len(results)
+                self._invalidate(cls)
+                return rowcount
             except Exception as e:
                 session.rollback()
                 error = traceback.format_exc(limit=3)
                 logger.warning(f"Failed Remove By Args: {str(e)} \n {error}")
                 return 0
 
+    def soft_delete(self, cls: Type[T], ids: Iterable = None, *args, chunk_size: int = None, **kwargs) -> int:
+        """
+        逻辑删除：一条 UPDATE ... SET <逻辑删除列> = 1 WHERE <主键 IN ids | 条件> AND <逻辑删除列> = 0，不先查询
+        ids 超过 chunk_size（默认 EngineConfig.in_chunk_size）时分批 IN，各批在同一事务中执行
+        :param ids: 主键列表；为空时按 args / kwargs 条件删除（第一个参数也可直接传条件表达式）
+        :return: 本次新标记为删除的行数（已删除的行不计入）
+        """
+        stmts = build_soft_delete(cls, ids, args, kwargs, chunk_size or self.config.in_chunk_size)
+        if not stmts:
+            return 0
+        rowcount = 0
+        with self.begin() as conn:
+            for _stmt in stmts:
+                rowcount += conn.execute(_stmt).rowcount
+        self._invalidate(cls)
+        logger.debug(f"Soft delete {cls.__name__}: {rowcount} rows")
+        return rowcount
+
+    def purge_deleted(self, cls: Type[T], older_than: float = None, chunk_size: int = None,
+                      max_chunks: int = None, pause: float = 0) -> int:
+        """
+        物理删除已逻辑删除的行：每批先按主键取出至多 chunk_size（默认 EngineConfig.bulk_chunk_size）行，
+        再 DELETE ... WHERE 主键 IN (...)，每批单独提交，单个事务持锁时间与删除总量无关
+        :param older_than: 只删除 update_time（soft_delete 时写入）早于 older_than 秒之前的行，为空时不限
+        :param max_chunks: 本次最多删除的批数，为空时删完为止
+        :param pause: 两批之间的间隔(秒)，降低对线上读写的影响
+        :return: 删除的行数
+        """
+        meta = get_column_meta(cls)
+        if meta.soft_delete is None:
+            raise ValueError(f"{cls.__name__} 没有逻辑删除列")
+        filters = [meta.column_map[meta.soft_delete] == True]  # noqa: E712
+        if older_than is not None:
+            if 'update_time' not in meta.column_map:
+                raise ValueError(f"{cls.__name__} 没有 update_time 列，不能按 older_than 清理")
+            cutoff = datetime.datetime.now() - datetime.timedelta(seconds=older_than)
+            filters.append(meta.column_map['update_time'] < cutoff)
+        _chunk_size = chunk_size or self.config.bulk_chunk_size
+        _pk = meta.column_map[meta.primary_key[0]]
+        probe = select(_pk).where(*filters).order_by(_pk).limit(_chunk_size)
+        start = time.perf_counter()
+        total, chunks = 0, 0
+        while max_chunks is None or chunks < max_chunks:
+            with self.begin() as conn:
+                ids = list(conn.execute(probe).scalars())
+                if ids:
+                    total += conn.execute(sa_delete(cls).where(_pk.in_(ids), *filters)).rowcount
+            if not ids:
+                break
+            chunks += 1
+            logger.debug(f"Purge {cls.__name__} chunk {chunks}: {len(ids)} rows")
+            if len(ids) < _chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+        if total:
+            self._invalidate(cls)
+            logger.info(f"Purge {cls.__name__}: {total} soft-deleted rows / {chunks} chunks "
+                        f"in {time.perf_counter() - start:.3f}s")
+        return total
+
     def fetchone(self, cls: Type[T], *args, **kwargs) -> T:
-        with self.get_session() as session:
+        with self.read_session() as session:
             _result = session.execute(*args, **kwargs).fetchone()
             if _result:
-                _result = _wrapper_query_result(_result, cls)
+                _result = build_entities(_result, cls)
             return _result
 
     def transaction(self, func: Callable):
@@ -476,17 +1434,19 @@ class DbEngine:
             try:
                 _res = func(session)
                 session.commit()
+                self._invalidate()
                 return _res
             except Exception as e:
                 session.rollback()
                 raise e
 
     def exec(self, *args, **kwargs):
+        self._invalidate()
         with self.get_session() as session:
             return session.execute(*args, **kwargs)
 
     def exec_select(self, _colexpr, filters=None):
-        with self.get_session() as session:
+        with self.read_session() as session:
             try:
                 query = session.query(_colexpr)
                 if filters:
@@ -497,8 +1457,10 @@ class DbEngine:
                 return []
 
     def exec_stmt(self, stmt):
-        with self._engine.begin() as conn:
-            return conn.execute(stmt)
+        with self.begin() as conn:
+            result = conn.execute(stmt)
+        self._invalidate_stmt(stmt)
+        return result
 
     def exec_sqls(self, sql_statements: list):
         """
@@ -509,11 +1471,96 @@ class DbEngine:
             for sql in sql_statements:
                 session.execute(text(sql))
             session.commit()
+        self._invalidate()
+
+    def iter_sql(self, sql: str,
+                 cls: Type[T] = dict,
+                 params=None,
+                 batch_size: int = None) -> Iterator[T]:
+        """
+        流式执行SQL，按批从服务端游标拉取结果，逐行返回
+        """
+        _batch_size = batch_size or self.config.stream_batch_size
+        with self.read_session() as session:
+            _result = session.execute(
+                statement=text(sql),
+                params=params,
+                execution_options={'stream_results': True, 'yield_per': _batch_size}
+            )
+            for _rows in _result.partitions():
+                for row in _rows:
+                    yield cls(**row._asdict()) if cls else tuple(row)
+
+    @contextmanager
+    def stream(self, stmt, params=None, batch_size: int = None) -> Iterator[Result]:
+        """
+        服务端游标流式查询，代码块内通过 result.partitions() 按 batch_size 分批读取
+        """
+        _batch_size = batch_size or self.config.stream_batch_size
+        with self.read_session() as session:
+            _result = session.execute(stmt, params,
+                                      execution_options={'stream_results': True, 'yield_per': _batch_size})
+            yield _result.yield_per(_batch_size)
+
+    @staticmethod
+    def _check_export(sql: str | Select, fmt: str):
+        if isinstance(sql, str) and not READ_ONLY_SQL.match(sql):
+            raise ValueError("只能导出查询语句")
+        if fmt is not None and fmt not in _export.FORMATS:
+            raise ValueError(f"不支持的导出格式: {fmt}")
+
+    def export(self, sql: str | Select, sink, fmt: str = None, params=None, batch_size: int = None) -> ExportResult:
+        """
+        将查询结果按批流式导出为 Arrow IPC / Parquet / CSV，内存中只保留一批
+        :param sink: 文件路径（按后缀推断格式）或可写的二进制文件对象
+        :param fmt: arrow / parquet / csv
+        """
+        self._check_export(sql, fmt)
+        return _export.export(self, sql, sink, fmt=fmt, params=params, batch_size=batch_size)
+
+    def export_list(self, cls: Type[T], sink, *args, fmt: str = None, batch_size: int = None, **kwargs) -> ExportResult:
+        """
+        与 select_list 相同的查询条件，结果流式导出，列类型取自实体定义
+        """
+        return self.export(build_select(cls=cls, args=args, **kwargs), sink, fmt=fmt, batch_size=batch_size)
+
+    def iter_export(self, sql: str | Select, fmt: str = 'parquet', params=None, batch_size: int = None) -> Iterator[bytes]:
+        """
+        流式导出为字节块迭代器（每批一块），用于 HTTP 流式下载；参数在调用时校验，而不是开始迭代时
+        """
+        self._check_export(sql, fmt)
+        return _export.iter_export(self, sql, fmt=fmt, params=params, batch_size=batch_size)
+
+    def iter_export_list(self, cls: Type[T], *args, fmt: str = 'parquet', batch_size: int = None,
+                         **kwargs) -> Iterator[bytes]:
+        return self.iter_export(build_select(cls=cls, args=args, **kwargs), fmt=fmt, batch_size=batch_size)
+
+    def fetch_columnar(self, stmt, params=None, batch_size: int = None) -> ColumnarResult:
+        """
+        执行查询并以列式返回：列名 -> NumPy 数组（无 NumPy 时为 array.array / list）
+        按 batch_size 从服务端游标分批拉取，每批按列转置后直接写入数组，不为每行创建 dict
+        含 NULL 的整数列为 float64（NULL 为 NaN）；DECIMAL 列保持 Decimal（object 数组），见 columnar.ColumnBuilder
+        """
+        with self.stream(stmt, params, batch_size) as _result:
+            return from_partitions(list(_result.keys()), _result.partitions())
+
+    def select_columnar(self, cls: Type[T], *args, batch_size: int = None, **kwargs) -> ColumnarResult:
+        """
+        与 select_list 相同的查询条件，结果以列式返回，适合统计分析类的大结果集
+        """
+        return self.fetch_columnar(build_select(cls=cls, args=args, **kwargs), batch_size=batch_size)
 
     def exec_sql(self, sql: str,
                  cls: Type[T] = dict,
                  params=None,
-                 execution_options=None) -> list[T]:
+                 execution_options=None,
+                 columnar: bool = False) -> list[T] | ColumnarResult:
+        """
+        执行 SQL，结果每行转为 cls
+        :param columnar: 为 True 时（只用于查询）以列式返回，见 fetch_columnar
+        """
+        if columnar:
+            return self.fetch_columnar(text(sql), params)
         result_list: List[T] = []
         with self.get_session() as session:
             _result = session.execute(
@@ -521,9 +1568,11 @@ class DbEngine:
                 params=params,
                 execution_options=execution_options
             )
-            _rows = _result.all()
+            _rows = _result.all() if _result.returns_rows else []
             for row in _rows:
                 row_data: T = cls(**row._asdict()) if cls else tuple(row)
                 result_list.append(row_data)
             session.commit()
+        if not READ_ONLY_SQL.match(sql):
+            self._invalidate()
         return result_list
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime
+import decimal
+import importlib
+import io
+import os
+import sys
+import time
+from typing import BinaryIO, Iterator, List, Optional, Sequence
+
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import text, Select
+
+# pyarrow 为可选依赖（pip install hello-py[export]，CSV 导出不需要），首次导出 Arrow / Parquet 时才导入
+pa = None
+pq = None
+
+FORMATS = ('arrow', 'parquet', 'csv')
+_SUFFIXES = {'.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow', '.parquet': 'parquet', '.csv': 'csv'}
+MEDIA_TYPES = {
+    'arrow': 'application/vnd.apache.arrow.file',
+    'parquet': 'application/vnd.apache.parquet',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class ExportResult(BaseModel):
+    """
+    导出结果
+    """
+    format: str
+    rows: int = 0
+    batches: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+
+
+def _load_pyarrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("导出 Arrow / Parquet 需要安装 pyarrow: pip install hello-py[export]") from e
+        pa, pq = pyarrow, pyarrow.parquet
+
+
+def infer_format(path: str, default: str = 'parquet') -> str:
+    return _SUFFIXES.get(os.path.splitext(path)[1].lower(), default)
+
+
+def _arrow_type(sa_type):
+    """
+    SQLAlchemy 列类型 -> Arrow 类型，无法确定时返回 None（按第一批数据推断）
+    """
+    try:
+        python_type = sa_type.python_type
+    except (NotImplementedError, AttributeError):
+        return None
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is decimal.Decimal:
+        precision, scale = getattr(sa_type, 'precision', None), getattr(sa_type, 'scale', None)
+        return pa.decimal128(precision, scale or 0) if precision else pa.decimal128(38, 10)
+    if python_type is str:
+        return pa.string()
+    if python_type is bytes:
+        return pa.binary()
+    if python_type is datetime.datetime:
+        return pa.timestamp('us')
+    if python_type is datetime.date:
+        return pa.date32()
+    if python_type is datetime.time:
+        return pa.time64('us')
+    return None
+
+
+def _infer_type(values: Sequence):
+    _type = pa.array(values).type
+    if pa.types.is_null(_type):
+        # 第一批全为 NULL，无法推断，按字符串导出
+        return pa.string()
+    if pa.types.is_decimal(_type):
+        # 按第一批推断的精度可能容纳不下后续的值
+        return pa.decimal128(38, 10)
+    return _type
+
+
+class _Writer:
+    def write(self, rows: Sequence):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class _ArrowWriter(_Writer):
+    """
+    Arrow IPC 文件 / Parquet：每批转换为一个 RecordBatch（Parquet 为一个 row group）写出
+    Schema 由列类型（select_list 导出）或第一批数据确定
+    """
+
+    def __init__(self, fmt: str, sink: BinaryIO, keys: List[str], types: Optional[list], first_rows: Sequence):
+        columns = list(zip(*first_rows)) if first_rows else [() for _ in keys]
+        fields = []
+        for i, key in enumerate(keys):
+            _type = _arrow_type(types[i]) if types else None
+            if _type is None:
+                _type = _infer_type(columns[i]) if first_rows else pa.string()
+            fields.append(pa.field(key, _type))
+        self.schema = pa.schema(fields)
+        if fmt == 'parquet':
+            self._writer = pq.ParquetWriter(sink, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(sink, self.schema)
+
+    def _array(self, values: Sequence, field):
+        try:
+            return pa.array(values, type=field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if pa.types.is_string(field.type):
+                return pa.array([None if v is None else str(v) for v in values], type=field.type)
+            return pa.array(values).cast(field.type)
+
+    def write(self, rows: Sequence):
+        columns = list(zip(*rows))
+        arrays = [self._array(values, field) for values, field in zip(columns, self.schema)]
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class _CsvWriter(_Writer):
+    """
+    CSV：不依赖 pyarrow，首行为列名，NULL 写为空值
+    """
+
+    def __init__(self, sink: BinaryIO, keys: List[str]):
+        self._text = io.TextIOWrapper(sink, encoding='utf-8', newline='', write_through=True)
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(keys)
+
+    def write(self, rows: Sequence):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._text.flush()
+        # 不关闭底层 sink，由调用方负责
+        self._text.detach()
+
+
+def open_writer(fmt: str, sink: BinaryIO, keys: List[str], types: Optional[list] = None,
+                first_rows: Sequence = ()) -> _Writer:
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}，可选 {FORMATS}")
+    if fmt == 'csv':
+        return _CsvWriter(sink, keys)
+    _load_pyarrow()
+    return _ArrowWriter(fmt, sink, keys, types, first_rows)
+
+
+def _statement(query):
+    if isinstance(query, str):
+        return text(query), None
+    types = [column.type for column in query.selected_columns] if isinstance(query, Select) else None
+    return query, types
+
+
+def _write_batches(engine, query, fmt: str, sink: BinaryIO, result: ExportResult,
+                   params=None, batch_size: int = None) -> Iterator[None]:
+    """
+    逐批写出，每写完一批（以及结束时）产出一次，调用方可在此时取走已写出的数据
+    """
+    stmt, types = _statement(query)
+    start = time.perf_counter()
+    writer = None
+    with engine.stream(stmt, params=params, batch_size=batch_size) as _result:
+        keys = list(_result.keys())
+        for rows in _result.partitions():
+            if writer is None:
+                writer = open_writer(fmt, sink, keys, types, rows)
+            writer.write(rows)
+            result.rows += len(rows)
+            result.batches += 1
+            yield
+        if writer is None:
+            # 空结果也输出只有表头 / Schema 的文件
+            writer = open_writer(fmt, sink, keys, types)
+    writer.close()
+    result.elapsed = time.perf_counter() - start
+    yield
+
+
+class _CountingSink(io.RawIOBase):
+    """
+    包装目标文件，统计写出的字节数
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        n = self.raw.write(data)
+        self.bytes += len(data)
+        return len(data) if n is None else n
+
+    def flush(self):
+        self.raw.flush()
+
+
+class _BufferSink(io.RawIOBase):
+    """
+    HTTP 流式下载：写出的数据先缓存，每批结束后取走发送
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+def export(engine, query, sink: str | BinaryIO, fmt: str = None, params=None, batch_size: int = None) -> ExportResult:
+    """
+    流式导出查询结果，每次只在内存中保留一批（batch_size 行）
+    :param engine: DbEngine
+    :param query: SQL 文本或 select 语句
+    :param sink: 文件路径或可写的二进制文件对象
+    :param fmt: arrow / parquet / csv，为空时按文件后缀推断
+    """
+    fmt = fmt or (infer_format(sink) if isinstance(sink, str) else 'parquet')
+    if isinstance(sink, str):
+        with open(sink, 'wb') as f:
+            return export(engine, query, f, fmt, params, batch_size)
+    counting = _CountingSink(sink)
+    result = ExportResult(format=fmt)
+    for _ in _write_batches(engine, query, fmt, counting, result, params, batch_size):
+        pass
+    result.bytes = counting.bytes
+    logger.info(f"Export {result.rows} rows / {result.batches} batches as {fmt}: "
+                f"{result.bytes} bytes in {result.elapsed:.3f}s")
+    return result
+
+
+def iter_export(engine, query, fmt: str = 'parquet', params=None, batch_size: int = None) -> Iterator[bytes]:
+    """
+    流式导出为字节块的迭代器，每批一块，用于 HTTP 流式下载（StreamingResponse）
+    """
+    sink = _BufferSink()
+    result = ExportResult(format=fmt)
+    for _ in _write_batches(engine, query, fmt, sink, result, params, batch_size):
+        data = sink.drain()
+        if data:
+            yield data
+    logger.info(f"Export {result.rows} rows / {result.batches} batches as {fmt} in {result.elapsed:.3f}s")
+
+
+def main(argv: List[str] = None):
+    """
+    命令行导出：
+        python -m org.dao.export --engine doris --sql "SELECT * FROM file" --output file.parquet
+    """
+    parser = argparse.ArgumentParser(description='流式导出查询结果为 Arrow IPC / Parquet / CSV 文件')
+    parser.add_argument('--engine', default='doris', help='数据库引擎名（mysql / pgsql / doris）')
+    parser.add_argument('--sql', required=True, help='查询 SQL')
+    parser.add_argument('--output', '-o', required=True, help='输出文件，- 表示标准输出')
+    parser.add_argument('--format', '-f', choices=FORMATS, default=None, help='导出格式，默认按输出文件后缀推断')
+    parser.add_argument('--batch-size', type=int, default=None, help='每批行数，默认 EngineConfig.stream_batch_size')
+    args = parser.parse_args(argv)
+
+    from .registry import registry
+    # 导入引擎模块以登记引擎（如 org.dao.doris）
+    importlib.import_module(f'{__package__}.{args.engine.split("_")[0]}')
+    engine = registry.get(args.engine)
+    if args.output == '-':
+        result = export(engine, args.sql, sys.stdout.buffer, args.format or 'csv', batch_size=args.batch_size)
+    else:
+        result = export(engine, args.sql, args.output, args.format, batch_size=args.batch_size)
+    print(result.model_dump_json(), file=sys.stderr)
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
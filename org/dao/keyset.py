@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from typing import Type, Sequence, List, Tuple, Callable
+
+from sqlalchemy import and_, or_, asc, desc
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from . import T, Page
+from .columns import get_column_meta
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'$d': value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {'$dec': str(value)}
+    raise TypeError(f"游标不支持的字段类型: {type(value).__name__}")
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if '$dt' in value:
+            return datetime.datetime.fromisoformat(value['$dt'])
+        if '$d' in value:
+            return datetime.date.fromisoformat(value['$d'])
+        if '$dec' in value:
+            return decimal.Decimal(value['$dec'])
+    return value
+
+
+def encode_cursor(keys: Sequence[str], values: Sequence, backward: bool = False) -> str:
+    """
+    将排序字段的值编码为不透明游标
+    :param keys: 排序字段（最后一个为主键）
+    :param values: 排序字段对应的值
+    :param backward: 是否向前翻页
+    """
+    payload = {'k': list(keys), 'v': list(values), 'b': backward}
+    raw = json.dumps(payload, default=_encode_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[List[str], list, bool]:
+    """
+    解析游标，返回 (排序字段, 字段值, 是否向前翻页)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        keys, values = payload['k'], [_decode_value(v) for v in payload['v']]
+        backward = bool(payload.get('b', False))
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    if len(keys) != len(values):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return keys, values, backward
+
+
+def parse_order_keys(cls: Type[T], order_by=None) -> List[str]:
+    """
+    解析 order_by 为字段名列表，并追加主键作为唯一排序依据
+    """
+    meta = get_column_meta(cls)
+    if order_by is None:
+        _order_by = []
+    elif isinstance(order_by, (list, tuple)):
+        _order_by = list(order_by)
+    else:
+        _order_by = [order_by]
+    keys = []
+    for item in _order_by:
+        if isinstance(item, InstrumentedAttribute):
+            item = item.key
+        if not isinstance(item, str) or item not in meta.column_map:
+            raise ValueError(f"游标分页只支持按 {cls.__name__} 的字段排序: {item}")
+        if item not in keys:
+            keys.append(item)
+    for pk in meta.primary_key:
+        if pk not in keys:
+            keys.append(pk)
+    return keys
+
+
+def seek_filter(columns: Sequence, values: Sequence, ascending: bool):
+    """
+    构建 (c1, c2, ...) > (v1, v2, ...) 的展开条件，兼容不支持行值比较的数据库
+    """
+    clauses = []
+    for i, (col, value) in enumerate(zip(columns, values)):
+        _eq = [columns[j] == values[j] for j in range(i)]
+        _cmp = col > value if ascending else col < value
+        clauses.append(and_(*_eq, _cmp))
+    return or_(*clauses)
+
+
+def seek_order(columns: Sequence, ascending: bool) -> list:
+    return [asc(col) if ascending else desc(col) for col in columns]
+
+
+class SeekPlan:
+    """
+    一次游标分页的执行计划，同步/异步引擎共用
+    构造时会从 kwargs 中取出分页与排序参数，并保证排序字段在查询列中
+    """
+
+    def __init__(self, cls: Type[T], cursor: str = None, kwargs: dict = None):
+        kwargs.pop('page_num', None)
+        self.page_size = kwargs.pop('page_size') if 'page_size' in kwargs.keys() else 10
+        _order_by = kwargs.pop('order_by') if 'order_by' in kwargs.keys() else None
+        _is_asc = kwargs.pop('asc') if 'asc' in kwargs.keys() else False
+        self.cursor = cursor
+        self.order_keys = parse_order_keys(cls, _order_by)
+        self.backward = False
+        self.values = None
+        if cursor:
+            _keys, self.values, self.backward = decode_cursor(cursor)
+            if _keys != self.order_keys:
+                raise ValueError(f"分页游标与排序字段不一致: {_keys} != {self.order_keys}")
+        # 排序字段必须在查询列中，用于生成下一页游标
+        if kwargs.get('columns'):
+            kwargs['columns'] = list(kwargs['columns']) + [k for k in self.order_keys if k not in kwargs['columns']]
+        if kwargs.get('exclude_columns'):
+            kwargs['exclude_columns'] = [c for c in kwargs['exclude_columns'] if c not in self.order_keys]
+        meta = get_column_meta(cls)
+        self.order_columns = [meta.column_map[k] for k in self.order_keys]
+        # 向前翻页时反转排序方向，查询后再反转结果
+        self.ascending = (_is_asc is True) != self.backward
+
+    def apply(self, query):
+        if self.values is not None:
+            query = query.filter(seek_filter(self.order_columns, self.values, self.ascending))
+        query = query.order_by(*seek_order(self.order_columns, self.ascending))
+        return query.limit(self.page_size + 1)
+
+    def to_page(self, results: list, build: Callable) -> Page:
+        has_more = len(results) > self.page_size
+        results = list(results[:self.page_size])
+        if self.backward:
+            results.reverse()
+        instances = [build(row) for row in results]
+        # 向前翻页时后面一定还有数据；向后翻页时只要带了游标，前面就有数据
+        has_next, has_prev = (True, has_more) if self.backward else (has_more, bool(self.cursor))
+        next_cursor = prev_cursor = None
+        if instances and has_next:
+            next_cursor = encode_cursor(self.order_keys, [getattr(instances[-1], k) for k in self.order_keys])
+        if instances and has_prev:
+            prev_cursor = encode_cursor(self.order_keys, [getattr(instances[0], k) for k in self.order_keys],
+                                        backward=True)
+        return Page(total=None, page_size=self.page_size, records=instances,
+                    next_cursor=next_cursor, prev_cursor=prev_cursor, has_next=has_next)
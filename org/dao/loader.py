@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+
+
+class _Batch:
+    def __init__(self):
+        # key -> None，保持加入顺序并去重
+        self.keys: Dict[Hashable, None] = {}
+        self.results: Dict[Hashable, Any] = {}
+        self.error: Optional[BaseException] = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class BatchLoader:
+    """
+    合并多个线程并发的单 key 查询为一次批量查询（DataLoader 风格）
+    第一个到达的调用作为 leader，等待 window 秒或攒满 max_batch 个 key 后执行批量函数，
+    期间其他线程的调用加入同一批次并等待结果，相同的 key 只查询一次
+    批量函数在空的上下文中执行，不继承 leader 的工作单元、主库固定等上下文状态
+    :param batch_fn: keys -> 与 keys 顺序一致的结果列表
+    :param window: 合并等待时间(秒)，越大合并越多，单次调用的延迟也越高
+    :param max_batch: 单批最多的 key 数
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Sequence], window: float = 0.002, max_batch: int = 500):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch = max_batch
+        self._batch: Optional[_Batch] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.batches = 0
+
+    def load(self, key: Hashable) -> Any:
+        with self._lock:
+            self.loads += 1
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch:
+                self._batch = None
+                batch.full.set()
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._dispatch(batch)
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(key)
+
+    def _dispatch(self, batch: _Batch):
+        keys = list(batch.keys)
+        try:
+            batch.results = dict(zip(keys, contextvars.Context().run(self.batch_fn, keys)))
+        except BaseException as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                self.batches += 1
+            batch.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'loads': self.loads, 'batches': self.batches,
+                    'avg_batch': self.loads / self.batches if self.batches else 0.0}
+
+
+class AsyncBatchLoader:
+    """
+    协程版：同一事件循环 tick 内发起的 load 合并为一次批量查询，不额外等待
+    asyncio.gather 并发的查询、或同一时刻处理的多个请求中的查询都会被合并
+    :param batch_fn: keys -> 与 keys 顺序一致的结果列表（协程函数）
+    :param max_batch: 单批最多的 key 数，超出时立即执行当前批次
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Awaitable[Sequence]], max_batch: int = 500):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._tasks: set = set()
+        self.loads = 0
+        self.batches = 0
+
+    async def load(self, key: Hashable) -> Any:
+        self.loads += 1
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch:
+                self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: Dict[Hashable, asyncio.Future]):
+        self.batches += 1
+        keys = list(pending)
+        try:
+            results = await self.batch_fn(keys)
+            if len(results) != len(keys):
+                raise ValueError(f"批量加载返回 {len(results)} 个结果，与 {len(keys)} 个 key 不一致")
+        except Exception as e:
+            self._fail(pending, e)
+            return
+        except BaseException as e:
+            # 任务被取消等：同样要唤醒所有等待者，否则 load 永远挂起；再抛出让取消继续传播
+            self._fail(pending, e)
+            raise
+        for key, result in zip(keys, results):
+            if not pending[key].done():
+                pending[key].set_result(result)
+
+    @staticmethod
+    def _fail(pending: Dict[Hashable, asyncio.Future], e: BaseException):
+        for future in pending.values():
+            if not future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+
+    def stats(self) -> dict:
+        return {'loads': self.loads, 'batches': self.batches,
+                'avg_batch': self.loads / self.batches if self.batches else 0.0}
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.sql.expression import TableClause, TextClause
+
+# 延迟直方图的默认分桶(秒)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """
+    指标基类，标签值按位置传入，避免热路径上构造 dict
+    """
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            lines.extend(self._render_sample(labelvalues, value))
+        return lines
+
+    def _render_sample(self, labelvalues: tuple, value) -> List[str]:
+        return [f'{self.name}{_labels(self.labelnames, labelvalues)} {value}']
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    采集时由回调函数计算的指标，热路径上没有开销
+    :param collect: 返回 [(标签值元组, 数值)] 的函数
+    """
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Callable[[], Iterable[Tuple[tuple, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        if self.collect is not None:
+            with self._lock:
+                self._values = dict(self.collect())
+        return super().render()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # [各分桶计数(非累计，最后一个为 +Inf), 总和, 次数]
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, labelvalues: tuple, value) -> List[str]:
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            cumulative += n
+            le = 'le="%s"' % ('+Inf' if bound == float('inf') else repr(bound))
+            lines.append(f'{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}')
+        lines.append(f'{self.name}_sum{_labels(self.labelnames, labelvalues)} {total}')
+        lines.append(f'{self.name}_count{_labels(self.labelnames, labelvalues)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            self._metrics.setdefault(metric.name, metric)
+            return self._metrics[metric.name]
+
+    def render(self) -> str:
+        """
+        Prometheus 文本格式(0.0.4)
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+# 已创建的连接池：engine 名称 -> Engine 弱引用，采集时读取状态
+_engines: Dict[str, weakref.ref] = {}
+
+
+def _collect_pool(attr: str):
+    def _collect():
+        for name, ref in list(_engines.items()):
+            engine = ref()
+            if engine is None:
+                continue
+            func = getattr(engine.pool, attr, None)
+            if func is not None:
+                yield (name,), func()
+    return _collect
+
+
+CHECKOUT_WAIT = metrics.register(Histogram(
+    'db_pool_checkout_wait_seconds', '从连接池获取连接的等待时间', ['engine']))
+POOL_SIZE = metrics.register(Gauge(
+    'db_pool_size', '连接池大小(pool_size)', ['engine'], collect=_collect_pool('size')))
+POOL_IN_USE = metrics.register(Gauge(
+    'db_pool_in_use', '已签出(使用中)的连接数', ['engine'], collect=_collect_pool('checkedout')))
+POOL_IDLE = metrics.register(Gauge(
+    'db_pool_idle', '池中空闲连接数', ['engine'], collect=_collect_pool('checkedin')))
+POOL_OVERFLOW = metrics.register(Gauge(
+    'db_pool_overflow', '超出 pool_size 的溢出连接数(为负表示尚未建满)', ['engine'], collect=_collect_pool('overflow')))
+POOL_CONNECTS = metrics.register(Counter(
+    'db_pool_connects_total', '新建数据库连接次数', ['engine']))
+POOL_INVALIDATIONS = metrics.register(Counter(
+    'db_pool_invalidations_total', '连接失效次数', ['engine']))
+DB_ERRORS = metrics.register(Counter(
+    'db_errors_total', '数据库错误次数，pre_ping=true 为检出连接时 ping 失败', ['engine', 'pre_ping']))
+QUERY_SECONDS = metrics.register(Histogram(
+    'db_query_seconds', 'SQL 执行耗时', ['engine', 'table', 'operation']))
+SERVICE_SECONDS = metrics.register(Histogram(
+    'db_service_seconds', 'IService 方法耗时(含结果转换)', ['engine', 'table', 'method']))
+DEADLINE_EXCEEDED = metrics.register(Counter(
+    'db_deadline_exceeded_total', '超过请求截止时间被取消或未执行的 SQL 次数', ['endpoint', 'engine']))
+
+
+class _TimedCheckout:
+    """
+    记录获取连接的等待时间（连接池满时会阻塞直到 pool_timeout）
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            CHECKOUT_WAIT.observe(time.perf_counter() - start, self.logging_name or 'default')
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrumented_pool_class(url):
+    """
+    方言默认使用 QueuePool 时返回带等待时间统计的子类，其他连接池（如 SQLite 内存库）保持默认
+    """
+    pool_class = url.get_dialect().get_pool_class(url)
+    if issubclass(pool_class, AsyncAdaptedQueuePool):
+        return InstrumentedAsyncQueuePool
+    if issubclass(pool_class, QueuePool):
+        return InstrumentedQueuePool
+    return None
+
+
+def _table_name(stmt) -> str:
+    if isinstance(stmt, TextClause):
+        return 'text'
+    for _ in range(8):
+        if isinstance(stmt, TableClause):
+            return stmt.name
+        table = getattr(stmt, 'table', None)
+        if table is None and hasattr(stmt, 'get_final_froms'):
+            table = next(iter(stmt.get_final_froms()), None)
+        # 子查询/别名向内展开，如 Query.count() 生成的 SELECT count(*) FROM (SELECT ...)
+        stmt = table if table is not None else getattr(stmt, 'element', None)
+        if stmt is None:
+            break
+    return 'other'
+
+
+def _statement_labels(context) -> Tuple[str, str]:
+    compiled = context.compiled
+    if compiled is None:
+        return 'raw', 'other'
+    # 编译结果会被 SQLAlchemy 缓存复用，标签只计算一次
+    labels = getattr(compiled, '_metrics_labels', None)
+    if labels is not None:
+        return labels
+    stmt = compiled.statement
+    table_name = _table_name(stmt)
+    if context.isinsert:
+        operation = 'insert'
+    elif context.isupdate:
+        operation = 'update'
+    elif context.isdelete:
+        operation = 'delete'
+    elif getattr(stmt, 'is_select', False):
+        operation = 'select'
+    else:
+        operation = 'other'
+    labels = (table_name, operation)
+    try:
+        compiled._metrics_labels = labels
+    except AttributeError:
+        pass
+    return labels
+
+
+def instrument_engine(engine: Engine, name: str):
+    """
+    为同步 Engine（异步引擎传 sync_engine）注册连接池与 SQL 执行事件
+    """
+    _engines[name] = weakref.ref(engine)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_query_start', None)
+        if start is not None:
+            QUERY_SECONDS.observe(time.perf_counter() - start, name, *_statement_labels(context))
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        DB_ERRORS.inc(name, 'true' if getattr(context, 'is_pre_ping', False) else 'false')
+
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc(name)
+
+    @event.listens_for(engine, 'invalidate')
+    def _invalidate(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATIONS.inc(name)
@@ -2,21 +2,34 @@ from __future__ import annotations
 
 import os
 
-
 from .engine import DbEngine, EngineConfig
-from dotenv import load_dotenv
-load_dotenv()  # 自动读取 .env 文件
-
-DB_CONFIG = {
-    'host': os.getenv('MYSQL_DB_HOST', '127.0.0.1'),
-    'port': os.getenv('MYSQL_DB_PORT', '3306'),
-    'database': os.getenv('MYSQL_DB_NAME', 'test_db'),
-    'username': os.getenv('MYSQL_DB_USER', 'root'),
-    'password': os.getenv('MYSQL_DB_PASSWORD', '')
-}
-
-mysql_props = EngineConfig(
-    **DB_CONFIG,
-    name='mysql'
-)
-mysql_engine = DbEngine(mysql_props)
+from .registry import registry
+from .replica import parse_hosts
+
+
+def mysql_config() -> EngineConfig:
+    """
+    从环境变量（.env）读取 MySQL 配置，由 registry 在首次使用时调用
+    """
+    return EngineConfig(
+        host=os.getenv('MYSQL_DB_HOST', '127.0.0.1'),
+        port=os.getenv('MYSQL_DB_PORT', '3306'),
+        database=os.getenv('MYSQL_DB_NAME', 'test_db'),
+        username=os.getenv('MYSQL_DB_USER', 'root'),
+        password=os.getenv('MYSQL_DB_PASSWORD', ''),
+        # 慢查询阈值(毫秒)，未设置或为 0 时不记录
+        slow_query_ms=os.getenv('MYSQL_DB_SLOW_QUERY_MS') or None,
+        # 只读副本，格式: host1:port1,host2:port2
+        replicas=parse_hosts(os.getenv('MYSQL_DB_REPLICAS', '')),
+        name='mysql'
+    )
+
+
+registry.register('mysql', lambda: DbEngine(mysql_config()))
+
+
+def __getattr__(name: str):
+    # 兼容 from org.dao.mysql import mysql_engine，访问时才创建引擎
+    if name == 'mysql_engine':
+        return registry.get('mysql')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
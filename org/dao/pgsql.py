@@ -3,21 +3,34 @@ from __future__ import annotations
 import os
 
 from .engine import DbEngine, EngineConfig
+from .registry import registry
+from .replica import parse_hosts
 
-from dotenv import load_dotenv
 
-load_dotenv()  # 自动读取 .env 文件
+def pgsql_config() -> EngineConfig:
+    """
+    从环境变量（.env）读取 PostgreSQL 配置，由 registry 在首次使用时调用
+    """
+    return EngineConfig(
+        host=os.getenv('PGSQL_DB_HOST', '127.0.0.1'),
+        port=os.getenv('PGSQL_DB_PORT', '5432'),
+        database=os.getenv('PGSQL_DB_NAME', 'langflow'),
+        username=os.getenv('PGSQL_DB_USER', 'postgres'),
+        password=os.getenv('PGSQL_DB_PASSWORD', 'postgres'),
+        # 慢查询阈值(毫秒)，未设置或为 0 时不记录
+        slow_query_ms=os.getenv('PGSQL_DB_SLOW_QUERY_MS') or None,
+        # 只读副本，格式: host1:port1,host2:port2
+        replicas=parse_hosts(os.getenv('PGSQL_DB_REPLICAS', '')),
+        name='pgsql',
+        protocol='postgresql+psycopg2'
+    )
 
-DB_CONFIG = {
-    'host': os.getenv('PGSQL_DB_HOST', '127.0.0.1'),
-    'port': os.getenv('PGSQL_DB_PORT', '5432'),
-    'database': os.getenv('PGSQL_DB_NAME', 'langflow'),
-    'username': os.getenv('PGSQL_DB_USER', 'postgres'),
-    'password': os.getenv('PGSQL_DB_PASSWORD', 'postgres')
-}
 
-pgsql_props = EngineConfig(
-    **DB_CONFIG,
-    name='pgsql'
-)
-pgsql_engine = DbEngine(pgsql_props)
+registry.register('pgsql', lambda: DbEngine(pgsql_config()))
+
+
+def __getattr__(name: str):
+    # 兼容 from org.dao.pgsql import pgsql_engine，访问时才创建引擎
+    if name == 'pgsql_engine':
+        return registry.get('pgsql')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import List, Optional
+
+from loguru import logger
+
+from .replica import pin_scope
+
+
+class PurgeJob:
+    """
+    后台清理已逻辑删除的行：每隔 interval 秒对登记的服务调用 purge_deleted（见 DbEngine.purge_deleted），
+    分批物理删除逻辑删除超过 retention 秒的行
+    实体有逻辑删除列的 IService 创建时自动登记；应用启动时配置 DB_PURGE_INTERVAL 才会启动（见 main.lifespan）
+    :param retention: 逻辑删除后保留的时间(秒)，默认 7 天，期间仍可恢复
+    :param chunk_size: 每批删除的行数，默认 EngineConfig.bulk_chunk_size
+    :param max_chunks: 每个实体每轮最多删除的批数，剩余的留到下一轮
+    :param pause: 两批之间的间隔(秒)
+    """
+
+    def __init__(self, retention: float = 7 * 24 * 3600, chunk_size: int = None,
+                 max_chunks: int = 100, pause: float = 0.1):
+        self.retention = retention
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.pause = pause
+        self.interval: Optional[float] = None
+        self._services: List = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, service):
+        """
+        登记需要清理的服务（有 entity_cls 与 purge_deleted 方法）
+        """
+        with self._lock:
+            if service not in self._services:
+                self._services.append(service)
+
+    def services(self) -> list:
+        return list(self._services)
+
+    def run_once(self) -> int:
+        """
+        清理一轮，返回删除的行数；单个实体失败只记录日志，不影响其他实体
+        """
+        total = 0
+        for service in self.services():
+            if self._stop.is_set():
+                break
+            try:
+                total += service.purge_deleted(older_than=self.retention, chunk_size=self.chunk_size,
+                                               max_chunks=self.max_chunks, pause=self.pause)
+            except Exception as e:
+                logger.warning(f"Failed to purge {service.entity_cls.__name__}: {e}")
+        return total
+
+    def start(self, interval: float, retention: float = None):
+        """
+        启动后台线程，每隔 interval 秒清理一轮
+        """
+        if retention is not None:
+            self.retention = retention
+        self.interval = interval
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='db-purge', daemon=True)
+        self._thread.start()
+        logger.info(f"Purge job started: every {interval}s, retention {self.retention}s, "
+                    f"{len(self._services)} entities")
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            # 每轮一个主库固定作用域，清理写入后线程不会一直固定在主库
+            with pin_scope():
+                total = self.run_once()
+            if total:
+                logger.info(f"Purge job: {total} rows in {time.perf_counter() - start:.3f}s")
+
+
+# 默认的清理任务，IService 自动登记
+purge_job = PurgeJob()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+
+class EngineRegistry:
+    """
+    数据库引擎注册表：模块导入时只登记工厂函数，首次 get 时才创建引擎
+    warm_up 在应用启动时（FastAPI lifespan）创建引擎并预建连接，ready 供就绪探针使用
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable] = {}
+        self._engines: Dict[str, object] = {}
+        # 工厂函数中可能 get 其他引擎（如异步引擎共用同步引擎的结果缓存），使用可重入锁
+        self._lock = threading.RLock()
+        # 已预热的引擎 -> 是否成功
+        self._warmed: Dict[str, bool] = {}
+
+    def register(self, name: str, factory: Callable):
+        """
+        登记引擎工厂，不创建引擎、不读取配置
+        """
+        with self._lock:
+            self._factories[name] = factory
+
+    def names(self) -> list:
+        return list(self._factories.keys())
+
+    def get(self, name: str):
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(name)
+            if engine is None:
+                factory = self._factories.get(name)
+                if factory is None:
+                    raise KeyError(f"未注册的数据库引擎: {name}")
+                engine = factory()
+                self._engines[name] = engine
+        return engine
+
+    def created(self) -> dict:
+        return dict(self._engines)
+
+    async def warm_up(self, names: Iterable[str] = None, connections: int = None) -> Dict[str, bool]:
+        """
+        创建引擎并预建连接，多个引擎并发进行；失败只记录日志，不影响应用启动
+        :param names: 需要预热的引擎，默认全部已注册的引擎
+        :param connections: 每个连接池预建的连接数，默认 pool_size
+        """
+        names = list(names) if names is not None else self.names()
+        results = await asyncio.gather(*[self._warm_up(name, connections) for name in names])
+        self._warmed.update(zip(names, results))
+        return dict(zip(names, results))
+
+    async def _warm_up(self, name: str, connections: Optional[int]) -> bool:
+        start = time.perf_counter()
+        try:
+            engine = await asyncio.to_thread(self.get, name)
+            if inspect.iscoroutinefunction(engine.warm_up):
+                opened = await engine.warm_up(connections)
+            else:
+                opened = await asyncio.to_thread(engine.warm_up, connections)
+            logger.info(f"Warm up {name}: {opened} connections in {time.perf_counter() - start:.3f}s")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to warm up {name}: {e}")
+            return False
+
+    async def ready(self) -> Dict[str, bool]:
+        """
+        就绪检查：对预热过的引擎执行一次 ping，未预热的引擎不检查
+        """
+        names = list(self._warmed.keys())
+        results = await asyncio.gather(*[self._ping(name) for name in names])
+        return dict(zip(names, results))
+
+    async def _ping(self, name: str) -> bool:
+        try:
+            engine = self.get(name)
+            if inspect.iscoroutinefunction(engine.ping):
+                await engine.ping()
+            else:
+                await asyncio.to_thread(engine.ping)
+            return True
+        except Exception as e:
+            logger.warning(f"Ping {name} failed: {e}")
+            return False
+
+    async def dispose(self):
+        """
+        释放所有已创建引擎的连接池（应用关闭时调用）
+        """
+        for name, engine in self.created().items():
+            if inspect.iscoroutinefunction(engine.dispose):
+                await engine.dispose()
+            else:
+                await asyncio.to_thread(engine.dispose)
+
+
+registry = EngineRegistry()
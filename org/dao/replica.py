@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from loguru import logger
+from sqlalchemy import Engine
+
+# 选择策略
+ROUND_ROBIN = 'round_robin'
+LEAST_OUTSTANDING = 'least_outstanding'
+
+# 当前上下文（请求）中已写过的引擎名，读操作随后固定走主库，保证读到自己的写入
+_pinned: contextvars.ContextVar[frozenset] = contextvars.ContextVar('db_pinned', default=frozenset())
+# 为 True 时当前上下文的读操作都走主库
+_force_primary: contextvars.ContextVar[bool] = contextvars.ContextVar('db_force_primary', default=False)
+
+
+def pin_primary(name: str):
+    """
+    写操作后调用，当前上下文后续对该引擎的读操作走主库
+    """
+    pinned = _pinned.get()
+    if name not in pinned:
+        _pinned.set(pinned | {name})
+
+
+def is_pinned(name: str) -> bool:
+    return _force_primary.get() or name in _pinned.get()
+
+
+def reset_pins():
+    """
+    清除当前上下文的主库固定（如请求结束、后台任务复用上下文时）
+    """
+    _pinned.set(frozenset())
+
+
+@contextmanager
+def pin_scope():
+    """
+    代码块内的写操作只固定代码块内的读，结束时恢复进入前的状态：
+    请求（见 org.app.deps.db_unit_of_work）与后台任务的每一轮各用一个作用域，
+    长期运行的线程不会因为某次写入之后一直读主库
+    """
+    token = _pinned.set(frozenset())
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    代码块内的读操作都走主库：
+        with use_primary():
+            service.get_by_id(1)
+    """
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+class Replica:
+    """
+    单个只读副本：连接池按需创建，记录进行中的请求数与连续失败次数
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Engine]):
+        self.name = name
+        self._factory = factory
+        self._engine: Optional[Engine] = None
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def get_engine(self) -> Engine:
+        if self._engine is None:
+            self._engine = self._factory()
+        return self._engine
+
+    def healthy(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class ReplicaSet:
+    """
+    只读副本集合
+    :param policy: round_robin 轮询；least_outstanding 选择进行中请求最少的副本
+    :param max_failures: 连续失败达到该次数后摘除副本
+    :param eject_seconds: 摘除时长，到期后重新参与选择，成功一次即恢复
+    """
+
+    def __init__(self, replicas: List[Replica],
+                 policy: str = ROUND_ROBIN,
+                 max_failures: int = 3,
+                 eject_seconds: float = 30.0):
+        if policy not in (ROUND_ROBIN, LEAST_OUTSTANDING):
+            raise ValueError(f"不支持的副本选择策略: {policy}")
+        self.replicas = replicas
+        self.policy = policy
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.replicas)
+
+    def acquire(self) -> Optional[Replica]:
+        """
+        选择一个健康副本并计入进行中请求，全部摘除时返回 None；使用完毕后调用 release
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [r for r in self.replicas if r.healthy(now)]
+            if not healthy:
+                return None
+            start = next(self._counter) % len(healthy)
+            # 从轮询位置开始比较，进行中请求数相同时也能均匀分布
+            healthy = healthy[start:] + healthy[:start]
+            if self.policy == LEAST_OUTSTANDING:
+                replica = min(healthy, key=lambda r: r.outstanding)
+            else:
+                replica = healthy[0]
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica: Replica, ok: bool = True):
+        with self._lock:
+            replica.outstanding -= 1
+            if ok:
+                replica.failures = 0
+                return
+            replica.failures += 1
+            if replica.failures >= self.max_failures:
+                replica.ejected_until = time.monotonic() + self.eject_seconds
+                replica.failures = 0
+                logger.warning(f"Eject replica {replica.name} for {self.eject_seconds}s")
+
+    def dispose(self):
+        for replica in self.replicas:
+            if replica._engine is not None:
+                replica._engine.dispose()
+                replica._engine = None
+
+    def stats(self) -> list:
+        now = time.monotonic()
+        with self._lock:
+            return [{'name': r.name, 'outstanding': r.outstanding, 'failures': r.failures,
+                     'healthy': r.healthy(now)} for r in self.replicas]
+
+
+def parse_hosts(value: str) -> List[dict]:
+    """
+    解析副本地址列表，如 "10.0.0.2:3306,10.0.0.3"，未写端口时沿用主库端口
+    """
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append({'host': host, 'port': int(port)} if port else {'host': host})
+    return hosts
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import Engine, event
+
+_COMMENT = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'(?<![\w$])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.I)
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|(?<![:\w]):\w+|\?')
+_IN_LIST = re.compile(r'\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_VALUES = re.compile(r'\bvalues\s*\(.*?\)(?:\s*,\s*\(.*?\))*', re.I | re.S)
+_SPACE = re.compile(r'\s+')
+
+# 参数名包含这些词时值完全隐藏
+_SENSITIVE = re.compile(r'pass|pwd|secret|token|key|credential|auth', re.I)
+
+# 可以 EXPLAIN 的语句
+_EXPLAINABLE = re.compile(r'^\s*(select|with|update|delete)\b', re.I)
+
+# 按方言的 EXPLAIN 前缀（Doris 走 MySQL 协议）
+EXPLAIN_PREFIX = {
+    'mysql': 'EXPLAIN ',
+    'postgresql': 'EXPLAIN (FORMAT JSON) ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+
+
+def fingerprint(sql: str) -> str:
+    """
+    SQL 指纹：去掉注释，字面量与绑定参数替换为 ?，合并 IN 列表与多行 VALUES，空白归一
+    同一形态、不同参数的语句指纹相同
+    """
+    sql = _COMMENT.sub(' ', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('in (?+)', sql)
+    sql = _VALUES.sub('values (...)', sql)
+    return _SPACE.sub(' ', sql).strip().lower()
+
+
+def fingerprint_id(fp: str) -> str:
+    return hashlib.md5(fp.encode('utf-8')).hexdigest()[:16]
+
+
+def _redact_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__} len={len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def redact(parameters, executemany: bool = False):
+    """
+    参数脱敏：字符串/二进制只保留类型与长度，敏感字段名完全隐藏，数值保留（多为 id / 分页参数）
+    executemany 只记录批次行数
+    """
+    if executemany:
+        return f'<{len(parameters)} rows>'
+    if isinstance(parameters, dict):
+        return {k: '***' if _SENSITIVE.search(str(k)) else _redact_value(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(v) for v in parameters]
+    return _redact_value(parameters)
+
+
+class SlowQueryLog:
+    """
+    慢查询日志：执行耗时超过阈值的语句记录指纹、脱敏参数、耗时与返回行数
+    并在后台执行 EXPLAIN（不阻塞业务请求），结果保存在有界环形缓冲区中
+    :param threshold_ms: 慢查询阈值(毫秒)
+    :param maxlen: 缓冲区保留的最近记录数
+    :param explain: 是否自动 EXPLAIN
+    :param explain_interval: 同一指纹在该时间(秒)内只 EXPLAIN 一次
+    """
+
+    def __init__(self, threshold_ms: float, maxlen: int = 100, explain: bool = True, explain_interval: float = 300):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.entries: deque = deque(maxlen=maxlen)
+        self._explained: dict = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: set = set()
+
+    def attach(self, engine: Engine, name: str, async_engine=None):
+        """
+        监听 Engine 的 SQL 执行事件；异步引擎传 sync_engine，并通过 async_engine 执行 EXPLAIN
+        """
+        prefix = EXPLAIN_PREFIX.get(engine.dialect.name)
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._slow_start = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            start = getattr(context, '_slow_start', None)
+            if start is None:
+                return
+            elapsed = time.perf_counter() - start
+            if elapsed < self.threshold or not context.execution_options.get('slowlog', True):
+                return
+            entry = self._record(name, statement, parameters, executemany, elapsed, cursor.rowcount)
+            if self.explain and prefix and not executemany and _EXPLAINABLE.match(statement) \
+                    and self._should_explain(entry['fingerprint_id']):
+                self._submit_explain(engine, async_engine, prefix + statement, parameters, entry)
+
+    def _record(self, name: str, statement: str, parameters, executemany: bool, elapsed: float, rowcount: int) -> dict:
+        fp = fingerprint(statement)
+        entry = {
+            'time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'engine': name,
+            'fingerprint_id': fingerprint_id(fp),
+            'fingerprint': fp,
+            'duration_ms': round(elapsed * 1000, 3),
+            'rows': rowcount if rowcount is not None and rowcount >= 0 else None,
+            'params': redact(parameters, executemany),
+            'explain': None,
+        }
+        self.entries.append(entry)
+        logger.warning(f"Slow query [{name}] {entry['duration_ms']}ms rows={entry['rows']} "
+                       f"fp={entry['fingerprint_id']}: {fp} params={entry['params']}")
+        return entry
+
+    def _should_explain(self, fid: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(fid)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            if len(self._explained) > 10000:
+                self._explained.clear()
+            self._explained[fid] = now
+            return True
+
+    def _submit_explain(self, engine: Engine, async_engine, sql: str, parameters, entry: dict):
+        if async_engine is not None:
+            task = asyncio.get_running_loop().create_task(self._explain_async(async_engine, sql, parameters, entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slowlog-explain')
+        self._executor.submit(self._explain, engine, sql, parameters, entry)
+
+    @staticmethod
+    def _explain_result(result) -> list:
+        return [row._asdict() for row in result.all()]
+
+    def _explain(self, engine: Engine, sql: str, parameters, entry: dict):
+        try:
+            with engine.connect() as conn:
+                result = conn.exec_driver_sql(sql, parameters, execution_options={'slowlog': False})
+                entry['explain'] = self._explain_result(result)
+        except Exception as e:
+            entry['explain'] = {'error': str(e)}
+            logger.warning(f"Failed to explain {entry['fingerprint_id']}: {e}")
+
+    async def _explain_async(self, async_engine, sql: str, parameters, entry: dict):
+        try:
+            async with async_engine.connect() as conn:
+                result = await conn.exec_driver_sql(sql, parameters, execution_options={'slowlog': False})
+                entry['explain'] = self._explain_result(result)
+        except Exception as e:
+            entry['explain'] = {'error': str(e)}
+            logger.warning(f"Failed to explain {entry['fingerprint_id']}: {e}")
+
+    def recent(self, limit: int = None) -> list:
+        """
+        最近的慢查询，按时间倒序
+        """
+        entries = list(self.entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        self.entries.clear()
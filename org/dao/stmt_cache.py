@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from sqlalchemy import select, bindparam, asc, desc, and_, Select
+from sqlalchemy.orm.attributes import QueryableAttribute
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, UnaryExpression, OperatorExpression
+
+from .cache import LRUCache, MISSING
+from .columns import get_column_meta, not_deleted
+
+# 可以替换为命名绑定参数的比较运算
+_OPERATORS = {
+    operators.eq, operators.ne, operators.lt, operators.le, operators.gt, operators.ge,
+    operators.in_op, operators.not_in_op, operators.like_op, operators.not_like_op,
+    operators.ilike_op, operators.not_ilike_op,
+}
+_ORDER_MODIFIERS = {operators.asc_op: asc, operators.desc_op: desc}
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _column_key(cls, element) -> str:
+    """
+    实体自身的列 -> 列名，其他表达式无法按形态缓存
+    """
+    if isinstance(element, QueryableAttribute):
+        if element.class_ is not cls:
+            raise _Uncacheable()
+        element = element.expression
+    table = getattr(element, 'table', None)
+    key = getattr(element, 'key', None)
+    if table is not cls.__table__ or key not in get_column_meta(cls).keys:
+        raise _Uncacheable()
+    return key
+
+
+def _order_shape(cls, element) -> tuple:
+    if isinstance(element, UnaryExpression):
+        if element.modifier not in _ORDER_MODIFIERS:
+            raise _Uncacheable()
+        return element.modifier, _column_key(cls, element.element)
+    return None, _column_key(cls, element)
+
+
+def _filter_shape(cls, expr, shapes: list, params: dict):
+    if not isinstance(expr, BinaryExpression) or expr.operator not in _OPERATORS:
+        raise _Uncacheable()
+    right = expr.right
+    if not isinstance(right, BindParameter):
+        raise _Uncacheable()
+    name = f'p{len(shapes)}'
+    # like 的 escape 等修饰属于形态
+    shapes.append((_column_key(cls, expr.left), expr.operator, right.expanding, tuple(sorted(expr.modifiers.items()))))
+    params[name] = right.effective_value
+
+
+def query_shape(cls, args=None, kwargs=None, limit: int = None) -> Tuple[tuple, dict]:
+    """
+    与 _wrapper_query 相同的参数 -> (查询形态, 绑定参数)
+    形态只包含实体、查询列、过滤列与运算符、排序与分组、是否追加 未删除 条件，不包含参数值
+    无法按形态缓存（如 OR、函数、子查询条件）时抛出 _Uncacheable
+    """
+    kwargs = kwargs or {}
+    keys = get_column_meta(cls).keys
+    columns = kwargs.get('columns')
+    exclude_columns = kwargs.get('exclude_columns')
+    _columns = tuple(columns) if columns else None
+    _exclude_columns = tuple(exclude_columns) if exclude_columns else None
+
+    order_by = kwargs.get('order_by')
+    is_asc = kwargs.get('asc', False)
+    if isinstance(order_by, (list, tuple)):
+        _order = tuple(_order_shape(cls, _o) for _o in order_by)
+    elif order_by is not None and is_asc is not None:
+        _order = ((operators.asc_op if is_asc is True else operators.desc_op, _column_key(cls, order_by)),)
+    else:
+        _order = ()
+    group_by = kwargs.get('group_by')
+    _group = _column_key(cls, group_by) if group_by is not None else None
+
+    shapes, params = [], {}
+    for _arg in args or ():
+        # 与 parse_filters 一致，忽略非条件表达式的位置参数
+        if isinstance(_arg, OperatorExpression):
+            _filter_shape(cls, _arg, shapes, params)
+    for key, value in kwargs.items():
+        if key in ('columns', 'exclude_columns', 'order_by', 'asc', 'group_by', 'with_deleted') or value is None:
+            continue
+        if isinstance(value, OperatorExpression):
+            _filter_shape(cls, value, shapes, params)
+        elif key in keys:
+            params[f'p{len(shapes)}'] = value
+            shapes.append((key, operators.eq, False, ()))
+        elif hasattr(cls, key):
+            raise _Uncacheable()
+    _not_deleted = not_deleted(cls, kwargs) is not None
+    return (cls, _columns, _exclude_columns, _order, _group, tuple(shapes), _not_deleted, limit), params
+
+
+def build_statement(shape: tuple) -> Select:
+    """
+    按查询形态构建 select 语句，过滤值使用命名绑定参数 p0, p1 ...
+    """
+    cls, _columns, _exclude_columns, _order, _group, shapes, _not_deleted, limit = shape
+    stmt = select(*get_column_meta(cls).projection(_columns, _exclude_columns))
+    if _order:
+        stmt = stmt.order_by(*[getattr(cls, key) if modifier is None else _ORDER_MODIFIERS[modifier](getattr(cls, key))
+                               for modifier, key in _order])
+    if _group is not None:
+        stmt = stmt.group_by(getattr(cls, _group))
+    filters = []
+    for i, (key, operator, expanding, modifiers) in enumerate(shapes):
+        column = getattr(cls, key)
+        filters.append(operator(column, bindparam(f'p{i}', type_=column.type, expanding=expanding), **dict(modifiers)))
+    if _not_deleted:
+        filters.append(get_column_meta(cls).not_deleted)
+    if filters:
+        stmt = stmt.where(and_(*filters))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+class StatementCache:
+    """
+    查询形态 -> select 语句 的缓存
+    同一形态复用同一个语句对象，省去每次构建 Query 的开销，SQLAlchemy 也可直接命中其编译缓存，只需绑定新的参数
+    :param maxsize: 最多缓存的形态数，为 0 时不缓存
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._cache = LRUCache(maxsize=maxsize or 1, ttl=None)
+        # 无法按形态缓存、走原有查询构建方式的次数
+        self.bypass = 0
+
+    def lookup(self, cls, args=None, kwargs=None, limit: int = None) -> Optional[Tuple[Select, dict]]:
+        """
+        返回 (语句, 绑定参数)，无法缓存时返回 None，由调用方按原方式构建查询
+        """
+        if not self.maxsize:
+            return None
+        try:
+            shape, params = query_shape(cls, args, kwargs, limit)
+        except _Uncacheable:
+            self.bypass += 1
+            return None
+        stmt = self._cache.get(shape)
+        if stmt is MISSING:
+            stmt = build_statement(shape)
+            self._cache.put(shape, stmt)
+        return stmt, params
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        _stats = self._cache.stats()
+        _stats.pop('weight')
+        _stats.pop('expirations')
+        _stats['bypass'] = self.bypass
+        return _stats
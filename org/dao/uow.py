@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+_current: contextvars.ContextVar[Optional['UnitOfWork']] = contextvars.ContextVar('db_unit_of_work', default=None)
+
+
+def current_uow() -> Optional['UnitOfWork']:
+    return _current.get()
+
+
+class UowSession(Session):
+    """
+    工作单元内共享的会话：commit 只 flush、close 不关闭，由 UnitOfWork 统一提交和关闭
+    rollback 会回滚整个工作单元，并使其在结束时只能回滚
+    """
+
+    def commit(self):
+        self.flush()
+
+    def rollback(self):
+        self.info['uow'].rollback_only = True
+        super().rollback()
+
+    def close(self):
+        pass
+
+
+class UnitOfWork:
+    """
+    工作单元：同一上下文（请求）内对同一引擎的操作共用一个会话和事务，结束时统一提交
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, Session] = {}
+        self.rollback_only = False
+        self._on_finish: List[Callable] = []
+
+    def has(self, engine) -> bool:
+        return engine.name in self.sessions
+
+    def session(self, engine) -> Session:
+        session = self.sessions.get(engine.name)
+        if session is None:
+            session = UowSession(bind=engine.get_engine(), expire_on_commit=False, info={'uow': self})
+            self.sessions[engine.name] = session
+        return session
+
+    def on_finish(self, func: Callable):
+        """
+        工作单元结束（提交或回滚）后执行，如使期间写入或读到未提交数据的缓存失效
+        """
+        self._on_finish.append(func)
+
+    def commit(self):
+        if self.rollback_only:
+            logger.warning("Unit of work marked rollback-only, rolling back")
+            self.rollback()
+            return
+        try:
+            for session in self.sessions.values():
+                Session.commit(session)
+        except Exception:
+            self.rollback()
+            raise
+
+    def rollback(self):
+        for session in self.sessions.values():
+            Session.rollback(session)
+
+    def close(self):
+        for session in self.sessions.values():
+            Session.close(session)
+        self.sessions.clear()
+        callbacks, self._on_finish = self._on_finish, []
+        for func in callbacks:
+            try:
+                func()
+            except Exception as e:
+                logger.warning(f"Unit of work finish callback failed: {e}")
+
+
+def activate(uow: UnitOfWork) -> contextvars.Token:
+    """
+    将工作单元设为当前上下文的工作单元，返回的 token 交给 deactivate 恢复
+    """
+    return _current.set(uow)
+
+
+def deactivate(token: contextvars.Token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # 结束时已不在设置时的上下文中（如依赖的退出代码在其他任务中执行），直接清空
+        _current.set(None)
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    """
+    在代码块内开启工作单元，正常结束时提交，异常时回滚：
+        with unit_of_work():
+            file_service.save(file)
+            file_service.update_by_id(other)
+    """
+    uow = UnitOfWork()
+    token = activate(uow)
+    try:
+        yield uow
+        uow.commit()
+    except BaseException:
+        uow.rollback()
+        raise
+    finally:
+        uow.close()
+        deactivate(token)
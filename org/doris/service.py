@@ -1,21 +1,88 @@
 from __future__ import annotations
 
+import os
+from typing import Iterable, Sequence
+
 from .entities import *
-from org.service import IService, T
+from .stream_load import StreamLoader, StreamLoadReport, stream_load_config
+from org.service import IService, AsyncIService, T
+from org.common.ierrors import ErrorCodes
 from org.common.iexception import IException
-from org.dao.doris import doris_engine
+from org.dao.cache import Cache, LRUCache
+from org.dao.columnar import ColumnarResult, group_by
+from org.dao.uow import current_uow
+from org.dao import doris  # noqa: F401 注册 doris / doris_async 引擎
 
 
 class DorisBaseService(IService[T]):
-    def __init__(self):
-        super().__init__(db_engine=doris_engine)
+    def __init__(self, entity_cache: Cache = None, coalesce_ms: float = None, stream_load_threshold: int = None):
+        super().__init__(db_engine='doris', entity_cache=entity_cache, coalesce_ms=coalesce_ms)
+        # insert_entities 达到该行数时改用 Stream Load 导入，设为 0 关闭
+        self.stream_load_threshold = stream_load_threshold if stream_load_threshold is not None \
+            else int(os.getenv('DORIS_STREAM_LOAD_THRESHOLD', '5000'))
+        self._stream_loader = None
+
+    @property
+    def stream_loader(self) -> StreamLoader:
+        if self._stream_loader is None:
+            self._stream_loader = StreamLoader(stream_load_config(self.db_engine.config))
+        return self._stream_loader
+
+    @stream_loader.setter
+    def stream_loader(self, stream_loader: StreamLoader):
+        self._stream_loader = stream_loader
+
+    def stream_load(self, entities: Iterable[T], label: str = None, columns: Sequence[str] = None,
+                    fmt: str = None) -> StreamLoadReport:
+        """
+        通过 Doris Stream Load（HTTP）批量导入实体或字典，不经过 MySQL 协议
+        Unique Key 模型下与 INSERT 相同，主键已存在的行被覆盖
+        :param label: 传入固定的 label 可使整批重试幂等，已成功导入的块不会重复导入
+        """
+        entities = list(entities)
+        if not entities:
+            raise IException(error=ErrorCodes.DATA_NOT_EXIST)
+        try:
+            return self.stream_loader.load(self.entity_cls, entities, label=label, columns=columns, fmt=fmt)
+        finally:
+            # 部分块可能已导入，无论成功与否都失效缓存
+            self.db_engine.invalidate(self.entity_cls)
+            ids = [e.get('id') if isinstance(e, dict) else e.id for e in entities]
+            if None in ids:
+                self._evict_all()
+            else:
+                self._evict(*ids)
+
+    def insert_entities(self, entities: list[T], chunk_size: int = None, return_ids: bool = False) -> bool:
+        """
+        批量插入，达到 stream_load_threshold 行时走 Stream Load
+        工作单元中或需要返回主键（return_ids）时仍走 bulk insert：Stream Load 无法随事务回滚，也不返回生成的主键
+        """
+        if self.stream_load_threshold and entities and len(entities) >= self.stream_load_threshold \
+                and not return_ids and current_uow() is None:
+            return self.stream_load(entities).rows > 0
+        return super().insert_entities(entities, chunk_size=chunk_size, return_ids=return_ids)
 
 
 class FileService(DorisBaseService[File]):
     entity_cls = File
 
 
-file_service = FileService()
+# 热点文件按 id 查询走本地缓存，1 分钟过期；不存在的 id 缓存 5 秒
+file_service = FileService(entity_cache=LRUCache(maxsize=4096, ttl=60, negative_ttl=5))
+
+
+class AsyncDorisBaseService(AsyncIService[T]):
+    def __init__(self, coalesce: bool = False, entity_cache: Cache = None):
+        super().__init__(db_engine='doris_async', coalesce=coalesce, entity_cache=entity_cache)
+
+
+class AsyncFileService(AsyncDorisBaseService[File]):
+    entity_cls = File
+
+
+# 同一时刻并发的 get_by_id 合并为一次 IN 查询（不额外等待）；与 file_service 共用实体缓存，两边的写入都会使其失效
+async_file_service = AsyncFileService(coalesce=True, entity_cache=file_service.entity_cache)
 
 
 def list_files(user_id: int | None = None) -> list[File]:
@@ -92,3 +159,11 @@ def delete_file_by_args(*args, **kwargs) -> bool:
     return file_service.remove_by_args(*args, **kwargs)
 
 
+def file_usage_by(key: str = 'user_id', *args, **kwargs) -> ColumnarResult:
+    """
+    按 key（user_id / bucket / upload_status 等）统计文件数与总大小，列式返回：
+        {key: [...], 'count': [...], 'size': [...]}
+    只拉取 key 与 size 两列，在内存中向量化汇总
+    """
+    data = file_service.columnar_by_args(*args, columns=[key, 'size'], **kwargs)
+    return group_by(data, key, sums=['size'])
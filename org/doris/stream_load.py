@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import base64
+import datetime
+import decimal
+import http.client
+import json
+import os
+import time
+import urllib.parse
+import uuid
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import inspect
+
+from org.common.ierrors import ErrorCodes
+from org.common.iexception import IException
+from org.dao import BulkResult, T
+from org.dao.engine import EngineConfig
+
+# 导入成功（Publish Timeout 表示已提交，稍后可见）
+_SUCCESS = ('Success', 'Publish Timeout')
+# 同一 label 已存在时，已有任务的这些状态视为导入成功
+_EXISTING_SUCCESS = ('FINISHED', 'VISIBLE', 'COMMITTED')
+_REDIRECTS = (301, 302, 303, 307, 308)
+# CSV 列分隔符与行分隔符，使用不可见字符，避免与数据冲突
+_COLUMN_SEPARATOR = '\x01'
+_LINE_DELIMITER = '\x02'
+_NULL = '\\N'
+
+
+class StreamLoadConfig(BaseModel):
+    scheme: Optional[str] = Field(default='http', description='http / https')
+    host: Optional[str] = Field(default='localhost', description='FE（或 BE）HTTP 地址')
+    port: Optional[int] = Field(default=8030, description='FE HTTP 端口（BE 为 8040）')
+    username: Optional[str] = Field(default='root', description='用户名')
+    password: Optional[str] = Field(default='', description='密码')
+    database: Optional[str] = Field(default='test_db', description='数据库名')
+    format: Optional[str] = Field(default='csv', description='导入格式: csv / json')
+    chunk_bytes: Optional[int] = Field(default=64 * 1024 * 1024, description='单次导入的最大字节数，超出时拆为多个导入任务')
+    timeout: Optional[float] = Field(default=600, description='HTTP 超时时间(秒)')
+    max_filter_ratio: Optional[float] = Field(default=0.0, description='允许过滤（数据质量不合格）的行比例')
+    max_retries: Optional[int] = Field(default=3, description='网络错误时以相同 label 重试的次数')
+    retry_backoff: Optional[float] = Field(default=1.0, description='重试间隔(秒)，按次数线性增加')
+    max_error_rows: Optional[int] = Field(default=20, description='导入失败时从 ErrorURL 读取的错误行数')
+    label_prefix: Optional[str] = Field(default='hello_py', description='自动生成 label 的前缀')
+    properties: Optional[dict] = Field(default_factory=dict, description='其他 Stream Load 请求头，如 strict_mode')
+
+
+def stream_load_config(config: EngineConfig) -> StreamLoadConfig:
+    """
+    由 Doris 引擎配置生成 Stream Load 配置，HTTP 地址可通过环境变量覆盖
+    """
+    return StreamLoadConfig(
+        host=os.getenv('DORIS_HTTP_HOST', config.host),
+        port=os.getenv('DORIS_HTTP_PORT', '8030'),
+        username=config.username,
+        password=config.password,
+        database=config.database,
+        format=os.getenv('DORIS_STREAM_LOAD_FORMAT', 'csv'),
+    )
+
+
+class StreamLoadResult(BaseModel):
+    """
+    单个导入任务（一个 label）的结果，字段对应 Stream Load 返回的 JSON
+    """
+    label: str
+    status: str = ''
+    message: str = ''
+    txn_id: Optional[int] = None
+    total_rows: int = 0
+    loaded_rows: int = 0
+    filtered_rows: int = 0
+    unselected_rows: int = 0
+    load_bytes: int = 0
+    load_time_ms: int = 0
+    error_url: Optional[str] = None
+    # 从 ErrorURL 读取的前 max_error_rows 行错误明细
+    error_rows: List[str] = Field(default_factory=list)
+    # label 已存在（此前已成功导入），本次未重复导入
+    existing: bool = False
+
+    @classmethod
+    def parse(cls, label: str, body: dict) -> StreamLoadResult:
+        return cls(label=body.get('Label') or label,
+                   status=body.get('Status', ''),
+                   message=body.get('Message', '') or body.get('msg', ''),
+                   txn_id=body.get('TxnId'),
+                   total_rows=body.get('NumberTotalRows', 0),
+                   loaded_rows=body.get('NumberLoadedRows', 0),
+                   filtered_rows=body.get('NumberFilteredRows', 0),
+                   unselected_rows=body.get('NumberUnselectedRows', 0),
+                   load_bytes=body.get('LoadBytes', 0),
+                   load_time_ms=body.get('LoadTimeMs', 0),
+                   error_url=body.get('ErrorURL') or None)
+
+
+class StreamLoadReport(BulkResult):
+    """
+    一次批量导入的汇总，rows 为导入成功的行数，chunks 为导入任务数
+    """
+    label: str = ''
+    filtered_rows: int = 0
+    bytes: int = 0
+    results: List[StreamLoadResult] = Field(default_factory=list)
+
+
+class StreamLoadError(IException):
+    def __init__(self, message: str, result: StreamLoadResult = None):
+        super().__init__(code=ErrorCodes.DB_ERROR.code, message=message)
+        self.result = result
+
+
+def _load_columns(cls: Type[T], keys: Sequence[str] = None) -> List[Tuple[str, str]]:
+    """
+    (实体属性名, 表字段名)，按映射顺序
+    """
+    columns = [(prop.key, prop.columns[0].name) for prop in inspect(cls).column_attrs]
+    if keys:
+        _keys = set(keys)
+        columns = [c for c in columns if c[0] in _keys]
+    return columns
+
+
+def _text(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return str(value)
+
+
+def _json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time, bytes)):
+        return _text(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _values(row, keys: Sequence[str]) -> list:
+    if isinstance(row, dict):
+        return [row.get(key) for key in keys]
+    _state = vars(row)
+    return [_state.get(key) for key in keys]
+
+
+def _encode_csv(values: list) -> str:
+    fields = []
+    for value in values:
+        if value is None:
+            fields.append(_NULL)
+            continue
+        _value = _text(value)
+        if _COLUMN_SEPARATOR in _value or _LINE_DELIMITER in _value:
+            raise ValueError(f"CSV 导入的值中不能包含分隔符 \\x01 / \\x02，请使用 json 格式: {_value!r}")
+        fields.append(_value)
+    return _COLUMN_SEPARATOR.join(fields) + _LINE_DELIMITER
+
+
+def _encode_json(names: Sequence[str], values: list) -> str:
+    return json.dumps(dict(zip(names, values)), ensure_ascii=False, default=_json_default) + '\n'
+
+
+class StreamLoader:
+    """
+    Doris Stream Load 批量导入：实体 / 字典按 chunk_bytes 序列化为 CSV 或 JSON（逐块生成，内存中只保留一块），
+    每块以一个 label 通过 HTTP PUT /api/{db}/{table}/_stream_load 导入，跟随 FE 到 BE 的重定向
+    幂等：网络错误时以相同 label 重试；label 已存在且已完成时视为成功，不会重复导入。
+    调用方传入固定的 label 时，整批重试也只会导入尚未成功的块
+    Stream Load 不参与数据库事务，每块独立提交
+    """
+
+    def __init__(self, config: StreamLoadConfig):
+        self.config = config
+        token = base64.b64encode(f'{config.username}:{config.password}'.encode('utf-8')).decode('ascii')
+        self._authorization = f'Basic {token}'
+
+    def load(self, cls: Type[T], rows: Iterable, label: str = None, columns: Sequence[str] = None,
+             fmt: str = None) -> StreamLoadReport:
+        """
+        导入实体或字典（字典的 key 为实体属性名）
+        :param label: label 前缀，每块的 label 为 {label}_{序号}；为空时自动生成
+        :param columns: 导入的实体属性，默认全部列，未设置的值导入为 NULL
+        :param fmt: csv / json，默认 config.format
+        """
+        _fmt = fmt or self.config.format
+        if _fmt not in ('csv', 'json'):
+            raise ValueError(f"不支持的 Stream Load 格式: {_fmt}")
+        table = cls.__table__.name
+        _label = label or f'{self.config.label_prefix}_{table}_{uuid.uuid4().hex}'
+        _columns = _load_columns(cls, columns)
+        report = StreamLoadReport(label=_label)
+        start = time.perf_counter()
+        for i, (body, count) in enumerate(self._chunks(rows, _columns, _fmt)):
+            result = self.load_chunk(table, body, f'{_label}_{i}', [name for _, name in _columns], _fmt)
+            report.results.append(result)
+            report.chunks += 1
+            report.bytes += len(body)
+            # label 已存在时没有行数，按本块的行数计
+            report.rows += count if result.existing else result.loaded_rows
+            report.filtered_rows += result.filtered_rows
+        report.elapsed = time.perf_counter() - start
+        logger.info(f"Stream load {table}: {report.rows} rows / {report.chunks} chunks / {report.bytes} bytes "
+                    f"in {report.elapsed:.3f}s ({report.rows_per_sec:.0f} rows/s), label {_label}")
+        return report
+
+    def _chunks(self, rows: Iterable, columns: List[Tuple[str, str]], fmt: str) -> Iterator[Tuple[bytes, int]]:
+        keys = [key for key, _ in columns]
+        names = [name for _, name in columns]
+        parts: List[bytes] = []
+        size = 0
+        for row in rows:
+            values = _values(row, keys)
+            line = (_encode_csv(values) if fmt == 'csv' else _encode_json(names, values)).encode('utf-8')
+            parts.append(line)
+            size += len(line)
+            if size >= self.config.chunk_bytes:
+                yield b''.join(parts), len(parts)
+                parts, size = [], 0
+        if parts:
+            yield b''.join(parts), len(parts)
+
+    def _headers(self, label: str, names: Sequence[str], fmt: str, length: int) -> dict:
+        headers = {
+            'Authorization': self._authorization,
+            'Expect': '100-continue',
+            'Content-Length': str(length),
+            'label': label,
+            'format': fmt,
+            'columns': ','.join(f'`{name}`' for name in names),
+            'max_filter_ratio': str(self.config.max_filter_ratio),
+        }
+        if fmt == 'csv':
+            headers.update(column_separator='\\x01', line_delimiter='\\x02')
+        else:
+            headers.update(read_json_by_line='true')
+        headers.update({k: str(v) for k, v in self.config.properties.items()})
+        return headers
+
+    def load_chunk(self, table: str, body: bytes, label: str, names: Sequence[str], fmt: str = 'csv') -> StreamLoadResult:
+        """
+        以指定 label 导入一块已序列化的数据，网络错误时以相同 label 重试
+        """
+        path = f'/api/{urllib.parse.quote(self.config.database)}/{urllib.parse.quote(table)}/_stream_load'
+        headers = self._headers(label, names, fmt, len(body))
+        attempt = 0
+        while True:
+            try:
+                status, data = self._request('PUT', path, body, headers)
+                break
+            except (OSError, http.client.HTTPException) as e:
+                attempt += 1
+                if attempt > self.config.max_retries:
+                    raise StreamLoadError(f"Stream load {label} 请求失败: {e}") from e
+                logger.warning(f"Stream load {label} 请求失败，第 {attempt} 次重试: {e}")
+                time.sleep(self.config.retry_backoff * attempt)
+        if status != 200:
+            raise StreamLoadError(f"Stream load {label} HTTP {status}: {data[:500].decode('utf-8', 'replace')}")
+        try:
+            body_json = json.loads(data)
+        except ValueError as e:
+            raise StreamLoadError(f"Stream load {label} 返回无法解析: {data[:500].decode('utf-8', 'replace')}") from e
+        result = StreamLoadResult.parse(label, body_json)
+        if result.status == 'Label Already Exists':
+            return self._existing(result, body_json.get('ExistingJobStatus'))
+        if result.error_url and (result.filtered_rows or result.status not in _SUCCESS):
+            result.error_rows = self._error_rows(result.error_url)
+        if result.status not in _SUCCESS:
+            raise StreamLoadError(f"Stream load {label} 失败: {result.status} {result.message} "
+                                  f"{result.error_rows[:3]}", result)
+        if result.filtered_rows:
+            logger.warning(f"Stream load {label}: {result.filtered_rows} rows filtered, "
+                           f"errors: {result.error_rows[:3]} ({result.error_url})")
+        return result
+
+    def _existing(self, result: StreamLoadResult, job_status: Optional[str]) -> StreamLoadResult:
+        """
+        label 已存在：此前的请求已经导入（如响应丢失后重试），已完成时视为成功，进行中时等待完成
+        """
+        deadline = time.monotonic() + self.config.timeout
+        while job_status not in _EXISTING_SUCCESS:
+            if job_status not in (None, 'RUNNING', 'PREPARE', 'PRECOMMITTED', 'UNKNOWN') or time.monotonic() > deadline:
+                raise StreamLoadError(f"Stream load label {result.label} 已存在，状态 {job_status}", result)
+            time.sleep(self.config.retry_backoff)
+            job_status = self.load_state(result.label)
+        logger.info(f"Stream load label {result.label} already exists ({job_status}), skipped")
+        result.status, result.existing = 'Success', True
+        return result
+
+    def load_state(self, label: str) -> Optional[str]:
+        """
+        查询 label 对应导入任务的状态（PREPARE / COMMITTED / VISIBLE / ABORTED / UNKNOWN）
+        """
+        path = f'/api/{urllib.parse.quote(self.config.database)}/get_load_state?label={urllib.parse.quote(label)}'
+        status, data = self._request('GET', path, None, {'Authorization': self._authorization})
+        if status != 200:
+            return None
+        return json.loads(data).get('data')
+
+    def _error_rows(self, url: str) -> List[str]:
+        try:
+            status, data = self._request('GET', url, None, {})
+        except (OSError, http.client.HTTPException) as e:
+            logger.warning(f"Failed to fetch stream load errors {url}: {e}")
+            return []
+        if status != 200:
+            return []
+        lines = data.decode('utf-8', 'replace').splitlines()
+        return [line for line in lines if line][:self.config.max_error_rows]
+
+    def _request(self, method: str, url: str, body: Optional[bytes], headers: dict,
+                 max_redirects: int = 3) -> Tuple[int, bytes]:
+        """
+        发送请求并跟随重定向（FE 会将 Stream Load 重定向到 BE），重定向后保留认证头
+        :param url: 完整 URL，或相对于 FE 地址的路径
+        """
+        parts = urllib.parse.urlsplit(url)
+        scheme, host, port = parts.scheme or self.config.scheme, parts.hostname or self.config.host, parts.port
+        port = port or (self.config.port if not parts.hostname else None)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        for _ in range(max_redirects + 1):
+            conn_cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = conn_cls(host, port, timeout=self.config.timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            finally:
+                conn.close()
+            location = response.getheader('Location')
+            if response.status not in _REDIRECTS or not location:
+                return response.status, data
+            redirect = urllib.parse.urlsplit(location)
+            scheme, host, port = redirect.scheme or scheme, redirect.hostname or host, redirect.port
+            path = redirect.path + (f'?{redirect.query}' if redirect.query else '')
+        raise StreamLoadError(f"Stream load 重定向次数过多: {url}")
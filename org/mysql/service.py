@@ -3,17 +3,18 @@ from __future__ import annotations
 from .entities import *
 from org.service import IService, T
 from org.common.iexception import IException
-from org.dao.mysql import mysql_engine
+from org.dao.cache import Cache, LRUCache
+from org.dao import mysql  # noqa: F401 注册 mysql 引擎
 
 
 class MysqlBaseService(IService[T]):
-    def __init__(self):
-        super().__init__(db_engine=mysql_engine)
+    def __init__(self, entity_cache: Cache = None, coalesce_ms: float = None):
+        super().__init__(db_engine='mysql', entity_cache=entity_cache, coalesce_ms=coalesce_ms)
 
 class FileService(MysqlBaseService[File]):
     entity_cls = File
 
-file_service = FileService()
+file_service = FileService(entity_cache=LRUCache(maxsize=4096, ttl=60, negative_ttl=5))
 
 
 def list_files(user_id: int | None = None) -> list[File]:
@@ -2,12 +2,12 @@ from __future__ import annotations
 
 from .entities import *
 from org.service import IService, T
-from org.dao.pgsql import pgsql_engine
+from org.dao import pgsql  # noqa: F401 注册 pgsql 引擎
 
 
 class PgsqlBaseService(IService[T]):
     def __init__(self):
-        super().__init__(db_engine=pgsql_engine)
+        super().__init__(db_engine='pgsql')
 
 
 class FileService(PgsqlBaseService[File]):
@@ -1,98 +1,324 @@
-from typing import Generic, Type, TypeVar, Callable
+from __future__ import annotations
+
+import contextlib
+import functools
+import time
+from typing import Generic, Type, TypeVar, Callable, Iterator, Iterable, Optional
+
+from loguru import logger
+from sqlalchemy.sql.elements import OperatorExpression
 
 from ..common.ierrors import ErrorCodes
 from ..common.iexception import IException
-from ..dao import Page
-from ..dao.engine import DbEngine
-from ..dao.mysql import mysql_engine
-from ..dao.pgsql import pgsql_engine
+from ..dao import Page, SaveResult
+from ..dao.cache import Cache, MISSING
+from ..dao.columnar import ColumnarResult
+from ..dao.export import ExportResult
+from ..dao.columns import get_column_meta
+from ..dao.engine import DbEngine, to_row, READ_ONLY_SQL
+from ..dao.replica import use_primary, is_pinned
+from ..dao.loader import BatchLoader, AsyncBatchLoader
+from ..dao.uow import current_uow, unit_of_work
+from ..dao.purge import purge_job
+from ..dao.async_engine import AsyncDbEngine
+from ..dao.registry import registry
+from ..dao.metrics import SERVICE_SECONDS
+from ..dao import mysql  # noqa: F401 注册默认的 mysql 引擎
 
 T = TypeVar('T')
 
 
-class IService(Generic[T]):
+def _routable(func):
+    """
+    读方法支持 force_primary=True：本次查询不走只读副本，直接读主库
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if kwargs.pop('force_primary', False):
+            with use_primary():
+                return func(self, *args, **kwargs)
+        return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _metric_labels(service) -> tuple:
+    entity_cls = getattr(service, 'entity_cls', None)
+    return service.db_engine.name, entity_cls.__table__.name if entity_cls is not None else ''
+
+
+def _timed(func):
+    """
+    记录方法耗时，见 /metrics 的 db_service_seconds
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            SERVICE_SECONDS.observe(time.perf_counter() - start, *_metric_labels(self), func.__name__)
+
+    return wrapper
+
+
+def _async_timed(func):
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            SERVICE_SECONDS.observe(time.perf_counter() - start, *_metric_labels(self), func.__name__)
+
+    return wrapper
+
+
+class _EntityCacheMixin:
+    """
+    get_by_id 读穿透缓存与写操作后的失效，同步与异步服务共用；两者共用同一个缓存时任一侧写入都会使其失效
+    """
+    entity_cache: Optional[Cache] = None
+
+    def _evict(self, *ids):
+        if self.entity_cache is None:
+            return
+        for eid in ids:
+            self.entity_cache.invalidate(eid)
+        uow = current_uow()
+        if uow is not None:
+            # 工作单元结束前读到的可能是未提交的数据，结束后再失效一次
+            uow.on_finish(lambda: [self.entity_cache.invalidate(eid) for eid in ids])
+
+    def _evict_all(self):
+        if self.entity_cache is None:
+            return
+        self.entity_cache.clear()
+        uow = current_uow()
+        if uow is not None:
+            uow.on_finish(self.entity_cache.clear)
+
+    def _evict_sql(self, sql: str):
+        # 无法确定 SQL 影响的行，非只读语句清空缓存
+        if not READ_ONLY_SQL.match(sql):
+            self._evict_all()
+
+    def cache_stats(self) -> dict:
+        """
+        实体缓存命中统计
+        """
+        return self.entity_cache.stats() if self.entity_cache is not None else {}
+
+
+class IService(_EntityCacheMixin, Generic[T]):
     entity_cls: Type[T]
-    db_engine: DbEngine
 
-    def __init__(self, db_engine: DbEngine = None):
-        self.db_engine = db_engine
-        if not self.db_engine:
-            self.db_engine = mysql_engine
+    def __init__(self, db_engine: DbEngine | str = None, entity_cache: Cache = None, coalesce_ms: float = None):
+        # 传入引擎名时在首次使用才从 registry 创建引擎，导入模块时不建连接池
+        self._db_engine = db_engine or 'mysql'
+        # get_by_id 读穿透缓存，写操作自动失效；缓存的实体为共享对象，调用方不要修改
+        self.entity_cache = entity_cache
+        # 设置时并发线程的 get_by_id 在 coalesce_ms 毫秒内合并为一次 IN 查询
+        self.loader = BatchLoader(self._load_by_ids, window=coalesce_ms / 1000) if coalesce_ms else None
+        # 实体有逻辑删除列时由后台任务定期清理已删除的行，见 org.dao.purge
+        if getattr(getattr(self, 'entity_cls', None), '__soft_delete__', None):
+            purge_job.register(self)
+
+    @property
+    def db_engine(self) -> DbEngine:
+        if isinstance(self._db_engine, str):
+            self._db_engine = registry.get(self._db_engine)
+        return self._db_engine
 
+    @db_engine.setter
+    def db_engine(self, db_engine: DbEngine | str):
+        self._db_engine = db_engine
+
+    @_timed
+    @_routable
     def list_by_args(self, *args, **kwargs) -> list[T]:
         results = self.db_engine.select_list(self.entity_cls, *args, **kwargs)
         return results
 
+    @_timed
+    @_routable
+    def columnar_by_args(self, *args, **kwargs) -> ColumnarResult:
+        """
+        列式查询：列名 -> 数组，适合统计分析，配合 org.dao.columnar.group_by 等使用
+        """
+        return self.db_engine.select_columnar(self.entity_cls, *args, **kwargs)
+
+    def iter_by_args(self, *args, batch_size: int = None, **kwargs) -> Iterator[T]:
+        """
+        流式查询，适合扫描大表
+        """
+        return self.db_engine.iter_list(self.entity_cls, *args, batch_size=batch_size, **kwargs)
+
+    def export_by_args(self, sink, *args, fmt: str = None, batch_size: int = None, **kwargs) -> ExportResult:
+        """
+        按条件流式导出为 Arrow IPC / Parquet / CSV 文件，见 DbEngine.export
+        """
+        return self.db_engine.export_list(self.entity_cls, sink, *args, fmt=fmt, batch_size=batch_size, **kwargs)
+
+    def iter_export_by_args(self, *args, fmt: str = 'parquet', batch_size: int = None, **kwargs) -> Iterator[bytes]:
+        """
+        按条件流式导出为字节块迭代器，用于 HTTP 流式下载
+        """
+        return self.db_engine.iter_export_list(self.entity_cls, *args, fmt=fmt, batch_size=batch_size, **kwargs)
+
+    def iter_export_sql(self, sql: str, fmt: str = 'parquet', params=None, batch_size: int = None) -> Iterator[bytes]:
+        return self.db_engine.iter_export(sql, fmt=fmt, params=params, batch_size=batch_size)
+
+    @_timed
+    @_routable
     def get_one(self, *args, **kwargs):
         return self.db_engine.select_one(self.entity_cls, *args, **kwargs)
 
+    @_timed
+    @_routable
     def count_by_args(self, *args, **kwargs) -> int:
         return self.db_engine.select_count(self.entity_cls, *args, **kwargs)
 
     def exist_by_args(self, *args, **kwargs) -> bool:
         return self.count_by_args(*args, **kwargs) > 0
 
+    @_timed
+    @_routable
     def page(self, *args, **kwargs) -> Page:
         ...
         """
         分页查询
+        传入 cursor 或 keyset=True 时使用游标分页，见 DbEngine.seek_page
+        count 指定总数计算方式（exact / none / cached / estimate / window），见 DbEngine.page
         """
         return self.db_engine.page(self.entity_cls, *args, **kwargs)
 
+    @_timed
+    @_routable
     def get_by_id(self, eid: int, **kwargs) -> T:
         """
         查询 by id
         """
         if not eid:
             return None
-        return self.db_engine.select_by_id(cls=self.entity_cls, eid=eid, **kwargs)
+        # 指定查询列时结果不完整，不走缓存
+        if kwargs:
+            return self.db_engine.select_by_id(cls=self.entity_cls, eid=eid, **kwargs)
+        if self.entity_cache is None:
+            return self._load_by_id(eid)
+        entity = self.entity_cache.get(eid)
+        if entity is MISSING:
+            # 加载期间被写操作失效时不写入缓存
+            version = self.entity_cache.version()
+            entity = self._load_by_id(eid)
+            self.entity_cache.put(eid, entity, version=version)
+        return entity
+
+    @_timed
+    @_routable
+    def get_by_ids(self, ids: Iterable[int], chunk_size: int = None, **kwargs) -> list[Optional[T]]:
+        """
+        按 id 批量查询，分批 IN (...) 查询，实体缓存中已有的 id 不再查询
+        返回与 ids 顺序一致的列表，不存在的 id 对应 None
+        """
+        ids = list(ids)
+        if self.entity_cache is None or kwargs:
+            return self.db_engine.select_by_ids(self.entity_cls, ids, chunk_size=chunk_size, **kwargs)
+        found, missing = {}, []
+        for eid in dict.fromkeys(ids):
+            if not eid:
+                continue
+            entity = self.entity_cache.get(eid)
+            if entity is MISSING:
+                missing.append(eid)
+            else:
+                found[eid] = entity
+        if missing:
+            version = self.entity_cache.version()
+            for eid, entity in zip(missing, self.db_engine.select_by_ids(self.entity_cls, missing, chunk_size=chunk_size)):
+                self.entity_cache.put(eid, entity, version=version)
+                found[eid] = entity
+        return [found.get(eid) for eid in ids]
+
+    def _load_by_id(self, eid: int) -> Optional[T]:
+        # 合并查询由其他线程执行，读自己写入（主库固定 / 工作单元中已写）时不合并
+        if self.loader is None or is_pinned(self.db_engine.name):
+            return self.db_engine.select_by_id(cls=self.entity_cls, eid=eid)
+        uow = current_uow()
+        if uow is not None and uow.has(self.db_engine):
+            return self.db_engine.select_by_id(cls=self.entity_cls, eid=eid)
+        return self.loader.load(eid)
 
+    def _load_by_ids(self, ids: list) -> list:
+        return self.db_engine.select_by_ids(self.entity_cls, ids)
+
+    @_timed
+    @_routable
     def select(self, _colexpr, filters=None):
         return self.db_engine.exec_select(_colexpr, filters)
 
+    @_timed
     def save(self, entity: T):
         """
-        保存
+        保存：无主键时插入；有主键时不先查询是否存在，只写入实体的非空字段
+        - 插入所需的字段齐全时，一条 upsert 语句完成插入或更新（MySQL ON DUPLICATE KEY UPDATE /
+          PostgreSQL、SQLite ON CONFLICT / Doris Unique Key）
+        - 只有部分字段时无法作为新行插入（NOT NULL 约束在冲突判断前检查），只按主键 UPDATE（见 update_by_id），
+          主键不存在时抛出 DATA_NOT_EXIST；新建记录需传入插入所需的全部字段
         """
         if not entity:
             raise IException(error=ErrorCodes.DATA_NOT_EXIST)
-        # if hasattr(entity, 'update_time'):
-        #     setattr(entity, 'update_time', datetime.now())
-        # mysql
-        # if entity.id:
-        #     # # 更新操作，不能更新创建人和创建时间
-        #     # if hasattr(entity, 'create_by'):
-        #     #     setattr(entity, 'create_by', None)
-        #     # if hasattr(entity, 'create_time'):
-        #     #     setattr(entity, 'create_time', None)
-        #     affected_rows = self.db_engine.update_by_id(entity)
-        #     if affected_rows == 1:
-        #         return True
-        #     else:
-        #         raise IException(error=ErrorCodes.DB_ERROR)
-        # else:
-        #     # if hasattr(entity, 'create_time'):
-        #     #     setattr(entity, 'create_time', datetime.now())
-        #     self.db_engine.insert(entity)
-        #     if entity.id:
-        #         return True
-        #     else:
-        #         raise IException(error=ErrorCodes.DB_ERROR)
-        # doris
-        if entity.id:
-            # 判断是否存在该id
-            old = self.db_engine.select_by_id(cls=self.entity_cls, eid=entity.id)
-            if old:
-                self.db_engine.update_by_id(entity)
-            else:
-                self.db_engine.insert(entity)
-        else:
+        if not entity.id:
             self.db_engine.insert(entity)
+        else:
+            meta = get_column_meta(self.entity_cls)
+            row = to_row(self.entity_cls, entity)
+            update_columns = [key for key in row if key not in meta.primary_key]
+            if update_columns and meta.required_columns.issubset(row):
+                self.db_engine.upsert(self.entity_cls, [row], update_columns=update_columns)
+            elif self.db_engine.update_by_id(entity) == 0:
+                raise IException(error=ErrorCodes.DATA_NOT_EXIST)
+        self._evict(entity.id)
         if entity.id:
             return True
         else:
             raise IException(error=ErrorCodes.DB_ERROR)
 
+    @_timed
+    def save_all(self, entities: list[T], chunk_size: int = None) -> SaveResult:
+        """
+        批量保存：一次 IN 查询区分新增与已存在的主键，新增的走 bulk insert，已存在的按主键 bulk update
+        不在工作单元中时开启一个，查询与写入在同一事务中（Doris 的显式事务不支持查询，各自提交）
+        """
+        if not entities:
+            raise IException(error=ErrorCodes.DATA_NOT_EXIST)
+        start = time.perf_counter()
+        result = SaveResult()
+        own_uow = current_uow() is None and self.db_engine.get_dialect() != 'doris'
+        with unit_of_work() if own_uow else contextlib.nullcontext():
+            existing = self.db_engine.select_existing_ids(self.entity_cls, [e.id for e in entities])
+            new = [e for e in entities if e.id is None or e.id not in existing]
+            old = [e for e in entities if e.id is not None and e.id in existing]
+            if new:
+                inserted = self.db_engine.bulk_insert(self.entity_cls, new, chunk_size=chunk_size)
+                result.inserted, result.chunks = inserted.rows, result.chunks + inserted.chunks
+            if old:
+                updated = self.db_engine.bulk_update(self.entity_cls, old, chunk_size=chunk_size)
+                result.updated, result.chunks = updated.rows, result.chunks + updated.chunks
+        result.rows = result.inserted + result.updated
+        result.elapsed = time.perf_counter() - start
+        ids = [e.id for e in entities]
+        if None in ids:
+            self._evict_all()
+        else:
+            self._evict(*ids)
+        logger.info(f"Save {self.entity_cls.__name__}: {result.inserted} inserted / {result.updated} updated "
+                    f"in {result.elapsed:.3f}s ({result.rows_per_sec:.0f} rows/s)")
+        return result
+
+    @_timed
     def insert(self, entity: T):
         """
         保存
@@ -104,23 +330,34 @@ class IService(Generic[T]):
         # if not entity.create_time:
         #     entity.create_time = datetime.now()
         self.db_engine.insert(entity)
+        self._evict(entity.id)
         if entity.id:
             return True
         else:
             raise IException(error=ErrorCodes.DB_ERROR)
 
-    def insert_entities(self, entities: list[T]) -> bool:
+    @_timed
+    def insert_entities(self, entities: list[T], chunk_size: int = None, return_ids: bool = False) -> bool:
         """
-        批量插入
+        批量插入，按 chunk_size 分批走 bulk insert
         """
         if not entities:
             raise IException(error=ErrorCodes.DATA_NOT_EXIST)
-        row = self.db_engine.insert_batch(entities)
-        if row > 0:
+        result = self.db_engine.bulk_insert(self.entity_cls, entities,
+                                            chunk_size=chunk_size,
+                                            return_ids=return_ids)
+        # 清除这些 id 的负缓存；主键未知时无法定位，清空缓存
+        ids = [entity.id for entity in entities]
+        if None in ids:
+            self._evict_all()
+        else:
+            self._evict(*ids)
+        if result.rows > 0:
             return True
         else:
             return False
 
+    @_timed
     def update_by_id(self, entity: T) -> bool:
         """
         更新
@@ -131,10 +368,23 @@ class IService(Generic[T]):
         if not id:
             return False
         count = self.db_engine.update_by_id(entity=entity)
+        self._evict(id)
         if count != 1:
             raise IException(error=ErrorCodes.DB_ERROR)
         return True
 
+    @_timed
+    def update_entities(self, entities: list[T], chunk_size: int = None) -> bool:
+        """
+        按主键批量更新，只写入各实体变更的字段，相同列集合的实体合并为一次 executemany
+        """
+        if not entities:
+            raise IException(error=ErrorCodes.DATA_NOT_EXIST)
+        result = self.db_engine.bulk_update(self.entity_cls, entities, chunk_size=chunk_size)
+        self._evict(*[e['id'] if isinstance(e, dict) else e.id for e in entities])
+        return result.rows > 0
+
+    @_timed
     def update(self, entity: T, *args, **kwargs) -> bool:
         """
         更新
@@ -142,6 +392,7 @@ class IService(Generic[T]):
         if not entity:
             return False
         self.db_engine.update(entity, *args, **kwargs)
+        self._evict_all()
         return True
 
     def upsert(self, value: dict, **kwargs):
@@ -150,47 +401,280 @@ class IService(Generic[T]):
         """
         return self.upsert_values(values=[value], **kwargs)
 
+    @_timed
     def upsert_values(self, values: list, **kwargs):
         """
-        ON DUPLICATE KEY UPDATE方式写入
+        upsert方式批量写入，按数据库方言生成语句（MySQL ON DUPLICATE KEY / PostgreSQL ON CONFLICT / Doris Unique Key）
         """
         if not values:
             raise IException(error=ErrorCodes.DATA_NOT_EXIST)
-        count = self.db_engine.upsert(cls=self.entity_cls, values=values, **kwargs)
-        if count > 0:
+        result = self.db_engine.upsert(cls=self.entity_cls, values=values, **kwargs)
+        # 可能按唯一键命中已有记录，无主键时无法定位，清空缓存
+        ids = [value.get('id') for value in values]
+        if None in ids:
+            self._evict_all()
+        else:
+            self._evict(*ids)
+        if result.rows > 0:
             return True
         else:
             return False
 
+    @_timed
     def delete_by_id(self, id):
         """
-        逻辑删除
+        逻辑删除，一条 UPDATE，不存在或已删除时抛出 DATA_NOT_EXIST
         """
         if not id:
             return
-        old = self.db_engine.select_by_id(cls=self.entity_cls, eid=id)
-        if not old:
+        count = self.soft_delete([id])
+        if count == 0:
             raise IException(error=ErrorCodes.DATA_NOT_EXIST)
-        count = self.db_engine.update_by_id(self.entity_cls(id=id, is_delete=True))
-        return True if count == 1 else False
+        return True
+
+    @_timed
+    def soft_delete(self, ids: Iterable[int] = None, *args, chunk_size: int = None, **kwargs) -> int:
+        """
+        批量逻辑删除：按主键列表或过滤条件一条 UPDATE ... SET is_delete = 1，见 DbEngine.soft_delete
+        soft_delete([1, 2, 3]) / soft_delete(user_id=1) / soft_delete(File.size > 0)
+        之后 select_* / page / count 默认不再返回这些行，with_deleted=True 时仍可查询
+        :return: 新标记为删除的行数
+        """
+        by_ids = ids is not None and not isinstance(ids, OperatorExpression)
+        if by_ids:
+            ids = list(ids)
+        count = self.db_engine.soft_delete(self.entity_cls, ids, *args, chunk_size=chunk_size, **kwargs)
+        if by_ids:
+            self._evict(*ids)
+        else:
+            self._evict_all()
+        return count
+
+    def purge_deleted(self, older_than: float = None, chunk_size: int = None,
+                      max_chunks: int = None, pause: float = 0) -> int:
+        """
+        分批物理删除已逻辑删除的行，见 DbEngine.purge_deleted，通常由后台任务 org.dao.purge.purge_job 调用
+        """
+        return self.db_engine.purge_deleted(self.entity_cls, older_than=older_than, chunk_size=chunk_size,
+                                            max_chunks=max_chunks, pause=pause)
 
+    @_timed
     def remove_by_id(self, id) -> bool:
         if not id:
             return False
         count = self.db_engine.remove_by_id(cls=self.entity_cls, eid=id)
+        self._evict(id)
         return True if count == 1 else False
 
+    @_timed
     def remove_by_args(self, *args, **kwargs) -> bool:
         _rows = self.db_engine.remove_by_args(self.entity_cls, *args, **kwargs)
+        self._evict_all()
         return _rows > 0
 
     def fetch_one(self, *args, **kwargs) -> bool:
         return self.db_engine.fetchone(self.entity_cls, *args, **kwargs)
 
     def execute(self, *args, **kwargs) -> bool:
-        return self.db_engine.exec(*args, **kwargs)
+        try:
+            return self.db_engine.exec(*args, **kwargs)
+        finally:
+            self._evict_all()
 
     def transaction(self, func: Callable):
-        return self.db_engine.transaction(func)
+        try:
+            return self.db_engine.transaction(func)
+        finally:
+            self._evict_all()
+
+    @_timed
     def exec_sql(self, sql: str, *args, **kwargs):
-        return self.db_engine.exec_sql(sql, *args, **kwargs)
+        try:
+            return self.db_engine.exec_sql(sql, *args, **kwargs)
+        finally:
+            self._evict_sql(sql)
+
+
+class AsyncIService(_EntityCacheMixin, Generic[T]):
+    """
+    IService 的异步版本，基于 AsyncDbEngine，不占用线程池
+    """
+    entity_cls: Type[T]
+
+    def __init__(self, db_engine: AsyncDbEngine | str, coalesce: bool = False, entity_cache: Cache = None):
+        self._db_engine = db_engine
+        # 为 True 时同一事件循环 tick 内的 get_by_id 合并为一次 IN 查询
+        self.loader = AsyncBatchLoader(self._load_by_ids) if coalesce else None
+        # get_by_id 读穿透缓存，写操作自动失效；与同一张表的 IService 共用时两边的写入都会使其失效
+        self.entity_cache = entity_cache
+
+    @property
+    def db_engine(self) -> AsyncDbEngine:
+        if isinstance(self._db_engine, str):
+            self._db_engine = registry.get(self._db_engine)
+        return self._db_engine
+
+    @db_engine.setter
+    def db_engine(self, db_engine: AsyncDbEngine | str):
+        self._db_engine = db_engine
+
+    @_async_timed
+    async def list_by_args(self, *args, **kwargs) -> list[T]:
+        return await self.db_engine.select_list(self.entity_cls, *args, **kwargs)
+
+    @_async_timed
+    async def columnar_by_args(self, *args, **kwargs) -> ColumnarResult:
+        return await self.db_engine.select_columnar(self.entity_cls, *args, **kwargs)
+
+    @_async_timed
+    async def get_one(self, *args, **kwargs):
+        return await self.db_engine.select_one(self.entity_cls, *args, **kwargs)
+
+    @_async_timed
+    async def count_by_args(self, *args, **kwargs) -> int:
+        return await self.db_engine.select_count(self.entity_cls, *args, **kwargs)
+
+    async def exist_by_args(self, *args, **kwargs) -> bool:
+        return await self.count_by_args(*args, **kwargs) > 0
+
+    @_async_timed
+    async def page(self, *args, **kwargs) -> Page:
+        """
+        分页查询
+        """
+        return await self.db_engine.page(self.entity_cls, *args, **kwargs)
+
+    @_async_timed
+    async def get_by_id(self, eid: int, **kwargs) -> T:
+        """
+        查询 by id
+        """
+        if not eid:
+            return None
+        if kwargs:
+            return await self.db_engine.select_by_id(cls=self.entity_cls, eid=eid, **kwargs)
+        if self.entity_cache is None:
+            return await self._load_by_id(eid)
+        entity = self.entity_cache.get(eid)
+        if entity is MISSING:
+            version = self.entity_cache.version()
+            entity = await self._load_by_id(eid)
+            self.entity_cache.put(eid, entity, version=version)
+        return entity
+
+    async def _load_by_id(self, eid: int) -> Optional[T]:
+        if self.loader is not None:
+            return await self.loader.load(eid)
+        return await self.db_engine.select_by_id(cls=self.entity_cls, eid=eid)
+
+    @_async_timed
+    async def get_by_ids(self, ids: Iterable[int], chunk_size: int = None, **kwargs) -> list[Optional[T]]:
+        """
+        按 id 批量查询，返回与 ids 顺序一致的列表，不存在的 id 对应 None
+        """
+        return await self.db_engine.select_by_ids(self.entity_cls, ids, chunk_size=chunk_size, **kwargs)
+
+    async def _load_by_ids(self, ids: list) -> list:
+        return await self.db_engine.select_by_ids(self.entity_cls, ids)
+
+    @_async_timed
+    async def insert(self, entity: T):
+        """
+        保存
+        """
+        if not entity:
+            raise IException(error=ErrorCodes.DATA_NOT_EXIST)
+        await self.db_engine.insert(entity)
+        self._evict(entity.id)
+        if entity.id:
+            return True
+        else:
+            raise IException(error=ErrorCodes.DB_ERROR)
+
+    @_async_timed
+    async def insert_entities(self, entities: list[T]) -> bool:
+        """
+        批量插入
+        """
+        if not entities:
+            raise IException(error=ErrorCodes.DATA_NOT_EXIST)
+        row = await self.db_engine.insert_batch(entities)
+        # 清除这些 id 的负缓存
+        self._evict(*[entity.id for entity in entities])
+        return row > 0
+
+    @_async_timed
+    async def update_by_id(self, entity: T) -> bool:
+        """
+        更新
+        """
+        if not entity or not entity.id:
+            return False
+        count = await self.db_engine.update_by_id(entity=entity)
+        self._evict(entity.id)
+        if count != 1:
+            raise IException(error=ErrorCodes.DB_ERROR)
+        return True
+
+    async def upsert(self, value: dict, **kwargs):
+        """
+        upsert方式写入
+        """
+        return await self.upsert_values(values=[value], **kwargs)
+
+    @_async_timed
+    async def upsert_values(self, values: list, **kwargs):
+        """
+        upsert方式批量写入，按数据库方言生成语句（MySQL ON DUPLICATE KEY / PostgreSQL ON CONFLICT / Doris Unique Key）
+        """
+        if not values:
+            raise IException(error=ErrorCodes.DATA_NOT_EXIST)
+        result = await self.db_engine.upsert(cls=self.entity_cls, values=values, **kwargs)
+        ids = [value.get('id') for value in values]
+        if None in ids:
+            self._evict_all()
+        else:
+            self._evict(*ids)
+        return result.rows > 0
+
+    @_async_timed
+    async def soft_delete(self, ids: Iterable[int] = None, *args, chunk_size: int = None, **kwargs) -> int:
+        """
+        批量逻辑删除，见 IService.soft_delete
+        """
+        by_ids = ids is not None and not isinstance(ids, OperatorExpression)
+        if by_ids:
+            ids = list(ids)
+        count = await self.db_engine.soft_delete(self.entity_cls, ids, *args, chunk_size=chunk_size, **kwargs)
+        if by_ids:
+            self._evict(*ids)
+        else:
+            self._evict_all()
+        return count
+
+    @_async_timed
+    async def remove_by_id(self, id) -> bool:
+        if not id:
+            return False
+        count = await self.db_engine.remove_by_id(cls=self.entity_cls, eid=id)
+        self._evict(id)
+        return count == 1
+
+    @_async_timed
+    async def remove_by_args(self, *args, **kwargs) -> bool:
+        _rows = await self.db_engine.remove_by_args(self.entity_cls, *args, **kwargs)
+        self._evict_all()
+        return _rows > 0
+
+    async def transaction(self, func: Callable):
+        try:
+            return await self.db_engine.transaction(func)
+        finally:
+            self._evict_all()
+
+    @_async_timed
+    async def exec_sql(self, sql: str, *args, **kwargs):
+        try:
+            return await self.db_engine.exec_sql(sql, *args, **kwargs)
+        finally:
+            self._evict_sql(sql)
@@ -0,0 +1,72 @@
+"""
+测试公共夹具：基于 SQLite 临时库构造 DbEngine / AsyncDbEngine 与 file 表测试数据
+"""
+import datetime
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from org.dao import BaseEntity  # noqa: E402
+from org.dao.engine import DbEngine, EngineConfig  # noqa: E402
+from org.mysql.entities import File, Base  # noqa: E402
+
+
+def make_file(i: int, **kwargs) -> File:
+    now = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=i)
+    values = dict(id=i, created_at=now, updated_at=now, user_id=i % 3, name=f"file_{i}.bin",
+                  size=i * 10, bucket="test", path=f"/test/{i}", upload_status=1)
+    values.update(kwargs)
+    return File(**values)
+
+
+def sqlite_config(path, **kwargs) -> EngineConfig:
+    return EngineConfig(name="test", protocol="sqlite", host=None, port=None, database=str(path), **kwargs)
+
+
+@pytest.fixture
+def config(tmp_path):
+    return sqlite_config(tmp_path / "test.db")
+
+
+@pytest.fixture
+def engine(config):
+    """
+    SQLite 临时库，file 表写入 10 条记录（id 1..10，user_id = id % 3）
+    """
+    _engine = DbEngine(config)
+    Base.metadata.create_all(_engine.get_engine())
+    BaseEntity.metadata.create_all(_engine.get_engine())
+    with _engine.get_session() as session:
+        session.add_all([make_file(i) for i in range(1, 11)])
+        session.commit()
+    yield _engine
+    _engine.get_engine().dispose()
+
+
+@pytest.fixture
+def async_engine(engine, config):
+    """
+    与 engine 同一个 SQLite 临时库的 AsyncDbEngine（aiosqlite）
+    """
+    from org.dao.async_engine import AsyncDbEngine
+    return AsyncDbEngine(config)
+
+
+@pytest.fixture
+def client(engine, config, monkeypatch):
+    """
+    应用的 TestClient，org.doris.service 的同步 / 异步服务指向 engine 所在的 SQLite 临时库（file 表与 Doris 实体同名）
+    """
+    from fastapi.testclient import TestClient
+    from org.dao.async_engine import AsyncDbEngine
+    from org.doris.service import file_service, async_file_service
+    async_engine = AsyncDbEngine(config)
+    monkeypatch.setattr(file_service, '_db_engine', engine)
+    monkeypatch.setattr(async_file_service, '_db_engine', async_engine)
+    file_service.entity_cache.clear()
+    import main
+    yield TestClient(main.app)
+    file_service.entity_cache.clear()
@@ -0,0 +1,42 @@
+"""
+测试用实体：Doc 继承 BaseEntity（自增主键、is_delete 逻辑删除列）
+"""
+from typing import Optional
+
+from sqlalchemy import BigInteger, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from org.dao import Base, BaseEntity
+from org.service import IService
+
+
+class Doc(BaseEntity):
+    __tablename__ = 'test_doc'
+    # SQLite 只有 INTEGER 主键才自增；主键非空时 bulk_insert(return_ids=True) 可按参数顺序 RETURNING
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True,
+                                    autoincrement=True, nullable=False)
+    title: Mapped[Optional[str]] = mapped_column(String(64))
+    owner: Mapped[Optional[int]] = mapped_column(Integer)
+
+
+class DocService(IService[Doc]):
+    entity_cls = Doc
+
+
+class Note(Base):
+    """
+    主键声明为可空的实体（与 BaseEntity 相同），bulk_insert(return_ids=True) 逐行 INSERT 获取主键
+    """
+    __tablename__ = 'test_note'
+    id: Mapped[Optional[int]] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    body: Mapped[Optional[str]] = mapped_column(String(64))
+
+
+class Setting(Base):
+    """
+    联合主键、主键列不叫 id 的实体
+    """
+    __tablename__ = 'test_setting'
+    scope: Mapped[str] = mapped_column(String(32), primary_key=True)
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    value: Mapped[Optional[str]] = mapped_column(String(64))
@@ -0,0 +1,45 @@
+import asyncio
+import datetime
+
+from sqlalchemy import delete, select, update
+
+from org.mysql.entities import File
+from org.service import AsyncIService
+
+
+class AsyncFileService(AsyncIService[File]):
+    entity_cls = File
+
+
+def test_exec_stmt_invalidates_result_cache(async_engine):
+    async def main():
+        assert await async_engine.select_count(File, cache_ttl=60) == 10
+        await async_engine.exec_stmt(delete(File).where(File.id > 8))
+        assert await async_engine.select_count(File, cache_ttl=60) == 8
+        await async_engine.exec_stmt(update(File).where(File.id == 1).values(name="renamed"))
+        assert [f.name for f in await async_engine.select_list(File, File.id == 1, cache_ttl=60)] == ["renamed"]
+        # SELECT 不使缓存失效
+        await async_engine.exec_stmt(select(File.id))
+        assert async_engine.result_cache.stats()['size'] > 0
+        await async_engine.dispose()
+    asyncio.run(main())
+
+
+def test_async_service_crud(async_engine):
+    service = AsyncFileService(async_engine)
+    now = datetime.datetime(2024, 2, 1)
+
+    async def main():
+        rows = await asyncio.gather(*[service.list_by_args(user_id=i % 3) for i in range(6)])
+        assert [len(r) for r in rows[:3]] == [3, 4, 3]
+        assert (await service.get_by_id(5)).name == "file_5.bin"
+        page = await service.page(user_id=1, page_num=2, page_size=2, order_by="id")
+        assert page.total == 4 and [f.id for f in page.records] == [4, 1]
+        assert await service.insert(File(id=100, created_at=now, updated_at=now, upload_status=0, name="x"))
+        assert await service.update_by_id(File(id=100, name="y"))
+        assert (await service.get_one(id=100)).name == "y"
+        assert await service.remove_by_id(100)
+        assert await service.remove_by_args(File.id > 8)
+        assert await service.count_by_args() == 8
+        await async_engine.dispose()
+    asyncio.run(main())
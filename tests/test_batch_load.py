@@ -0,0 +1,138 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from conftest import make_file
+from org.dao.cache import LRUCache
+from org.dao.loader import AsyncBatchLoader, BatchLoader
+from org.dao.replica import use_primary
+from org.mysql.entities import File
+from org.service import AsyncIService, IService
+
+
+class FileService(IService[File]):
+    entity_cls = File
+
+
+class AsyncFileService(AsyncIService[File]):
+    entity_cls = File
+
+
+@pytest.fixture
+def statements(engine):
+    stats = {'count': 0}
+    event.listen(engine.get_engine(), 'before_cursor_execute',
+                 lambda *args: stats.__setitem__('count', stats['count'] + 1))
+    return stats
+
+
+def ids(rows):
+    return [r.id if r is not None else None for r in rows]
+
+
+def test_select_by_ids_keeps_order_and_chunks(engine, statements):
+    engine.bulk_insert(File, [make_file(i) for i in range(11, 51)])
+    statements['count'] = 0
+    rows = engine.select_by_ids(File, [5, 3, 999, 5, None, 40, 1, 2, 4, 6, 7, 8, 9, 10], chunk_size=7)
+    assert ids(rows) == [5, 3, None, 5, None, 40, 1, 2, 4, 6, 7, 8, 9, 10]
+    # 去重后 12 个 id，每批 7 个
+    assert statements['count'] == 2
+    assert [(r.id, r.name) for r in engine.select_by_ids(File, [3, 4], columns=['name'])] == \
+        [(3, 'file_3.bin'), (4, 'file_4.bin')]
+
+
+def test_get_by_ids_reads_through_entity_cache(engine, statements):
+    service = FileService(engine, entity_cache=LRUCache())
+    assert ids(service.get_by_ids([1, 2, 999])) == [1, 2, None]
+    assert statements['count'] == 1
+    assert ids(service.get_by_ids([2, 1, 999, 3])) == [2, 1, None, 3]
+    # 只查询未命中的 3
+    assert statements['count'] == 2
+
+
+def test_concurrent_get_by_id_coalesced(engine, statements):
+    service = FileService(engine, coalesce_ms=20)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, service.get_by_id(i))) for i in range(1, 11)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert {i: r.id for i, r in results.items()} == {i: i for i in range(1, 11)}
+    assert service.loader.stats()['loads'] == 10
+    assert statements['count'] == service.loader.stats()['batches'] < 10
+    # 读主库时不合并
+    with use_primary():
+        assert service.get_by_id(3).id == 3
+    assert service.loader.stats()['loads'] == 10
+
+
+def test_batch_loader_dedups_and_propagates_errors():
+    calls = []
+
+    def batch_fn(keys):
+        calls.append(keys)
+        if 'bad' in keys:
+            raise ValueError('bad')
+        return [k * 2 for k in keys]
+
+    loader = BatchLoader(batch_fn, window=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda k=k: results.append(loader.load(k))) for k in (1, 2, 2, 3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == [2, 4, 4, 6]
+    assert sorted(calls[0]) == [1, 2, 3] and len(calls) == 1
+    with pytest.raises(ValueError):
+        loader.load('bad')
+
+
+def test_async_loader_coalesces_same_tick(engine, async_engine):
+    service = AsyncFileService(async_engine, coalesce=True)
+
+    async def main():
+        rows = await asyncio.gather(*[service.get_by_id(i) for i in (1, 2, 3, 3, 999)])
+        by_ids = await service.get_by_ids([3, 999, 1])
+        await async_engine.dispose()
+        return rows, by_ids
+
+    rows, by_ids = asyncio.run(main())
+    assert ids(rows) == [1, 2, 3, 3, None] and ids(by_ids) == [3, None, 1]
+    assert service.loader.stats()['batches'] == 1 and service.loader.stats()['loads'] == 5
+
+
+def test_async_batch_loader_max_batch():
+    batches = []
+
+    async def batch_fn(keys):
+        batches.append(keys)
+        return keys
+
+    async def main():
+        loader = AsyncBatchLoader(batch_fn, max_batch=2)
+        return await asyncio.gather(*[loader.load(k) for k in range(5)])
+
+    assert asyncio.run(main()) == list(range(5))
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_async_batch_loader_cancelled_batch_wakes_waiters():
+    async def batch_fn(keys):
+        if 0 in keys:
+            raise asyncio.CancelledError()
+        return keys[:1]
+
+    async def main():
+        loader = AsyncBatchLoader(batch_fn)
+        cancelled = await asyncio.wait_for(asyncio.gather(loader.load(0), loader.load(1), return_exceptions=True), 1)
+        short = await asyncio.wait_for(asyncio.gather(loader.load(2), loader.load(3), return_exceptions=True), 1)
+        return cancelled, short
+
+    cancelled, short = asyncio.run(main())
+    assert all(isinstance(r, asyncio.CancelledError) for r in cancelled)
+    # 结果个数与 key 不一致时所有等待者都得到异常
+    assert all(isinstance(r, ValueError) for r in short)
@@ -0,0 +1,41 @@
+from models import Doc, Note
+from conftest import make_file
+
+from org.dao.engine import to_row
+from org.mysql.entities import File
+
+
+def test_return_ids_in_parameter_order(engine):
+    rows = [dict(title=f"t{i}", owner=i) for i in range(7)]
+    result = engine.bulk_insert(Doc, rows, chunk_size=3, return_ids=True)
+    assert result.rows == 7 and result.chunks == 3
+    assert result.ids == sorted(result.ids) and len(set(result.ids)) == 7
+    # 回填的主键与参数顺序一致
+    for row, _id in zip(rows, result.ids):
+        assert row["id"] == _id
+        assert engine.select_one(Doc, Doc.id == _id).owner == row["owner"]
+
+
+def test_return_ids_fills_entities(engine):
+    entities = [Doc(title=f"e{i}", owner=100 + i) for i in range(4)]
+    result = engine.bulk_insert(Doc, entities, return_ids=True)
+    assert [e.id for e in entities] == result.ids
+    assert [engine.select_one(Doc, Doc.id == e.id).owner for e in entities] == [100, 101, 102, 103]
+
+
+def test_without_return_ids(engine):
+    result = engine.bulk_insert(File, [make_file(i) for i in range(100, 105)])
+    assert result.rows == 5 and result.ids is None
+    assert engine.select_count(File) == 15
+
+
+def test_return_ids_with_nullable_primary_key(engine):
+    entities = [Note(body=f"n{i}") for i in range(5)]
+    result = engine.bulk_insert(Note, entities, chunk_size=2, return_ids=True)
+    assert result.ids == [e.id for e in entities] == sorted(result.ids)
+    assert [engine.select_one(Note, Note.id == e.id).body for e in entities] == [f"n{i}" for i in range(5)]
+
+
+def test_to_row_skips_unset_fields():
+    assert to_row(File, File(id=1, name="a")) == {"id": 1, "name": "a"}
+    assert to_row(File, {"id": 1, "name": None}) == {"id": 1}
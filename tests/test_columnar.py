@@ -0,0 +1,94 @@
+import asyncio
+import math
+from decimal import Decimal
+
+import pytest
+
+from conftest import make_file
+from org.dao import columnar
+from org.dao.columnar import column_sum, from_partitions, group_by
+from org.mysql.entities import File
+
+SQL = "SELECT user_id, size, name, id * 1.5 AS f FROM file WHERE id <= :n ORDER BY id"
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(columnar, "np", None)
+    elif columnar.np is None:
+        pytest.skip("numpy 未安装")
+    return request.param
+
+
+@pytest.fixture
+def engine20(engine):
+    engine.bulk_insert(File, [make_file(i) for i in range(11, 21)])
+    engine.exec_sql("UPDATE file SET size = NULL WHERE id = 7")
+    return engine
+
+
+def test_exec_sql_columnar(engine20, backend):
+    result = engine20.exec_sql(SQL, params={'n': 20}, columnar=True)
+    assert result.num_rows == 20 and list(result.keys()) == ['user_id', 'size', 'name', 'f']
+    assert list(result['user_id'])[:4] == [1, 2, 0, 1]
+    sizes = list(result['size'])
+    # 数值列中的 NULL 为 nan
+    assert math.isnan(sizes[6]) and sizes[:3] == [10, 20, 30]
+    assert list(result['name'])[:2] == ['file_1.bin', 'file_2.bin']
+    assert list(result.rows())[0] == (1, 10, 'file_1.bin', 1.5)
+
+
+def test_group_by_matches_sql(engine20, backend):
+    result = engine20.exec_sql(SQL, params={'n': 20}, columnar=True)
+    grouped = group_by(result, 'user_id', sums=['size', 'f'])
+    expected = engine20.exec_sql("SELECT user_id, count(*) AS c, sum(size) AS s, sum(id * 1.5) AS f "
+                                 "FROM file WHERE id <= 20 GROUP BY user_id ORDER BY user_id")
+    assert list(grouped['user_id']) == [r['user_id'] for r in expected]
+    assert list(grouped['count']) == [r['c'] for r in expected]
+    assert list(grouped['size']) == [r['s'] for r in expected]
+    assert list(grouped['f']) == [r['f'] for r in expected]
+    assert column_sum(result, 'size') == sum(r['s'] for r in expected)
+
+
+def test_decimal_columns_keep_precision(backend):
+    batches = [[(1, Decimal("0.10")), (2, Decimal("1E-20"))], [(1, Decimal("0.20")), (2, None)]]
+    result = from_partitions(["k", "amount"], batches)
+    # DECIMAL 不转为 float，NULL 保持为 None
+    assert list(result["amount"]) == [Decimal("0.10"), Decimal("1E-20"), Decimal("0.20"), None]
+    grouped = group_by(result, "k", sums=["amount"])
+    assert list(grouped["amount"]) == [Decimal("0.30"), Decimal("1E-20")]
+    assert column_sum(result, "amount") == Decimal("0.30") + Decimal("1E-20")
+
+
+def test_group_by_string_key(engine20, backend):
+    result = engine20.exec_sql(SQL, params={'n': 20}, columnar=True)
+    grouped = group_by(result, 'name', sums=['size'])
+    assert list(grouped['name'])[:3] == ['file_1.bin', 'file_10.bin', 'file_11.bin']
+    assert list(grouped['count'])[:3] == [1, 1, 1]
+
+
+def test_select_columnar_batches(engine20, backend):
+    result = engine20.select_columnar(File, File.id <= 10, columns=['id', 'bucket', 'size'], batch_size=3)
+    assert result.num_rows == 10 and list(result['id']) == list(range(1, 11))
+    assert list(result['bucket']) == ['test'] * 10
+
+
+def test_async_exec_sql_columnar(engine20, async_engine):
+    async def main():
+        result = await async_engine.exec_sql("SELECT id, size FROM file WHERE id < 5 ORDER BY id", columnar=True)
+        await async_engine.dispose()
+        return result
+
+    result = asyncio.run(main())
+    assert {k: list(v) for k, v in result.items()} == {'id': [1, 2, 3, 4], 'size': [10, 20, 30, 40]}
+
+
+def test_file_usage_by(engine20, monkeypatch):
+    from org.doris.service import file_service, file_usage_by
+    monkeypatch.setattr(file_service, '_db_engine', engine20)
+    usage = file_usage_by('user_id')
+    assert list(usage['user_id']) == [0, 1, 2]
+    assert list(usage['count']) == [6, 7, 7]
+    # id 7 的 size 为 NULL，与 SQL 的 sum 一样不计入
+    assert list(usage['size']) == [630, 630, 770]
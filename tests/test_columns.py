@@ -0,0 +1,36 @@
+import pytest
+
+from models import Doc, Setting
+from org.dao.columns import get_column_meta
+from org.dao.engine import parse_columns
+from org.mysql.entities import File
+
+
+def test_column_meta_is_built_once_per_entity():
+    assert get_column_meta(File) is get_column_meta(File)
+    meta = get_column_meta(File)
+    assert meta.keys[0] == "id" and meta.primary_key == ("id",)
+    assert meta.column_map["name"] is File.name
+
+
+def test_primary_key_and_required_columns():
+    assert get_column_meta(Setting).primary_key == ("scope", "name")
+    assert get_column_meta(Setting).update_columns == ("value",)
+    assert "is_delete" not in get_column_meta(Doc).required_columns
+    assert get_column_meta(Doc).soft_delete == "is_delete"
+    assert get_column_meta(File).soft_delete is None
+
+
+def test_parse_columns_select_and_exclude():
+    assert parse_columns(File, ["name", "id", "name"]) == [File.name, File.id]
+    assert File.path not in parse_columns(File, exclude_columns=["path"])
+    assert parse_columns(File, ["id", "path"], ["path"]) == [File.id]
+    assert len(parse_columns(File)) == len(get_column_meta(File).keys)
+    with pytest.raises(AttributeError):
+        parse_columns(File, ["missing"])
+
+
+def test_select_with_projection(engine):
+    rows = engine.select_list(File, user_id=1, columns=["id", "name"], order_by=File.id)
+    assert [r.id for r in rows] == [10, 7, 4, 1]
+    assert rows[0].name == "file_10.bin" and rows[0].size is None
@@ -0,0 +1,98 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from org.dao import deadline
+from org.dao.deadline import DeadlineExceeded
+from org.mysql.entities import File
+
+SLOW_SQL = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 50000000) SELECT count(*) FROM c"
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+
+def test_with_hint():
+    assert deadline.with_hint("SELECT a FROM t", "X(1)") == "SELECT /*+ X(1) */ a FROM t"
+    assert deadline.with_hint("select /*+ Y */ a FROM t", "X(1)") == "select /*+ X(1) Y */ a FROM t"
+    assert deadline.with_hint("UPDATE t SET a = 1", "X(1)") == "UPDATE t SET a = 1"
+    assert deadline._mysql(None, "SELECT 1", 1.2, None) == "SELECT /*+ MAX_EXECUTION_TIME(1200) */ 1"
+    assert deadline._doris(None, "SELECT 1", 1.2, None) == "SELECT /*+ SET_VAR(query_timeout = 2) */ 1"
+
+
+def test_postgresql_sets_statement_timeout_once_per_transaction():
+    cursor = FakeCursor()
+    context = SimpleNamespace(root_connection=SimpleNamespace(info={}))
+    deadline._postgresql(cursor, "SELECT 1", 10.0, context)
+    # 剩余时间变化不超过 10% 时沿用已设置的值
+    deadline._postgresql(cursor, "SELECT 1", 9.5, context)
+    deadline._postgresql(cursor, "SELECT 1", 9.2, context)
+    assert cursor.statements == ["SET LOCAL statement_timeout = 10000"]
+    deadline._postgresql(cursor, "SELECT 1", 8.0, context)
+    assert cursor.statements[-1] == "SET LOCAL statement_timeout = 8000"
+    # 事务结束后重新设置
+    context.root_connection.info.clear()
+    deadline._postgresql(cursor, "SELECT 1", 8.0, context)
+    assert len(cursor.statements) == 3
+
+
+def test_transaction_end_resets_statement_timeout(engine):
+    with engine.get_engine().connect() as conn:
+        conn.info[deadline._PG_TIMEOUT] = 1000
+        conn.execute(text("SELECT 1"))
+        conn.commit()
+        assert deadline._PG_TIMEOUT not in conn.info
+        conn.info[deadline._PG_TIMEOUT] = 1000
+        conn.execute(text("SELECT 1"))
+        conn.rollback()
+        assert deadline._PG_TIMEOUT not in conn.info
+
+
+def test_expired_deadline_skips_statement(engine):
+    with deadline.deadline(0.001, endpoint="test"):
+        time.sleep(0.01)
+        with pytest.raises(DeadlineExceeded):
+            engine.select_count(File)
+
+
+def test_sqlite_slow_query_is_interrupted(engine):
+    start = time.perf_counter()
+    with deadline.deadline(0.2, endpoint="test"):
+        with pytest.raises(DeadlineExceeded):
+            engine.exec_sql(SLOW_SQL)
+    assert time.perf_counter() - start < 5
+    # 连接已归还，后续查询正常
+    assert engine.select_count(File) == 10
+
+
+def test_nested_deadline_keeps_earlier():
+    with deadline.deadline(1):
+        outer = deadline.current()
+        with deadline.deadline(10):
+            assert deadline.current() is outer
+        with deadline.deadline(0.5):
+            assert deadline.remaining() <= 0.5
+    assert deadline.current() is None
+
+
+@pytest.mark.parametrize("timeout, expected", [(None, "[]"), ("5", "[5.0]")])
+def test_app_deadline_only_with_request_timeout(timeout, expected):
+    # 未配置 DB_REQUEST_TIMEOUT 时不安装截止时间中间件
+    code = ("import main; from org.app.deadline import DeadlineMiddleware; "
+            "print([m.kwargs['timeout'] for m in main.app.user_middleware if m.cls is DeadlineMiddleware])")
+    env = {"PATH": "/usr/bin:/bin"}
+    if timeout:
+        env["DB_REQUEST_TIMEOUT"] = timeout
+    result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1],
+                            capture_output=True, text=True, env=env)
+    assert result.stdout.strip().splitlines()[-1] == expected, result.stderr
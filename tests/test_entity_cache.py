@@ -0,0 +1,81 @@
+import asyncio
+
+from org.dao.cache import LRUCache, MISSING
+from org.mysql.entities import File
+from org.service import IService, AsyncIService
+
+
+class FileService(IService[File]):
+    entity_cls = File
+
+
+class AsyncFileService(AsyncIService[File]):
+    entity_cls = File
+
+
+def test_put_rejected_after_invalidate_during_load():
+    cache = LRUCache(maxsize=2, ttl=60)
+    version = cache.version()
+    cache.invalidate(1)
+    cache.put(1, "stale", version=version)
+    assert cache.get(1) is MISSING
+    # 其他 key 不受影响
+    cache.put(2, "fresh", version=version)
+    assert cache.get(2) == "fresh"
+    cache.put(1, "fresh", version=cache.version())
+    assert cache.get(1) == "fresh"
+    assert cache.stats()["rejections"] == 1
+
+
+def test_put_rejected_after_clear_or_pruned_invalidation():
+    cache = LRUCache(maxsize=2, ttl=60)
+    version = cache.version()
+    cache.clear()
+    cache.put(1, "stale", version=version)
+    assert cache.get(1) is MISSING
+    # 失效记录超过 maxsize 后被移除，加载开始后的失效仍能识别
+    version = cache.version()
+    for key in (1, 2, 3):
+        cache.invalidate(key)
+    cache.put(1, "stale", version=version)
+    assert cache.get(1) is MISSING
+
+
+def test_get_by_id_does_not_cache_value_invalidated_during_load(engine, monkeypatch):
+    service = FileService(engine, entity_cache=LRUCache(ttl=60))
+    select_by_id = engine.select_by_id
+
+    def racing_select(cls, eid, **kwargs):
+        entity = select_by_id(cls=cls, eid=eid, **kwargs)
+        # 加载完成前另一个请求删除了该行
+        engine.remove_by_id(File, eid)
+        service._evict(eid)
+        return entity
+
+    monkeypatch.setattr(engine, "select_by_id", racing_select)
+    assert service.get_by_id(3).id == 3
+    monkeypatch.undo()
+    assert service.get_by_id(3) is None
+
+
+def test_async_writes_evict_shared_cache(engine, async_engine):
+    cache = LRUCache(ttl=60)
+    service = FileService(engine, entity_cache=cache)
+    async_service = AsyncFileService(async_engine, entity_cache=cache)
+
+    async def main():
+        assert service.get_by_id(4).name == "file_4.bin"
+        await async_service.exec_sql("UPDATE file SET name = 'renamed' WHERE id = 4")
+        assert service.get_by_id(4).name == "renamed"
+        assert (await async_service.get_by_id(5)).id == 5
+        await async_service.remove_by_args(id=5)
+        assert service.get_by_id(5) is None
+        await async_engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_remove_by_args_endpoint_evicts_get_by_id(client):
+    assert client.get("/file/7").json()["data"]["id"] == 7
+    assert client.post("/file/remove_by_args", json={"id": 7}).json()["data"] is True
+    assert client.get("/file/7").json()["data"] is None
@@ -0,0 +1,27 @@
+import importlib
+import subprocess
+import sys
+from pathlib import Path
+
+import dotenv
+
+import org
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_dotenv_loaded_on_package_import(monkeypatch):
+    calls = []
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda *args, **kwargs: calls.append(args) or True)
+    importlib.reload(org)
+    assert calls == [()]
+
+
+def test_env_read_at_import_sees_dotenv(tmp_path):
+    # .env 在创建任何引擎之前生效：导入 org 后读取的环境变量已包含 .env 中的值
+    (tmp_path / "org").symlink_to(ROOT / "org")
+    (tmp_path / ".env").write_text("DORIS_DB_PORT=123\n")
+    code = "from org.dao.doris import doris_config; print(doris_config().port)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            env={"PATH": "/usr/bin:/bin", "PYTHONPATH": str(tmp_path)})
+    assert result.stdout.strip() == "123", result.stderr
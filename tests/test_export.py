@@ -0,0 +1,76 @@
+import csv
+import io
+
+import pytest
+
+from conftest import make_file
+from org.mysql.entities import File
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+def engine100(engine):
+    engine.bulk_insert(File, [make_file(i) for i in range(11, 101)])
+    return engine
+
+
+def test_export_parquet_file_in_row_groups(engine100, tmp_path):
+    path = tmp_path / "file.parquet"
+    result = engine100.export("SELECT * FROM file", str(path), batch_size=30)
+    assert result.format == 'parquet' and result.rows == 100 and result.batches == 4
+    assert pq.read_metadata(path).num_row_groups == 4
+    table = pq.read_table(path)
+    assert table.num_rows == 100 and sorted(table.column('id').to_pylist()) == list(range(1, 101))
+
+
+def test_export_list_uses_entity_types(engine100):
+    sink = io.BytesIO()
+    result = engine100.export_list(File, sink, File.user_id == 1, fmt='arrow', batch_size=10)
+    table = pa.ipc.open_file(io.BytesIO(sink.getvalue())).read_all()
+    assert result.rows == table.num_rows == 34
+    assert str(table.schema.field('created_at').type) == 'timestamp[us]'
+    assert table.schema.field('id').type == pa.int64()
+
+
+def test_export_csv(engine100):
+    sink = io.BytesIO()
+    result = engine100.export("SELECT id, name FROM file WHERE id <= 3 ORDER BY id", sink, fmt='csv')
+    rows = list(csv.reader(io.StringIO(sink.getvalue().decode())))
+    assert rows == [['id', 'name'], ['1', 'file_1.bin'], ['2', 'file_2.bin'], ['3', 'file_3.bin']]
+    assert result.rows == 3
+
+
+def test_export_rejects_writes_and_unknown_format(engine100):
+    with pytest.raises(ValueError):
+        engine100.export("DELETE FROM file", io.BytesIO(), fmt='csv')
+    with pytest.raises(ValueError):
+        engine100.export("SELECT id FROM file", io.BytesIO(), fmt='xml')
+    assert engine100.select_count(File) == 100
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow", "csv"])
+def test_export_endpoint_streams(client, engine100, fmt):
+    response = client.post(f'/file/export?format={fmt}&batch_size=10', json={'user_id': 1})
+    assert response.status_code == 200
+    assert response.headers['content-disposition'] == f'attachment; filename="file.{fmt}"'
+    if fmt == 'parquet':
+        rows = pq.read_table(io.BytesIO(response.content)).num_rows
+    elif fmt == 'arrow':
+        rows = pa.ipc.open_file(io.BytesIO(response.content)).read_all().num_rows
+    else:
+        rows = len(list(csv.reader(io.StringIO(response.content.decode())))) - 1
+    assert rows == 34
+
+
+def test_export_endpoint_sql(client, engine100):
+    response = client.post('/file/export?format=arrow',
+                           json={'sql': 'SELECT user_id, sum(size) AS s, NULL AS x FROM file GROUP BY user_id'})
+    table = pa.ipc.open_file(io.BytesIO(response.content)).read_all()
+    assert table.column('user_id').to_pylist() == [0, 1, 2]
+    assert table.column('x').to_pylist() == [None, None, None]
+    assert client.post('/file/export', json={'sql': 'DELETE FROM file'}).json()['code'] == 400
+    assert client.post('/file/export?format=xml', json={}).json()['code'] == 400
+    response = client.post('/file/export?format=csv', json={'sql': 'SELECT id FROM file WHERE id < 0'})
+    assert response.content == b'id\r\n'
@@ -0,0 +1,48 @@
+import pytest
+
+from conftest import make_file
+from org.mysql.entities import File
+
+
+@pytest.fixture
+def engine23(engine):
+    engine.insert_batch([make_file(i) for i in range(11, 24)])
+    return engine
+
+
+def test_keyset_pages_cover_all_rows_in_order(engine23):
+    expected = [f.id for f in sorted(engine23.select_list(File), key=lambda f: (f.created_at, f.id), reverse=True)]
+    seen, cursor, pages = [], None, []
+    while True:
+        page = engine23.page(File, order_by="created_at", page_size=5, keyset=True, cursor=cursor, columns=["name"])
+        pages.append(page)
+        seen += [r.id for r in page.records]
+        if not page.next_cursor:
+            break
+        cursor = page.next_cursor
+    assert seen == expected and len(pages) == 5
+    assert pages[0].prev_cursor is None and not pages[-1].has_next
+    # 向前翻页
+    back = engine23.page(File, order_by="created_at", page_size=5, cursor=pages[-1].prev_cursor)
+    assert [r.id for r in back.records] == [r.id for r in pages[-2].records]
+
+
+def test_keyset_ascending_with_filter(engine23):
+    first = engine23.page(File, File.user_id == 1, order_by=[File.created_at], asc=True, page_size=3, keyset=True)
+    second = engine23.page(File, File.user_id == 1, order_by=[File.created_at], asc=True, page_size=3,
+                           cursor=first.next_cursor)
+    ids = [r.id for r in first.records + second.records]
+    assert ids == [1, 4, 7, 10, 13, 16]
+
+
+def test_cursor_for_other_order_is_rejected(engine23):
+    page = engine23.page(File, order_by="created_at", page_size=3, keyset=True)
+    with pytest.raises(ValueError):
+        engine23.page(File, order_by="id", cursor=page.next_cursor)
+
+
+def test_page_endpoint_keyset(client):
+    data = client.post("/file/page?keyset=true&page_size=4").json()["data"]
+    assert len(data["data"]) == 4 and data["next_cursor"]
+    data = client.post("/file/page", params={"cursor": data["next_cursor"], "page_size": 4}).json()["data"]
+    assert data["prev_cursor"] is not None
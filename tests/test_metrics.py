@@ -0,0 +1,37 @@
+from org.dao.metrics import metrics
+from org.mysql.entities import File
+
+
+def sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_metrics_endpoint_reports_pool_query_and_service(client):
+    before = metrics.render()
+    assert client.post('/file/page?page_size=3').status_code == 200
+    assert client.get('/file/3').status_code == 200
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    text = response.text
+    assert '# TYPE db_query_seconds histogram' in text
+    assert '# TYPE db_pool_in_use gauge' in text
+    assert sample(text, 'db_pool_in_use{engine="test"}') == 0
+    assert sample(text, 'db_pool_size{engine="test"}') > 0
+    for name in ('db_query_seconds_count{engine="test",table="file",operation="select"}',
+                 'db_service_seconds_count{engine="test",table="file",method="page"}',
+                 'db_service_seconds_count{engine="test",table="file",method="get_by_id"}',
+                 'db_pool_checkout_wait_seconds_count{engine="test"}'):
+        assert sample(text, name) > sample(before, name), name
+
+
+def test_write_statements_are_labelled_by_operation(engine):
+    name = 'db_query_seconds_count{engine="test",table="file",operation="delete"}'
+    before = sample(metrics.render(), name)
+    engine.exec_sql("DELETE FROM file WHERE id = 10")
+    engine.remove_by_id(File, 9)
+    # 原生 SQL 没有编译结果，计入 table="raw"；ORM 语句按表名与操作类型计数
+    assert sample(metrics.render(), name) == before + 1
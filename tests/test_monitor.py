@@ -0,0 +1,29 @@
+from org.dao.doris import doris_config
+from org.dao.mysql import mysql_config
+from org.dao.pgsql import pgsql_config
+
+
+def test_admin_routes_disabled_without_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/admin/slow_queries").status_code == 403
+    assert client.delete("/admin/slow_queries", headers={"X-Admin-Token": "x"}).status_code == 403
+    assert client.get("/admin/statement_cache").status_code == 403
+
+
+def test_admin_routes_require_token(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.get("/admin/slow_queries").status_code == 401
+    assert client.get("/admin/slow_queries", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    response = client.get("/admin/slow_queries", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200 and response.json()["code"] == 0
+    assert client.delete("/admin/slow_queries", headers={"X-Admin-Token": "secret"}).status_code == 200
+    # /metrics 供 Prometheus 抓取，不需要鉴权
+    assert client.get("/metrics").status_code == 200
+
+
+def test_slow_query_log_off_by_default(monkeypatch):
+    for config, var in ((mysql_config, "MYSQL"), (pgsql_config, "PGSQL"), (doris_config, "DORIS")):
+        monkeypatch.delenv(f"{var}_DB_SLOW_QUERY_MS", raising=False)
+        assert config().slow_query_ms is None
+        monkeypatch.setenv(f"{var}_DB_SLOW_QUERY_MS", "250")
+        assert config().slow_query_ms == 250
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from conftest import make_file
+from org.mysql.entities import File
+
+STRATEGIES = ("exact", "none", "cached", "estimate", "window")
+
+
+@pytest.fixture
+def engine53(engine):
+    engine.bulk_insert(File, [make_file(i) for i in range(11, 54)])
+    return engine
+
+
+@pytest.mark.parametrize("count", STRATEGIES)
+@pytest.mark.parametrize("parallel", [False, True])
+def test_count_strategies_return_same_page(engine53, count, parallel):
+    page = engine53.page(File, File.user_id == 1, page_num=2, page_size=5, order_by="id", asc=True,
+                         count=count, parallel=parallel)
+    assert [r.id for r in page.records] == [16, 19, 22, 25, 28]
+    assert page.has_next
+    assert page.total == (None if count == "none" else 18)
+
+
+def test_window_count_out_of_range_and_none_last_page(engine53):
+    page = engine53.page(File, page_num=99, page_size=5, count="window")
+    assert page.total == 53 and page.records == []
+    page = engine53.page(File, page_num=11, page_size=5, count="none")
+    assert not page.has_next and len(page.records) == 3
+
+
+def test_unknown_count_strategy(engine53):
+    with pytest.raises(ValueError):
+        engine53.page(File, count="bad")
+
+
+def test_async_count_strategies(engine53, async_engine):
+    async def main():
+        for count in STRATEGIES:
+            page = await async_engine.page(File, File.user_id == 1, page_num=2, page_size=5, order_by="id", asc=True,
+                                           count=count, parallel=True)
+            assert [r.id for r in page.records] == [16, 19, 22, 25, 28]
+        await async_engine.dispose()
+
+    asyncio.run(main())
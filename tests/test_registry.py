@@ -0,0 +1,67 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import sqlite_config
+from org.dao.async_engine import AsyncDbEngine
+from org.dao.engine import DbEngine
+from org.dao.registry import EngineRegistry
+
+
+@pytest.fixture
+def registry(config, tmp_path):
+    _registry = EngineRegistry()
+    _registry.calls = []
+
+    def factory(name, cls, _config):
+        def _create():
+            _registry.calls.append(name)
+            return cls(_config)
+        return _create
+
+    _registry.register('sq', factory('sq', DbEngine, config.model_copy(update={'pool_size': 3})))
+    _registry.register('sq_async', factory('sq_async', AsyncDbEngine, config))
+    _registry.register('broken', factory('broken', DbEngine, sqlite_config(tmp_path / "missing" / "x.db")))
+    yield _registry
+    asyncio.run(_registry.dispose())
+
+
+def test_importing_app_creates_no_engine():
+    code = "import main; from org.dao.registry import registry; print(len(registry.created()), len(registry.names()))"
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    created, registered = output.split()
+    assert created == '0' and int(registered) > 0
+
+
+def test_get_creates_engine_once(registry):
+    assert registry.calls == []
+    assert registry.get('sq') is registry.get('sq')
+    assert registry.calls == ['sq']
+    with pytest.raises(KeyError):
+        registry.get('unknown')
+
+
+def test_warm_up_fills_pool_and_ready_pings_warmed_engines(registry):
+    async def main():
+        assert await registry.ready() == {}
+        assert await registry.warm_up(['sq', 'sq_async', 'broken']) == {'sq': True, 'sq_async': True, 'broken': False}
+        assert registry.get('sq').get_engine().pool.checkedin() == 3
+        return await registry.ready()
+
+    assert asyncio.run(main()) == {'sq': True, 'sq_async': True, 'broken': False}
+
+
+def test_ready_endpoint(client, registry, monkeypatch):
+    from org.app import health
+    monkeypatch.setattr(health, 'registry', registry)
+    asyncio.run(registry.warm_up(['sq']))
+    response = client.get('/health/ready')
+    assert response.status_code == 200 and response.json()['data'] == {'engines': {'sq': True}}
+    asyncio.run(registry.warm_up(['broken']))
+    response = client.get('/health/ready')
+    assert response.status_code == 503 and response.json()['data'] == {'engines': {'sq': True, 'broken': False}}
+    assert client.get('/health/live').status_code == 200
@@ -0,0 +1,118 @@
+import contextvars
+import time
+
+import pytest
+
+from conftest import make_file, sqlite_config
+from org.dao.engine import DbEngine
+from org.dao.purge import PurgeJob
+from org.dao.replica import pin_scope, use_primary
+from org.mysql.entities import File, Base
+from org.service import IService
+
+
+class FileService(IService[File]):
+    entity_cls = File
+
+
+def make_db(path, rows: int):
+    _engine = DbEngine(sqlite_config(path))
+    Base.metadata.create_all(_engine.get_engine())
+    _engine.bulk_insert(File, [make_file(i) for i in range(1, rows + 1)])
+    _engine.dispose()
+    return str(path)
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """
+    主库 5 行，两个副本分别 3 行 / 4 行，按行数区分读操作落在哪个库
+    """
+    primary = make_db(tmp_path / "primary.db", 5)
+    replicas = [{'database': make_db(tmp_path / "r1.db", 3)}, {'database': make_db(tmp_path / "r2.db", 4)}]
+
+    engines = []
+
+    def build(**kwargs):
+        kwargs.setdefault('replicas', replicas)
+        engines.append(DbEngine(sqlite_config(primary, **kwargs)))
+        return engines[-1]
+
+    yield build
+    for _engine in engines:
+        _engine.dispose()
+
+
+def test_round_robin_reads_hit_replicas(replicated):
+    engine = replicated()
+    assert [engine.select_count(File) for _ in range(4)] == [3, 4, 3, 4]
+
+
+def test_use_primary_and_force_primary(replicated):
+    engine = replicated()
+    with use_primary():
+        assert engine.select_count(File) == 5
+    service = FileService(db_engine=engine)
+    assert service.count_by_args(force_primary=True) == 5
+    assert service.count_by_args() in (3, 4)
+
+
+def test_write_pins_primary_in_current_context(replicated):
+    engine = replicated()
+
+    def request():
+        engine.remove_by_id(File, 5)
+        return [engine.select_count(File) for _ in range(2)]
+
+    assert contextvars.copy_context().run(request) == [4, 4]
+    assert engine.select_count(File) in (3, 4)
+
+
+def test_pin_scope_restores_replica_reads(replicated):
+    engine = replicated()
+    with pin_scope():
+        engine.insert(make_file(6))
+        assert engine.select_count(File) == 6
+    assert {engine.select_count(File) for _ in range(2)} == {3, 4}
+
+
+def test_purge_job_ticks_are_not_pinned(replicated):
+    engine = replicated()
+
+    class Writer:
+        entity_cls = File
+        reads = []
+
+        def purge_deleted(self, **kwargs):
+            # 上一轮写入后，本轮的读仍落在副本
+            self.reads.append(engine.select_count(File))
+            engine.insert(make_file(100 + len(self.reads)))
+            return 0
+
+    job = PurgeJob()
+    job.register(Writer())
+    job.start(interval=0.01)
+    deadline = time.time() + 5
+    while len(Writer.reads) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    job.stop()
+    assert len(Writer.reads) >= 3 and set(Writer.reads) <= {3, 4}
+
+
+def test_failing_replica_is_ejected(replicated, tmp_path):
+    engine = replicated(replicas=[{'database': str(tmp_path / "missing" / "x.db")}], replica_max_failures=2)
+    assert [engine.select_count(File) for _ in range(3)] == [5, 5, 5]
+    assert [r['healthy'] for r in engine.replicas.stats()] == [False]
+
+
+def test_least_outstanding_avoids_busy_replica(replicated):
+    engine = replicated(replica_policy='least_outstanding')
+    rows = engine.iter_list(File)
+    next(rows)
+    busy = [r for r in engine.replicas.stats() if r['outstanding']]
+    assert len(busy) == 1
+    # 另一个副本空闲，后续读都落在空闲副本
+    counts = {engine.select_count(File) for _ in range(3)}
+    assert len(counts) == 1
+    rows.close()
+    assert all(r['outstanding'] == 0 for r in engine.replicas.stats())
@@ -0,0 +1,51 @@
+from unittest import mock
+
+from sqlalchemy import select
+
+from org.dao.cache import ResultCache, MISSING
+from org.mysql.entities import File
+
+
+def test_key_distinguishes_bind_values_without_compiling(engine):
+    dialect = engine.get_engine().dialect
+    with mock.patch.object(type(select(File)), "compile", side_effect=AssertionError("compiled")):
+        key = ResultCache.key("list", select(File).where(File.id == 1), dialect)
+        assert key == ResultCache.key("list", select(File).where(File.id == 1), dialect)
+        assert key != ResultCache.key("list", select(File).where(File.id == 2), dialect)
+        assert key != ResultCache.key("count", select(File).where(File.id == 1), dialect)
+        assert ResultCache.key("list", select(File).where(File.id.in_([1, 2])), dialect) != \
+            ResultCache.key("list", select(File).where(File.id.in_([1, 3])), dialect)
+
+
+def test_put_rejected_when_table_written_during_query():
+    cache = ResultCache()
+    version = cache.version(["file"])
+    cache.invalidate_table("file")
+    cache.put("k", [1], tables=["file"], ttl=60, version=version)
+    assert cache.get("k") is MISSING
+    # 其他表的写入不影响
+    version = cache.version(["file"])
+    cache.invalidate_table("other")
+    cache.put("k", [1], tables=["file"], ttl=60, version=version)
+    assert cache.get("k") == [1]
+    version = cache.version(["file"])
+    cache.clear()
+    cache.put("k", [2], tables=["file"], ttl=60, version=version)
+    assert cache.get("k") is MISSING
+
+
+def test_write_during_cached_query_is_not_cached(engine):
+    loader = engine.select_count
+
+    def racing_count(cls, *args, **kwargs):
+        count = loader(cls, *args, **kwargs)
+        if "cache_ttl" not in kwargs:
+            # 查询返回前另一个请求删除了一行
+            engine.remove_by_id(File, 1)
+        return count
+
+    with mock.patch.object(engine, "select_count", side_effect=racing_count):
+        assert engine.select_count(File, cache_ttl=60) == 10
+    assert engine.select_count(File, cache_ttl=60) == 9
+    assert engine.select_count(File, cache_ttl=60) == 9
+    assert engine.result_cache.stats()["hits"] == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+from fastapi.encoders import jsonable_encoder
+
+from org.common import iresponse
+from org.models.resps import FileResponse
+from org.mysql.entities import File
+
+
+def test_select_list_as_rows_matches_entities(engine):
+    rows = engine.select_list(File, user_id=1, as_rows=True)
+    entities = engine.select_list(File, user_id=1)
+    assert type(rows[0]).__name__ == 'FileRow' and not hasattr(rows[0], '__dict__')
+    assert [r._asdict() for r in rows] == [{k: getattr(e, k) for k in rows[0]._fields} for e in entities]
+    # 同一组查询列复用同一个行类型
+    assert type(engine.select_list(File, as_rows=True)[0]) is type(rows[0])
+
+
+def test_rows_with_selected_columns(engine):
+    rows = engine.select_list(File, columns=['id', 'name'], order_by='id', asc=True, as_rows=True)
+    assert rows[0]._fields == ('id', 'name') and (rows[0].id, rows[0].name) == (1, 'file_1.bin')
+
+
+def test_rows_serialize_like_entities(engine):
+    row = engine.select_one(File, id=2, as_rows=True)
+    assert row.id == 2
+    assert FileResponse.model_validate(row).name == 'file_2.bin'
+    data = jsonable_encoder(iresponse.success_with_data([row]))['data']
+    assert data[0]['name'] == 'file_2.bin' and data[0]['created_at'] == '2024-01-01T00:00:02'
+
+
+def test_other_read_paths_accept_as_rows(engine):
+    page = engine.page(File, page_num=2, page_size=3, order_by='id', asc=True, count='window', as_rows=True)
+    assert page.total == 10 and [r.id for r in page.records] == [4, 5, 6]
+    page = engine.page(File, keyset=True, page_size=4, order_by='created_at', asc=True, as_rows=True)
+    following = engine.page(File, cursor=page.next_cursor, page_size=4, order_by='created_at', asc=True, as_rows=True)
+    assert [r.id for r in following.records] == [5, 6, 7, 8]
+    assert [r.id for r in engine.iter_list(File, order_by='id', asc=True, as_rows=True)][:3] == [1, 2, 3]
+    assert [r.id for r in engine.select_by_ids(File, [3, 1], as_rows=True)] == [3, 1]
+
+
+def test_result_cache_keeps_rows_and_entities_apart(engine):
+    rows = engine.select_list(File, cache_ttl=10, as_rows=True)
+    entities = engine.select_list(File, cache_ttl=10)
+    assert type(rows[0]).__name__ == 'FileRow' and type(entities[0]) is File
+
+
+def test_async_select_list_as_rows(engine, async_engine):
+    async def main():
+        rows = await async_engine.select_list(File, order_by='id', asc=True, as_rows=True)
+        await async_engine.dispose()
+        return rows
+
+    rows = asyncio.run(main())
+    assert type(rows[0]).__name__ == 'FileRow' and [r.id for r in rows] == list(range(1, 11))
+
+
+def test_list_by_args_endpoint_returns_rows(client):
+    response = client.post('/file/list_by_args', json={'user_id': 1})
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert sorted(r['id'] for r in data) == [1, 4, 7, 10] and 'created_at' in data[0]
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import event
+
+from conftest import make_file
+from org.common.ierrors import ErrorCodes
+from org.common.iexception import IException
+from org.mysql.entities import File
+from org.service import IService
+
+
+class FileService(IService[File]):
+    entity_cls = File
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine.get_engine(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_save_full_entity_is_one_upsert(engine):
+    service = FileService(engine)
+    statements = _count_statements(engine)
+    assert service.save(make_file(3, name="updated"))
+    assert service.save(make_file(100))
+    assert len(statements) == 2
+    assert service.get_by_id(3).name == "updated" and service.get_by_id(100) is not None
+
+
+def test_save_partial_entity_updates_by_primary_key(engine):
+    service = FileService(engine)
+    statements = _count_statements(engine)
+    assert service.save(File(id=4, name="partial"))
+    assert len(statements) == 1
+    saved = service.get_by_id(4)
+    assert saved.name == "partial" and saved.size == 40
+
+
+def test_save_partial_entity_with_missing_primary_key_raises(engine):
+    service = FileService(engine)
+    statements = _count_statements(engine)
+    # 部分字段不能新建记录：一条 UPDATE 未命中即报错，不再查询后插入
+    with pytest.raises(IException) as e:
+        service.save(File(id=100, name="partial"))
+    assert e.value.code == ErrorCodes.DATA_NOT_EXIST.code
+    assert len(statements) == 1 and statements[0].startswith("UPDATE")
+    with pytest.raises(IException):
+        service.save(File(id=100))
+    assert service.save(File(id=5)) and service.count_by_args() == 10
+
+
+def test_save_without_primary_key_inserts(engine):
+    service = FileService(engine)
+    entity = make_file(0, id=None)
+    assert service.save(entity)
+    assert entity.id is not None and service.count_by_args() == 11
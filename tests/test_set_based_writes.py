@@ -0,0 +1,33 @@
+from sqlalchemy import event
+
+from org.mysql.entities import File
+
+
+def _statements(engine):
+    statements = []
+    event.listen(engine.get_engine(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_update_is_a_single_statement(engine):
+    statements = _statements(engine)
+    assert engine.update(File(name="zz", bucket="q"), File.user_id == 1) == 4
+    assert len(statements) == 1 and statements[0].startswith("UPDATE")
+    assert engine.select_count(File, name="zz") == 4 and engine.select_count(File, bucket="q") == 4
+
+
+def test_update_orm_mode(engine):
+    assert engine.update(File(name="orm"), File.user_id == 2, orm=True) == 3
+    assert engine.select_count(File, name="orm") == 3
+
+
+def test_update_without_values_is_noop(engine):
+    assert engine.update(File(id=3)) == 0
+
+
+def test_remove_by_args_is_a_single_statement(engine):
+    statements = _statements(engine)
+    assert engine.remove_by_args(File, user_id=1) == 4
+    assert len(statements) == 1 and statements[0].startswith("DELETE")
+    assert engine.remove_by_args(File, File.user_id == 2, orm=True) == 3
+    assert engine.select_count(File) == 3
@@ -0,0 +1,67 @@
+import pytest
+
+from org.dao.engine import DbEngine
+from org.dao.registry import EngineRegistry
+from org.dao.slowlog import fingerprint, redact
+from org.mysql.entities import File
+
+
+@pytest.fixture
+def slow_engine(engine, config):
+    """
+    阈值极小的慢查询日志：每条语句都会被记录
+    """
+    _engine = DbEngine(config.model_copy(update={'slow_query_ms': 1e-6}))
+    yield _engine
+    _engine.dispose()
+
+
+def explained(slow_engine):
+    # EXPLAIN 在后台线程执行，等待其完成
+    slow_engine.slow_log._executor.shutdown(wait=True)
+    slow_engine.slow_log._executor = None
+    return slow_engine.slow_log.recent()
+
+
+def test_fingerprint_normalizes_literals_and_lists():
+    a = fingerprint("SELECT * FROM file WHERE id IN (1, 2, 3) AND name = 'a' /* hint */")
+    b = fingerprint("select *  from file where id in (7) and name = 'bbb'")
+    assert a == b == "select * from file where id in (?+) and name = ?"
+    assert fingerprint("INSERT INTO file (id) VALUES (?), (?)") == "insert into file (id) values (...)"
+
+
+def test_redact_hides_strings_and_sensitive_names():
+    assert redact({'id': 3, 'name': 'secret.bin', 'password': 1}) == {'id': 3, 'name': '<str len=10>', 'password': '***'}
+    assert redact([(1,), (2,)], executemany=True) == '<2 rows>'
+
+
+def test_slow_query_recorded_with_explain(slow_engine):
+    slow_engine.select_one(File, File.id == 3)
+    entries = explained(slow_engine)
+    entry = next(e for e in entries if e['fingerprint'].startswith('select') and 'from file' in e['fingerprint'])
+    assert entry['engine'] == 'test'
+    assert 3 in entry['params']
+    assert isinstance(entry['explain'], list) and entry['explain']
+    # EXPLAIN 语句本身不计入慢查询
+    assert not any(e['fingerprint'].startswith('explain') for e in entries)
+
+
+def test_execution_option_skips_logging(slow_engine):
+    with slow_engine.get_engine().connect() as conn:
+        conn.exec_driver_sql("SELECT count(*) FROM file", execution_options={'slowlog': False})
+    assert slow_engine.slow_log.recent() == []
+
+
+def test_admin_slow_queries_endpoint(client, slow_engine, monkeypatch):
+    from org.app import monitor
+    registry = EngineRegistry()
+    registry.register('slow', lambda: slow_engine)
+    registry.get('slow')
+    monkeypatch.setattr(monitor, 'registry', registry)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+    slow_engine.select_count(File)
+    data = client.get("/admin/slow_queries", headers=headers).json()['data']
+    assert list(data.keys()) == ['slow'] and data['slow']
+    assert client.delete("/admin/slow_queries?engine=slow", headers=headers).status_code == 200
+    assert client.get("/admin/slow_queries", headers=headers).json()['data'] == {'slow': []}
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from models import Doc, DocService
+from org.common.iexception import IException
+
+
+@pytest.fixture
+def service(engine):
+    engine.bulk_insert(Doc, [dict(id=i, title=f"t{i}", owner=i % 2) for i in range(1, 7)])
+    # 绕过 ORM 写入的行 is_delete 为 NULL，视为未删除
+    engine.exec_sql("UPDATE test_doc SET is_delete = NULL WHERE id IN (5, 6)")
+    return DocService(engine)
+
+
+def test_null_is_delete_counts_as_not_deleted(service):
+    assert [d.id for d in service.list_by_args()] == [1, 2, 3, 4, 5, 6]
+    assert service.count_by_args() == 6
+    assert service.get_one(id=5).id == 5
+
+
+def test_soft_deleted_rows_are_filtered_by_default(service):
+    assert service.soft_delete([1, 5]) == 2
+    assert sorted(d.id for d in service.list_by_args()) == [2, 3, 4, 6]
+    assert service.count_by_args() == 4
+    assert service.count_by_args(owner=1) == 1
+    assert service.page(page_size=10).total == 4
+    assert service.get_by_id(5) is None
+    # 已删除的行不会重复删除
+    assert service.soft_delete([1, 5]) == 0
+
+
+def test_with_deleted_returns_all_rows(service):
+    service.soft_delete(owner=0)
+    assert sorted(d.id for d in service.list_by_args()) == [1, 3, 5]
+    assert sorted(d.id for d in service.list_by_args(with_deleted=True)) == [1, 2, 3, 4, 5, 6]
+    assert service.count_by_args(with_deleted=True) == 6
+    assert service.get_by_id(2, with_deleted=True).is_delete
+    # 显式按逻辑删除列过滤时不追加条件
+    assert sorted(d.id for d in service.list_by_args(is_delete=True)) == [2, 4, 6]
+
+
+def test_delete_by_id_and_purge(service):
+    assert service.delete_by_id(3)
+    with pytest.raises(IException):
+        service.delete_by_id(3)
+    assert service.purge_deleted() == 1
+    assert service.count_by_args(with_deleted=True) == 5
+
+
+def test_async_soft_delete(service, async_engine):
+    async def main():
+        assert await async_engine.select_count(Doc) == 6
+        assert await async_engine.soft_delete(Doc, [6]) == 1
+        assert await async_engine.select_count(Doc) == 5
+        assert await async_engine.select_count(Doc, with_deleted=True) == 6
+        await async_engine.dispose()
+
+    asyncio.run(main())
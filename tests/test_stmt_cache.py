@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from sqlalchemy import desc, or_
+
+from conftest import make_file
+from org.dao.stmt_cache import _Uncacheable, query_shape
+from org.mysql.entities import File
+
+QUERIES = [
+    ((), dict(user_id=1, order_by=File.created_at)),
+    ((), dict(user_id=2, order_by=File.created_at, asc=True)),
+    ((File.size > 100, File.id.in_([1, 2, 3, 40])), dict(name='file_40.bin')),
+    ((File.id.in_([1, 2, 3, 4, 5, 6]),), dict(order_by=[desc(File.size), File.id])),
+    ((File.name.like('file_1%'),), dict(columns=['id', 'name'])),
+    ((File.name.like('file!_2%', escape='!'),), dict()),
+    ((File.size >= 0,), dict(exclude_columns=['md5'])),
+    ((File.id.in_([]),), dict()),
+    ((or_(File.id == 1, File.id == 2),), dict()),
+]
+
+
+@pytest.fixture
+def engine50(engine):
+    engine.bulk_insert(File, [make_file(i) for i in range(11, 51)])
+    return engine
+
+
+def ids(rows):
+    return [r.id for r in rows]
+
+
+@pytest.mark.parametrize("args,kwargs", QUERIES)
+def test_cached_statement_matches_uncached(engine50, args, kwargs):
+    engine50.stmt_cache.maxsize = 0
+    expected = ids(engine50.select_list(File, *args, **kwargs))
+    engine50.stmt_cache.maxsize = 512
+    assert ids(engine50.select_list(File, *args, **kwargs)) == expected
+    assert ids(engine50.select_list(File, *args, **kwargs)) == expected
+
+
+def test_shape_ignores_values():
+    shape1, params1 = query_shape(File, (File.id.in_([1, 2]),), {'user_id': 1})
+    shape2, params2 = query_shape(File, (File.id.in_([3, 4, 5]),), {'user_id': 2})
+    assert shape1 == shape2
+    assert params1 == {'p0': [1, 2], 'p1': 1} and params2 == {'p0': [3, 4, 5], 'p1': 2}
+    with pytest.raises(_Uncacheable):
+        query_shape(File, (or_(File.id == 1, File.id == 2),))
+
+
+def test_stats_count_hits_and_bypass(engine50):
+    engine50.stmt_cache.clear()
+    for user_id in range(3):
+        engine50.select_list(File, user_id=user_id)
+    assert engine50.select_one(File, user_id=1, order_by=File.id, asc=True).id == 1
+    engine50.select_list(File, or_(File.id == 1, File.id == 2))
+    stats = engine50.stmt_cache.stats()
+    assert stats['size'] == 2 and stats['hits'] == 2 and stats['misses'] == 2
+    assert stats['bypass'] == 1
+
+
+def test_async_engine_uses_statement_cache(engine50, async_engine):
+    async def main():
+        rows = await async_engine.select_list(File, File.id.in_([3, 4]), order_by=File.id, asc=True)
+        one = await async_engine.select_one(File, user_id=2, order_by=File.id, asc=True)
+        await async_engine.select_list(File, File.id.in_([7, 8, 9]), order_by=File.id, asc=True)
+        await async_engine.dispose()
+        return ids(rows), one.id, async_engine.stmt_cache.stats()
+
+    rows, one, stats = asyncio.run(main())
+    assert rows == [3, 4] and one == 2
+    assert stats['hits'] == 1 and stats['misses'] == 2
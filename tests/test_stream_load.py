@@ -0,0 +1,166 @@
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+
+from org.doris.entities import File
+from org.doris.service import FileService
+from org.doris.stream_load import StreamLoadConfig, StreamLoader, StreamLoadError
+
+
+class DorisStandIn:
+    """
+    Doris FE / BE 的 HTTP 替身：FE 将 Stream Load 307 重定向到 BE，BE 按 responses 依次响应
+    responses 的元素为 dict（返回 JSON）或 None（不响应直接断开连接，模拟网络错误）
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.load_states = []
+        self.requests = []
+        self.error_log = "row 1: column size is not a number\nrow 2: column size is not a number\n"
+        self.fe = self._serve(self._fe_handler())
+        self.be = self._serve(self._be_handler())
+
+    @staticmethod
+    def _serve(handler):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return server
+
+    def url(self, server, path):
+        return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+    def _fe_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_PUT(self):
+                self.send_response(307)
+                self.send_header("Location", stand_in.url(stand_in.be, self.path))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                state = stand_in.load_states.pop(0)
+                _reply(self, 200, json.dumps({"data": state}).encode())
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _be_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_PUT(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stand_in.requests.append((self.headers["label"], self.headers["Authorization"], body))
+                response = stand_in.responses.pop(0)
+                if response is None:
+                    self.close_connection = True
+                    return
+                _reply(self, 200, json.dumps(response).encode())
+
+            def do_GET(self):
+                _reply(self, 200, stand_in.error_log.encode())
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        for server in (self.fe, self.be):
+            server.shutdown()
+            server.server_close()
+
+
+def _reply(handler, status, data: bytes):
+    handler.send_response(status)
+    handler.send_header("Content-Length", str(len(data)))
+    handler.end_headers()
+    handler.wfile.write(data)
+
+
+def _success(label, rows):
+    return {"Label": label, "Status": "Success", "Message": "OK", "NumberTotalRows": rows, "NumberLoadedRows": rows}
+
+
+@pytest.fixture
+def doris():
+    stand_in = DorisStandIn()
+    yield stand_in
+    stand_in.close()
+
+
+@pytest.fixture
+def loader(doris):
+    return StreamLoader(StreamLoadConfig(host="127.0.0.1", port=doris.fe.server_address[1], database="db",
+                                         username="root", password="pw", max_retries=2, retry_backoff=0))
+
+
+def _files(n):
+    now = datetime.datetime(2024, 1, 1)
+    return [File(id=i, created_at=now, updated_at=now, user_id=1, name=f"f{i}", upload_status=1) for i in range(n)]
+
+
+def test_redirect_to_be_keeps_authorization(doris, loader):
+    doris.responses = [_success("batch_0", 3)]
+    report = loader.load(File, _files(3), label="batch")
+    assert report.rows == 3 and report.chunks == 1
+    label, authorization, body = doris.requests[0]
+    assert label == "batch_0" and authorization == loader._authorization
+    assert body.count(b"\x02") == 3
+
+
+def test_network_error_retries_with_same_label(doris, loader):
+    doris.responses = [None, _success("batch_0", 2)]
+    report = loader.load(File, _files(2), label="batch")
+    assert report.rows == 2
+    assert [request[0] for request in doris.requests] == ["batch_0", "batch_0"]
+
+
+def test_network_errors_exhaust_retries(doris, loader):
+    doris.responses = [None, None, None]
+    with pytest.raises(StreamLoadError):
+        loader.load(File, _files(1), label="batch")
+    assert len(doris.requests) == 3
+
+
+def test_label_already_exists_polls_load_state(doris, loader):
+    doris.responses = [{"Label": "batch_0", "Status": "Label Already Exists", "ExistingJobStatus": "RUNNING"}]
+    doris.load_states = ["PREPARE", "VISIBLE"]
+    report = loader.load(File, _files(4), label="batch")
+    assert report.rows == 4 and report.results[0].existing
+    assert doris.load_states == []
+
+
+def test_label_already_exists_aborted(doris, loader):
+    doris.responses = [{"Label": "batch_0", "Status": "Label Already Exists", "ExistingJobStatus": "ABORTED"}]
+    with pytest.raises(StreamLoadError):
+        loader.load(File, _files(1), label="batch")
+
+
+def test_failure_fetches_error_url(doris, loader):
+    doris.responses = [{"Label": "batch_0", "Status": "Fail", "Message": "too many filtered rows",
+                        "NumberTotalRows": 2, "NumberFilteredRows": 2,
+                        "ErrorURL": doris.url(doris.be, "/api/_load_error_log?file=x")}]
+    with pytest.raises(StreamLoadError) as e:
+        loader.load(File, _files(2), label="batch")
+    assert e.value.result.error_rows == ["row 1: column size is not a number", "row 2: column size is not a number"]
+
+
+def test_insert_entities_with_return_ids_uses_bulk_insert(engine):
+    service = FileService(stream_load_threshold=1)
+    service.db_engine = engine
+    service.stream_loader = mock.Mock(side_effect=AssertionError("stream load"))
+    files = [File(created_at=datetime.datetime(2024, 1, 1), updated_at=datetime.datetime(2024, 1, 1),
+                  upload_status=1, name=f"n{i}") for i in range(3)]
+    assert service.insert_entities(files, return_ids=True)
+    assert all(f.id is not None for f in files)
+    assert not service.stream_loader.load.called
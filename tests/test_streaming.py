@@ -0,0 +1,29 @@
+from conftest import make_file
+from org.mysql.entities import File
+from org.service import IService
+
+
+class FileService(IService[File]):
+    entity_cls = File
+
+
+def test_iter_list_streams_in_batches(engine):
+    engine.insert_batch([make_file(i) for i in range(11, 251)])
+    rows = list(engine.iter_list(File, File.user_id == 1, columns=["id", "size"], batch_size=7,
+                                 order_by=File.id, asc=True))
+    assert [r.id for r in rows] == list(range(1, 251, 3))
+    assert rows[0].name is None
+    assert engine.get_engine().pool.checkedout() == 0
+
+
+def test_iter_sql_and_early_close(engine):
+    rows = engine.iter_sql("SELECT id, name FROM file WHERE id < :n", params={"n": 5}, batch_size=2)
+    assert next(rows) == {"id": 1, "name": "file_1.bin"}
+    rows.close()
+    assert engine.get_engine().pool.checkedout() == 0
+    assert sum(1 for _ in engine.iter_sql("SELECT * FROM file", cls=None)) == 10
+
+
+def test_iter_by_args(engine):
+    service = FileService(engine)
+    assert sum(f.size for f in service.iter_by_args(user_id=2)) == (2 + 5 + 8) * 10
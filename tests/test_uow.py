@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event
+
+from conftest import make_file
+from models import Doc, DocService
+from org.dao.uow import current_uow, unit_of_work
+
+
+@pytest.fixture
+def events(engine):
+    stats = {'checkout': 0, 'commit': 0}
+    for name in stats:
+        event.listen(engine.get_engine(), name, lambda *args, _name=name: stats.__setitem__(_name, stats[_name] + 1))
+    return stats
+
+
+def test_service_calls_share_one_session_and_commit(engine, events):
+    service = DocService(engine)
+    with unit_of_work() as uow:
+        service.insert(Doc(id=1, title='a', owner=1))
+        service.update_by_id(Doc(id=1, title='b'))
+        assert service.get_by_id(1).title == 'b'
+        assert service.count_by_args(owner=1) == 1
+        assert current_uow() is uow
+    assert events == {'checkout': 1, 'commit': 1}
+    assert current_uow() is None
+    assert service.get_by_id(1).title == 'b'
+
+
+def test_exception_rolls_back_all_writes(engine):
+    service = DocService(engine)
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            service.insert(Doc(id=1, title='a'))
+            service.insert(Doc(id=2, title='b'))
+            raise RuntimeError
+    assert service.count_by_args() == 0
+
+
+def test_failed_write_marks_rollback_only(engine):
+    service = DocService(engine)
+    with unit_of_work() as uow:
+        service.insert(Doc(id=1, title='a'))
+        with pytest.raises(Exception):
+            engine.insert(make_file(1))
+        assert uow.rollback_only
+    assert service.get_by_id(1) is None
+
+
+@pytest.fixture
+def app_client(engine):
+    """
+    使用 UnitOfWorkDep 的最小应用：/docs 写入两行，fail=1 时写入后抛出异常
+    """
+    from fastapi import APIRouter, FastAPI
+    from fastapi.testclient import TestClient
+    from org.app.deps import UnitOfWorkDep
+    service = DocService(engine)
+    router = APIRouter(dependencies=[UnitOfWorkDep])
+
+    @router.post("/docs")
+    def create_docs(fail: int = 0):
+        service.insert(Doc(id=1, title='a'))
+        service.insert(Doc(id=2, title='b'))
+        if fail:
+            raise RuntimeError("fail")
+        return {'count': service.count_by_args()}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_request_commits_before_response(app_client, engine, events):
+    response = app_client.post('/docs')
+    assert response.status_code == 200 and response.json() == {'count': 2}
+    assert events == {'checkout': 1, 'commit': 1}
+    # 响应返回时已提交，其他连接可见
+    assert DocService(engine).count_by_args() == 2
+
+
+def test_request_error_rolls_back(app_client, engine):
+    assert app_client.post('/docs?fail=1').status_code == 500
+    assert DocService(engine).count_by_args() == 0
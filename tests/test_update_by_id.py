@@ -0,0 +1,64 @@
+import asyncio
+
+from models import Doc, Setting
+from org.dao import BulkResult
+from org.mysql.entities import File
+
+
+def _seed(engine):
+    engine.bulk_insert(Setting, [dict(scope="app", name="theme", value="dark"),
+                                 dict(scope="app", name="lang", value="en")])
+
+
+def test_update_by_id_writes_only_dirty_columns(engine):
+    engine.bulk_insert(Doc, [dict(id=1, title="a", owner=1)])
+    doc = engine.select_one(Doc, Doc.id == 1)
+    doc.title = "b"
+    assert engine.update_by_id(doc) == 1
+    assert engine.select_one(Doc, Doc.id == 1).title == "b"
+    assert engine.update_by_id(dict(id=2, title="x"), cls=Doc) == 0
+
+
+def test_update_by_id_composite_primary_key(engine):
+    _seed(engine)
+    assert engine.update_by_id(dict(scope="app", name="theme", value="light"), cls=Setting) == 1
+    assert engine.select_one(Setting, Setting.name == "theme").value == "light"
+    assert engine.select_one(Setting, Setting.name == "lang").value == "en"
+    # 只有主键时按主键判断是否存在
+    assert engine.update_by_id(dict(scope="app", name="lang"), cls=Setting) == 1
+    assert engine.update_by_id(dict(scope="app", name="missing"), cls=Setting) == 0
+
+
+def test_async_update_by_id_composite_primary_key(engine, async_engine):
+    _seed(engine)
+
+    async def main():
+        assert await async_engine.update_by_id(dict(scope="app", name="lang", value="fr"), cls=Setting) == 1
+        assert await async_engine.update_by_id(dict(scope="app", name="lang"), cls=Setting) == 1
+        assert await async_engine.update_by_id(dict(scope="web", name="lang"), cls=Setting) == 0
+        await async_engine.dispose()
+
+    asyncio.run(main())
+    assert engine.select_one(Setting, Setting.name == "lang").value == "fr"
+
+
+def test_bulk_update_reports_affected_rows(engine):
+    result = engine.bulk_update(File, [dict(id=1, name="a"), dict(id=2, name="b"), dict(id=999, name="c")])
+    assert result.rows == 2 and result.affected == [2]
+    assert engine.select_by_id(File, 2).name == "b" and engine.select_by_id(File, 999) is None
+
+
+def test_doris_bulk_update_skips_missing_ids(engine, monkeypatch):
+    # Doris 按部分列 upsert 更新：不存在的主键不写入，否则会插入缺少 NOT NULL 列的新行
+    monkeypatch.setattr(engine.config, "dialect", "doris")
+    calls = []
+
+    def upsert(cls, rows, chunk_size=None, **kwargs):
+        calls.append((rows, kwargs["update_columns"]))
+        return BulkResult(rows=len(rows), chunks=1, affected=[len(rows)])
+
+    monkeypatch.setattr(engine, "upsert", upsert)
+    result = engine.bulk_update(File, [dict(id=1, name="a"), dict(id=999, name="c"), dict(id=3, size=7)])
+    assert calls == [([dict(id=1, name="a")], ["name"]), ([dict(id=3, size=7)], ["size"])]
+    assert result.rows == 2 and result.affected == [1, 1]
+    assert engine.bulk_update(File, [dict(id=998, name="x")]).rows == 0 and len(calls) == 2
@@ -0,0 +1,69 @@
+import asyncio
+import datetime
+
+from sqlalchemy.dialects import mysql, postgresql
+
+from conftest import make_file
+from org.dao.engine import DbEngine, build_upsert
+from org.mysql.entities import File
+
+NOW = datetime.datetime(2024, 1, 1)
+
+
+def _row(i, **kwargs):
+    values = dict(id=i, name=f"u{i}", size=1, bucket="b", user_id=1, created_at=NOW, updated_at=NOW, upload_status=1)
+    values.update(kwargs)
+    return values
+
+
+def test_upsert_inserts_and_updates_in_chunks(config):
+    engine = DbEngine(config.model_copy(update={"bulk_chunk_size": 2}))
+    File.metadata.create_all(engine.get_engine())
+    engine.bulk_insert(File, [_row(i) for i in range(1, 4)])
+    result = engine.upsert(File, [_row(i, name=f"v{i}") for i in range(2, 7)])
+    # 每批的受影响行数：SQLite 中插入与更新都计为 1
+    assert result.affected == [2, 2, 1] and result.rows == 5 and result.chunks == 3
+    assert [(f.id, f.name) for f in engine.select_list(File, order_by="id", asc=True)] == \
+        [(1, "u1"), (2, "v2"), (3, "v3"), (4, "v4"), (5, "v5"), (6, "v6")]
+
+
+def test_upsert_update_columns(engine):
+    engine.upsert(File, [_row(1, name="zz", size=99)], update_columns=["size"])
+    saved = engine.select_by_id(File, 1)
+    assert saved.name == "file_1.bin" and saved.size == 99
+
+
+def test_build_upsert_per_dialect():
+    sql = str(build_upsert(File, "mysql", [_row(1)], {}).compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE" in sql
+    sql = str(build_upsert(File, "postgresql", [_row(1)], {"update_columns": ["name"]})
+              .compile(dialect=postgresql.dialect()))
+    assert sql.endswith("ON CONFLICT (id) DO UPDATE SET name = excluded.name")
+    # Doris Unique Key 模型：INSERT 即按主键覆盖，部分列更新只写入主键与更新列
+    sql = str(build_upsert(File, "doris", [_row(1)], {"update_columns": ["name"]}).compile(dialect=mysql.dialect()))
+    assert sql == "INSERT INTO file (id, name) VALUES (%s, %s)"
+
+
+def test_async_upsert(engine, async_engine):
+    async def main():
+        assert (await async_engine.upsert(File, [_row(i) for i in range(9, 12)])).rows == 3
+        # 字段集合不同的实体分组写入，不丢失后面行的字段
+        result = await async_engine.upsert(File, [make_file(1), make_file(2, md5="b")])
+        assert result.affected == [1, 1]
+        await async_engine.dispose()
+
+    asyncio.run(main())
+    assert engine.select_count(File) == 11
+    assert engine.select_by_id(File, 10).name == "u10"
+    assert engine.select_by_id(File, 2).md5 == "b" and engine.select_by_id(File, 1).md5 is None
+
+
+def test_upsert_entities_with_mixed_none_fields(engine):
+    # to_row 忽略 None 字段，两种字段集合交替出现，各自分组分批
+    entities = [make_file(i, md5=f"m{i}" if i % 2 else None, path=None) for i in range(1, 13)]
+    entities[0].path = "/p1"
+    result = engine.upsert(File, entities, chunk_size=4)
+    assert result.rows == 12 and result.affected == [1, 4, 2, 4, 1]
+    saved = {f.id: f for f in engine.select_list(File, File.id <= 12)}
+    assert [saved[i].md5 for i in range(1, 13)] == [f"m{i}" if i % 2 else None for i in range(1, 13)]
+    assert saved[1].path == "/p1"